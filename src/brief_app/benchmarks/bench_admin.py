@@ -0,0 +1,120 @@
+"""Benchmark the admin changelists on a large seeded database.
+
+Seeds a synthetic dataset, then renders each changelist (unfiltered, searched
+and drilled down by date) as a superuser and reports the best time out of
+`--repeat` and the queries it ran, flagging pages over the 200 ms target:
+
+    cd src/brief_app
+    python benchmarks/bench_admin.py --users 200000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+TARGET_MS = 200
+
+
+def setup_django(database: str) -> None:
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ["DATABASE_URL"] = f"sqlite:///{database}"
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "brief_app.settings")
+
+    import django
+
+    django.setup()
+
+    from django.core.management import call_command
+
+    call_command("migrate", verbosity=0)
+
+
+def pages():
+    from django.urls import reverse
+    from django.utils import timezone
+
+    from insurance_app.models import ContactMessage, UserProfile
+
+    today = timezone.localdate()
+    prefix = UserProfile.objects.order_by("pk")[1000].username[:-1]
+    email = ContactMessage.objects.order_by("pk")[1000].email[:6]
+    year = {"date__year": today.year}
+    month = {**year, "date__month": today.month}
+    timestamp = {"timestamp__year": today.year, "timestamp__month": today.month}
+
+    def changelist(model):
+        return reverse(f"admin:insurance_app_{model}_changelist")
+
+    return {
+        "users": (changelist("userprofile"), {}),
+        "users: search": (changelist("userprofile"), {"q": prefix}),
+        "predictions": (changelist("predictionhistory"), {}),
+        "predictions: search": (changelist("predictionhistory"), {"q": prefix}),
+        "predictions: month": (changelist("predictionhistory"), timestamp),
+        "predictions: obese": (
+            changelist("predictionhistory"),
+            {"bmi_category": "obese"},
+        ),
+        "appointments": (changelist("appointment"), {}),
+        "appointments: search": (changelist("appointment"), {"q": prefix}),
+        "appointments: year": (changelist("appointment"), year),
+        "appointments: month": (changelist("appointment"), month),
+        "messages": (changelist("contactmessage"), {}),
+        "messages: search": (changelist("contactmessage"), {"q": email}),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=200_000)
+    parser.add_argument("--predictions-per-user", type=float, default=5)
+    parser.add_argument("--appointments-per-user", type=float, default=3)
+    parser.add_argument("--messages", type=int, default=500_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_django(f"{tmp}/bench.sqlite3")
+
+        from django.db import connection
+        from django.test import Client
+        from django.test.utils import CaptureQueriesContext
+
+        from insurance_app import synthetic
+        from insurance_app.models import UserProfile
+
+        counts = synthetic.generate(
+            users=args.users,
+            messages=args.messages,
+            availability_days=0,
+            distributions=synthetic.Distributions(
+                predictions_per_user=args.predictions_per_user,
+                appointments_per_user=args.appointments_per_user,
+            ),
+        )
+        print(", ".join(f"{name}: {count}" for name, count in counts.items()))
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+        client = Client()
+        client.force_login(UserProfile.objects.create_superuser("bench", "", "x"))
+
+        print(f"{'changelist':<24}{'ms':>9}{'queries':>9}")
+        for name, (url, params) in pages().items():
+            best = float("inf")
+            for _ in range(args.repeat):
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    response = client.get(url, params)
+                    best = min(best, time.perf_counter() - start)
+                assert response.status_code == 200, (name, response.status_code)
+            flag = "" if best * 1000 < TARGET_MS else f"  over {TARGET_MS}ms"
+            print(f"{name:<24}{best * 1000:>9.1f}{len(queries):>9}{flag}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""Benchmark the staff analytics dashboard queries.
+
+Dashboard cost depends only on the rollup tables, so rather than inserting
+100M prediction rows the script writes the rollups such a history would
+produce: three years of daily and monthly rows for every dimension value,
+each with a quantile sketch whose counts add up to `--history-rows`. It then
+times the functions behind the analytics page and a refresh of freshly
+inserted history:
+
+    cd src/brief_app
+    python benchmarks/bench_analytics.py --history-rows 100000000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DAYS = 3 * 365
+VALUES = {
+    "region": ["Northeast", "Northwest", "Southeast", "Southwest"],
+    "smoker": ["No", "Yes"],
+    "sex": ["Female", "Male"],
+    "age_category": [
+        "early_adulthood",
+        "late_adulthood",
+        "mid_adulthood",
+        "young_adult",
+    ],
+    "bmi_category": ["normal_weight", "obese", "over_weight", "under_weight"],
+}
+
+
+def setup_django(database: str) -> None:
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ["DATABASE_URL"] = f"sqlite:///{database}"
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "brief_app.settings")
+
+    import django
+
+    django.setup()
+
+    from django.core.management import call_command
+
+    call_command("migrate", verbosity=0)
+
+
+def seed_rollups(history_rows: int, end: date) -> None:
+    from insurance_app.models import PortfolioRollup
+    from insurance_app.sketches import QuantileSketch
+
+    rng = random.Random(0)
+    per_day = history_rows // DAYS
+    rows = []
+    monthly = defaultdict(int)
+    for offset in range(DAYS):
+        day = end - timedelta(days=offset)
+        buckets = [("all", "", per_day)]
+        for dimension, values in VALUES.items():
+            shares = [rng.random() + 0.5 for _ in values]
+            buckets += [
+                (dimension, value, int(per_day * share / sum(shares)))
+                for value, share in zip(values, shares)
+            ]
+        for dimension, value, count in buckets:
+            monthly[(day.replace(day=1), dimension, value)] += count
+            sample = QuantileSketch()
+            sample.extend(rng.lognormvariate(9.4, 0.6) for _ in range(200))
+            scale = count / sample.count
+            sketch = QuantileSketch(
+                sample.offset, [round(c * scale) for c in sample.counts]
+            )
+            rows.append(
+                PortfolioRollup(
+                    day=day,
+                    dimension=dimension,
+                    value=value,
+                    count=count,
+                    total_charges=Decimal(count * 13000),
+                    sketch=sketch.to_json(),
+                )
+            )
+    for (month, dimension, value), count in monthly.items():
+        sample = QuantileSketch()
+        sample.extend(rng.lognormvariate(9.4, 0.6) for _ in range(200))
+        scale = count / sample.count
+        rows.append(
+            PortfolioRollup(
+                grain=PortfolioRollup.Grain.MONTH,
+                day=month,
+                dimension=dimension,
+                value=value,
+                count=count,
+                total_charges=Decimal(count * 13000),
+                sketch=QuantileSketch(
+                    sample.offset, [round(c * scale) for c in sample.counts]
+                ).to_json(),
+            )
+        )
+    PortfolioRollup.objects.bulk_create(rows, batch_size=2000)
+
+
+def time_ms(function, *args, repeat: int = 5, **kwargs) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def bench_refresh(rows: int) -> float:
+    from django.utils import timezone
+
+    from insurance_app import analytics
+    from insurance_app.models import PredictionHistory, UserProfile
+
+    user = UserProfile.objects.create_user("bench", password="bench")
+    rng = random.Random(1)
+    PredictionHistory.objects.bulk_create(
+        PredictionHistory(
+            user=user,
+            age=rng.randint(18, 64),
+            weight=rng.randint(45, 130),
+            height=rng.randint(150, 200),
+            num_children=0,
+            smoker=rng.choice(VALUES["smoker"]),
+            region=rng.choice(VALUES["region"]),
+            sex=rng.choice(VALUES["sex"]),
+            predicted_charges=Decimal(rng.randint(100000, 5000000)) / 100,
+        )
+        for _ in range(rows)
+    )
+    PredictionHistory.objects.update(timestamp=timezone.now() - timedelta(hours=1))
+    start = time.perf_counter()
+    analytics.refresh_rollups()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--history-rows", type=int, default=100_000_000)
+    parser.add_argument("--refresh-rows", type=int, default=50_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_django(f"{tmp}/bench.sqlite3")
+
+        from django.utils import timezone
+
+        from insurance_app import analytics
+
+        end = timezone.localdate()
+        seed_rollups(args.history_rows, end)
+
+        print(f"{'query':<36}{'ms':>10}")
+        for days in (30, 90, 365, DAYS):
+            start = end - timedelta(days=days - 1)
+            print(
+                f"{f'breakdown region, {days} days':<36}"
+                f"{time_ms(analytics.breakdown, 'region', start, end):>10.1f}"
+            )
+        for days, period in ((90, "day"), (365, "week"), (DAYS, "month")):
+            start = end - timedelta(days=days - 1)
+            print(
+                f"{f'trend per {period}, {days} days':<36}"
+                f"{time_ms(analytics.trend, start, end, period):>10.1f}"
+            )
+
+        seconds = bench_refresh(args.refresh_rows)
+        print(
+            f"refresh of {args.refresh_rows} new rows: {seconds:.2f}s "
+            f"({args.refresh_rows / seconds:.0f} rows/s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
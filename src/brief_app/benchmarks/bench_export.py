@@ -0,0 +1,116 @@
+"""Benchmark the streamed prediction exports on a large seeded database.
+
+Seeds a synthetic dataset, then exports the first N predictions as CSV and
+NDJSON for growing N, reporting rows per second and the peak Python memory of
+each run (`tracemalloc`). Streaming keeps the peak flat whatever N; the
+"buffered" row builds the same CSV from model instances in one string, as a
+non-streaming view would:
+
+    cd src/brief_app
+    python benchmarks/bench_export.py --users 200000
+"""
+
+import argparse
+import csv
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from itertools import islice
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def setup_django(database: str) -> None:
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ["DATABASE_URL"] = f"sqlite:///{database}"
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "brief_app.settings")
+
+    import django
+
+    django.setup()
+
+    from django.core.management import call_command
+
+    call_command("migrate", verbosity=0)
+
+
+def streamed(rows: int, format: str) -> int:
+    from insurance_app import exports
+
+    lines = exports.render(
+        islice(exports.iter_all_rows(exports.STAFF_EXPORT_FIELDS), rows),
+        exports.STAFF_EXPORT_FIELDS,
+        format,
+    )
+    return sum(len(line) for line in lines)
+
+
+def buffered(rows: int) -> int:
+    from insurance_app import exports
+    from insurance_app.models import PredictionHistory
+
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(exports.STAFF_EXPORT_FIELDS)
+    for prediction in list(PredictionHistory.objects.order_by("timestamp")[:rows]):
+        writer.writerow(
+            [getattr(prediction, field) for field in exports.STAFF_EXPORT_FIELDS]
+        )
+    return len(out.getvalue())
+
+
+def measure(export, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = export(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=200_000)
+    parser.add_argument("--predictions-per-user", type=float, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_django(f"{tmp}/bench.sqlite3")
+
+        from insurance_app import synthetic
+        from insurance_app.models import PredictionHistory
+
+        synthetic.generate(
+            users=args.users,
+            messages=0,
+            availability_days=0,
+            distributions=synthetic.Distributions(
+                predictions_per_user=args.predictions_per_user,
+                appointments_per_user=0,
+            ),
+        )
+        total = PredictionHistory.objects.count()
+        sizes = sorted({n for n in (10_000, 100_000, total) if n <= total})
+
+        print(f"{'export':<10}{'rows':>10}{'rows/s':>12}{'peak MiB':>10}{'MiB out':>9}")
+        for rows in sizes:
+            runs = [
+                ("csv", streamed, rows, "csv"),
+                ("ndjson", streamed, rows, "ndjson"),
+                ("buffered", buffered, rows),
+            ]
+            for name, export, *params in runs:
+                elapsed, peak, size = measure(export, *params)
+                print(
+                    f"{name:<10}{rows:>10}{rows / elapsed:>12,.0f}"
+                    f"{peak / 2**20:>10.1f}{size / 2**20:>9.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Benchmark the fragment endpoints against the full-page prediction and booking.
+
+Logs a user with `--appointments` appointments in, then submits the prediction
+and booking forms `--runs` times each way, reporting the mean server time per
+submission and the bytes sent back, raw and gzipped. A full-page booking is
+the POST and the page its redirect loads; a fragment submission is a single
+POST returning the result area or the appointment lists:
+
+    cd src/brief_app
+    python benchmarks/bench_fragments.py --appointments 50
+"""
+
+import argparse
+import gzip
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+PREDICTION = {"age": 35, "height": 180, "weight": 75, "num_children": 1}
+
+
+def setup_django(database: str) -> None:
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ["DATABASE_URL"] = f"sqlite:///{database}"
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "brief_app.settings")
+
+    import django
+
+    django.setup()
+
+    from django.core.management import call_command
+    from django.test.utils import setup_test_environment
+
+    call_command("migrate", verbosity=0)
+    setup_test_environment()  # Allows the test client's host.
+
+
+def submit(client, url: str, data: dict, follow: bool):
+    """Body of the response to posting `data` to `url`, with any redirect."""
+    response = client.post(url, data, follow=follow)
+    if response.status_code != 200:
+        raise SystemExit(f"{url} answered {response.status_code}")
+    return response.content
+
+
+def measure(client, url: str, data, follow: bool, runs: int):
+    submit(client, url, data(0), follow)  # Warm up templates and the model.
+    start = time.perf_counter()
+    for run in range(runs):
+        body = submit(client, url, data(run + 1), follow)
+    elapsed = time.perf_counter() - start
+    return elapsed / runs, len(body), len(gzip.compress(body))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--appointments", type=int, default=50)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_django(f"{tmp}/bench.sqlite3")
+
+        from django.test import Client
+        from django.urls import reverse
+
+        from insurance_app.models import Appointment, UserProfile
+
+        user = UserProfile.objects.create_user(
+            "bench", region="northeast", sex="male", smoker="No", **PREDICTION
+        )
+        today = date.today()
+        Appointment.objects.bulk_create(
+            Appointment(
+                user=user,
+                reason="Policy Inquiry",
+                date=today + timedelta(days=day - args.appointments // 2),
+                time="10:00",
+            )
+            for day in range(args.appointments)
+        )
+        client = Client()
+        client.force_login(user)
+
+        def prediction(run):
+            return {**PREDICTION, "smoker": "No", "age": 20 + run % 50}
+
+        def booking(run):
+            day = today + timedelta(days=run % 365 + 1)
+            return {"date": day, "time": "09:00", "reason": "Policy Inquiry"}
+
+        flows = [
+            ("predict", "full", reverse("predict"), prediction, False),
+            ("predict", "fragment", reverse("predict_result"), prediction, False),
+            ("book", "full", reverse("book_appointment"), booking, True),
+            ("book", "fragment", reverse("appointment_list"), booking, False),
+        ]
+        print(f"{'flow':<9}{'mode':<10}{'ms':>8}{'bytes':>9}{'gzipped':>9}")
+        for flow, mode, url, data, follow in flows:
+            seconds, size, compressed = measure(client, url, data, follow, args.runs)
+            print(
+                f"{flow:<9}{mode:<10}{seconds * 1000:>8.2f}"
+                f"{size:>9,}{compressed:>9,}"
+            )
+
+
+if __name__ == "__main__":
+    main()
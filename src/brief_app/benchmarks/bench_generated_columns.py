@@ -0,0 +1,133 @@
+"""Benchmark "average premium by BMI category" in Python versus in SQL.
+
+Fills a fresh SQLite database with synthetic prediction history, then answers
+the same questions two ways:
+
+* python: stream weight/height/age/charges to Python and bucket every row
+  with `compute_bmi`/`categorize_bmi`/`categorize_age`, as the app had to
+  before the categories were stored;
+* sql: GROUP BY / WHERE on the generated `bmi_category` and `age_category`
+  columns, served by their covering indexes.
+
+    cd src/brief_app
+    python benchmarks/bench_generated_columns.py --rows 1000000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from decimal import Decimal
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def setup_django(database: str) -> None:
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ["DATABASE_URL"] = f"sqlite:///{database}"
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "brief_app.settings")
+
+    import django
+
+    django.setup()
+
+    from django.core.management import call_command
+
+    call_command("migrate", verbosity=0)
+
+
+def seed(rows: int) -> None:
+    from django.db import transaction
+
+    from insurance_app.models import PredictionHistory, UserProfile
+
+    user = UserProfile.objects.create_user("bench", password="bench")
+    rng = random.Random(0)
+    batch = 10000
+    with transaction.atomic():
+        for start in range(0, rows, batch):
+            PredictionHistory.objects.bulk_create(
+                [
+                    PredictionHistory(
+                        user=user,
+                        age=rng.randint(18, 64),
+                        weight=rng.randint(45, 130),
+                        height=rng.randint(150, 200),
+                        num_children=rng.randint(0, 5),
+                        smoker=rng.choice(["Yes", "No"]),
+                        region="Northeast",
+                        sex="Male",
+                        predicted_charges=Decimal(rng.randint(100000, 5000000)) / 100,
+                    )
+                    for _ in range(min(batch, rows - start))
+                ]
+            )
+
+
+def python_side() -> tuple:
+    from insurance_app.models import (
+        PredictionHistory,
+        categorize_age,
+        categorize_bmi,
+        compute_bmi,
+    )
+
+    totals = defaultdict(lambda: [0, Decimal(0)])
+    mid_adults = 0
+    rows = (
+        PredictionHistory.objects.order_by()
+        .values_list("age", "weight", "height", "predicted_charges")
+        .iterator(chunk_size=10000)
+    )
+    for age, weight, height, charges in rows:
+        bucket = totals[categorize_bmi(compute_bmi(weight, height))]
+        bucket[0] += 1
+        bucket[1] += charges
+        mid_adults += categorize_age(age) == "mid_adulthood"
+    averages = {key: total / count for key, (count, total) in totals.items()}
+    return averages, mid_adults
+
+
+def sql_side() -> tuple:
+    from insurance_app.models import PredictionHistory
+
+    averages = {
+        row["bmi_category"]: row["average_charges"]
+        for row in PredictionHistory.objects.category_summary("bmi_category")
+    }
+    mid_adults = PredictionHistory.objects.filter(age_category="mid_adulthood").count()
+    return averages, mid_adults
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_django(f"{tmp}/bench.sqlite3")
+        start = time.perf_counter()
+        seed(args.rows)
+        print(f"seeded {args.rows} rows in {time.perf_counter() - start:.1f}s")
+
+        results = {}
+        print(f"{'mode':<10}{'seconds':>12}")
+        for name, run in (("python", python_side), ("sql", sql_side)):
+            start = time.perf_counter()
+            results[name] = run()
+            print(f"{name:<10}{time.perf_counter() - start:>12.3f}")
+
+        python_averages, python_mid = results["python"]
+        sql_averages, sql_mid = results["sql"]
+        assert python_mid == sql_mid
+        assert python_averages.keys() == sql_averages.keys()
+        for key, value in python_averages.items():
+            assert abs(float(value) - float(sql_averages[key])) < 0.01, key
+
+
+if __name__ == "__main__":
+    main()
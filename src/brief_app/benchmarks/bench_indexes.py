@@ -0,0 +1,123 @@
+"""Benchmark the hot query shapes before and after the 0010 index migration.
+
+Seeds a large synthetic dataset on the schema of migration 0009, times each
+query, applies 0010_hot_query_indexes and times them again, printing the plan
+each query ends up with:
+
+    cd src/brief_app
+    python benchmarks/bench_indexes.py --users 200000 --messages 500000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def setup_django(database: str) -> None:
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ["DATABASE_URL"] = f"sqlite:///{database}"
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "brief_app.settings")
+
+    import django
+
+    django.setup()
+
+    from django.core.management import call_command
+
+    call_command("migrate", "insurance_app", "0009", verbosity=0)
+
+
+def queries():
+    from django.utils import timezone
+
+    from insurance_app.models import Appointment, ContactMessage, UserProfile
+
+    today = timezone.localdate()
+    user = UserProfile.objects.order_by("pk")[1000]
+    prefix = user.username[:-1]
+    return {
+        "book: upcoming (user, date)": Appointment.objects.filter(
+            user=user, date__gte=today
+        ).order_by("date"),
+        "book: past (user, date)": Appointment.objects.filter(
+            user=user, date__lt=today
+        ).order_by("-date"),
+        "admin: year page, newest": Appointment.objects.filter(
+            date__year=today.year
+        ).order_by("-date", "-pk")[:100],
+        "admin: date hierarchy months": Appointment.objects.filter(
+            date__year=today.year
+        ).dates("date", "month"),
+        "admin: username search": Appointment.objects.filter(
+            user__in=UserProfile.objects.filter(username__istartswith=prefix).values(
+                "pk"
+            )
+        ).order_by("-date", "-pk")[:100],
+        "messages: newest first": ContactMessage.objects.order_by("-submitted_at")[
+            :100
+        ],
+    }
+
+
+def time_ms(queryset, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        list(queryset._chain())
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def measure():
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+    return {
+        name: (time_ms(queryset), " | ".join(queryset.explain().splitlines()))
+        for name, queryset in queries().items()
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=200_000)
+    parser.add_argument("--appointments-per-user", type=float, default=3)
+    parser.add_argument("--messages", type=int, default=500_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_django(f"{tmp}/bench.sqlite3")
+
+        from django.core.management import call_command
+
+        from insurance_app import synthetic
+
+        counts = synthetic.generate(
+            users=args.users,
+            messages=args.messages,
+            availability_days=0,
+            distributions=synthetic.Distributions(
+                predictions_per_user=0,
+                appointments_per_user=args.appointments_per_user,
+            ),
+        )
+        print(", ".join(f"{name}: {count}" for name, count in counts.items()))
+
+        before = measure()
+        call_command("migrate", "insurance_app", "0010", verbosity=0)
+        after = measure()
+
+        print(f"{'query':<32}{'before ms':>11}{'after ms':>10}  plan after")
+        for name, (before_ms, _) in before.items():
+            after_ms, plan = after[name]
+            print(f"{name:<32}{before_ms:>11.2f}{after_ms:>10.2f}  {plan}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Count the session reads and writes of a visit with each session engine.
+
+Plays the same visit with Django's database store (the engine before
+`insurance_app.sessions`) and with each `SESSION_STORE`: open the login page,
+log in with "remember me", load the welcome page `--pages` times, update the
+profile (a flash message) and book an appointment, then log out. The queries
+hitting `django_session` are counted for the whole visit and per request:
+
+    cd src/brief_app
+    python benchmarks/bench_sessions.py --pages 20
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+from collections import Counter
+from datetime import date, timedelta
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+PROFILE = {
+    "age": 35,
+    "height": 180,
+    "weight": 75,
+    "num_children": 1,
+    "smoker": "No",
+    "region": "Northeast",
+    "sex": "Male",
+}
+PASSWORD = "Bench-pass-1"
+
+
+def setup_django(database: str) -> None:
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ["DATABASE_URL"] = f"sqlite:///{database}"
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "brief_app.settings")
+
+    import django
+
+    django.setup()
+
+    from django.core.management import call_command
+    from django.test.utils import setup_test_environment
+
+    call_command("migrate", verbosity=0)
+    setup_test_environment()  # Allows the test client's host.
+
+
+def visit(pages: int) -> int:
+    """Play the visit with a new client, returning its number of requests."""
+    from django.test import Client
+    from django.urls import reverse
+
+    client = Client()
+    requests = [
+        lambda: client.get(reverse("login")),
+        lambda: client.post(
+            reverse("login"),
+            {"username": "bench", "password": PASSWORD, "remember_me": "on"},
+        ),
+        *(lambda: client.get(reverse("welcome")) for _ in range(pages)),
+        lambda: client.post(
+            reverse("profile"),
+            {**PROFILE, "username": "bench", "email": "bench@example.com"},
+        ),
+        lambda: client.post(
+            reverse("book_appointment"),
+            {
+                "date": date.today() + timedelta(days=7),
+                "time": "09:00",
+                "reason": "Policy Inquiry",
+            },
+        ),
+        lambda: client.post(reverse("logout_user")),
+    ]
+    for request in requests:
+        if request().status_code >= 400:
+            raise SystemExit("The visit failed")
+    return len(requests)
+
+
+def session_queries(captured) -> Counter:
+    """Count the `django_session` queries of `captured` by statement."""
+    counts = Counter()
+    for query in captured:
+        if "django_session" in query["sql"]:
+            counts[query["sql"].split(None, 1)[0].upper()] += 1
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_django(f"{tmp}/bench.sqlite3")
+
+        from django.conf import settings
+        from django.core.cache import caches
+        from django.db import connection
+        from django.test import override_settings
+        from django.test.utils import CaptureQueriesContext
+
+        from insurance_app.models import UserProfile
+
+        UserProfile.objects.create_user("bench", password=PASSWORD, **PROFILE)
+        engines = {
+            "django db": "django.contrib.sessions.backends.db",
+            **settings.SESSION_ENGINES,
+        }
+
+        print(
+            f"{'engine':<16}{'requests':>9}{'reads':>7}{'writes':>8}"
+            f"{'writes/req':>12}"
+        )
+        for name, engine in engines.items():
+            caches["default"].clear()
+            with override_settings(SESSION_ENGINE=engine):
+                with CaptureQueriesContext(connection) as captured:
+                    requests = visit(args.pages)
+            counts = session_queries(captured)
+            writes = counts["INSERT"] + counts["UPDATE"] + counts["DELETE"]
+            print(
+                f"{name:<16}{requests:>9}{counts['SELECT']:>7}{writes:>8}"
+                f"{writes / requests:>12.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Benchmark concurrent SQLite writes from several processes.
+
+Mimics gunicorn workers saving quotes and contact messages: each worker
+process runs a read-then-write transaction (the shape of the prediction
+flow) followed by a plain insert, in a loop. The same workload runs against
+a fresh database file with the default SQLite settings and with the tuned
+settings (WAL, synchronous=NORMAL, busy timeout, BEGIN IMMEDIATE), and the
+script reports throughput and "database is locked" failures:
+
+    cd src/brief_app
+    python benchmarks/bench_sqlite_contention.py --workers 8 --writes 200
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+MODES = {
+    "default": {"DB_SQLITE_TUNING": "false"},
+    "tuned": {"DB_SQLITE_TUNING": "true"},
+}
+
+
+def setup_django() -> None:
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "brief_app.settings")
+
+    import django
+
+    django.setup()
+
+
+def run_worker(worker: int, writes: int) -> None:
+    """Perform `writes` write transactions and print "<ok> <locked>"."""
+    setup_django()
+
+    from django.db import OperationalError, transaction
+
+    from insurance_app.models import ContactMessage, PredictionHistory, UserProfile
+
+    user = UserProfile.objects.get(username="bench")
+    ok = locked = 0
+    for i in range(writes):
+        try:
+            with transaction.atomic():
+                # Read first, then write: under a deferred transaction the
+                # lock upgrade fails immediately when another writer is active.
+                UserProfile.objects.filter(pk=user.pk).exists()
+                PredictionHistory.objects.create(
+                    user=user,
+                    age=30,
+                    weight=70,
+                    height=175,
+                    num_children=worker % 4,
+                    smoker="No",
+                    region="Northeast",
+                    sex="Male",
+                    predicted_charges=1000 + i,
+                )
+            ContactMessage.objects.create(
+                name=f"worker {worker}", email="bench@example.com", message=str(i)
+            )
+            ok += 1
+        except OperationalError as error:
+            if "locked" not in str(error):
+                raise
+            locked += 1
+    print(ok, locked)
+
+
+def run_mode(name: str, env: dict, workers: int, writes: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            **env,
+            "DATABASE_URL": f"sqlite:///{tmp}/bench.sqlite3",
+        }
+        manage = [sys.executable, str(BASE_DIR / "manage.py")]
+        subprocess.run(
+            manage + ["migrate", "-v", "0"], env=env, check=True, capture_output=True
+        )
+        subprocess.run(
+            manage
+            + [
+                "shell",
+                "-c",
+                "from insurance_app.models import UserProfile; "
+                "UserProfile.objects.create_user('bench', password='bench')",
+            ],
+            env=env,
+            check=True,
+            capture_output=True,
+        )
+
+        start = time.perf_counter()
+        processes = [
+            subprocess.Popen(
+                [
+                    sys.executable,
+                    __file__,
+                    "--worker",
+                    str(worker),
+                    "--writes",
+                    str(writes),
+                ],
+                env=env,
+                stdout=subprocess.PIPE,
+                text=True,
+            )
+            for worker in range(workers)
+        ]
+        results = [p.communicate()[0].strip().splitlines()[-1] for p in processes]
+        elapsed = time.perf_counter() - start
+
+    ok = sum(int(r.split()[0]) for r in results)
+    locked = sum(int(r.split()[1]) for r in results)
+    print(f"{name:<10}{ok:>10}{locked:>10}{elapsed:>12.2f}{ok / elapsed:>12.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--writes", type=int, default=200)
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker is not None:
+        run_worker(args.worker, args.writes)
+        return
+
+    print(f"{'mode':<10}{'ok':>10}{'locked':>10}{'seconds':>12}{'ok/s':>12}")
+    for name, env in MODES.items():
+        run_mode(name, env, args.workers, args.writes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""Benchmark the Jinja2 ports of the busiest pages against their Django templates.
+
+Loads the prediction, prediction history and booking pages once for a user
+with `--rows` predictions and appointments, then renders each page's context
+`--runs` times with both engines, reporting the mean render time. Queries are
+not included: the context's querysets are evaluated by the first render. The
+second table times loading the templates into a fresh Jinja2 environment,
+compiling them or reading them from the bytecode cache, as a new worker
+process does:
+
+    cd src/brief_app
+    python benchmarks/bench_templates.py --rows 50
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+PROFILE = {
+    "age": 35,
+    "height": 180,
+    "weight": 75,
+    "num_children": 1,
+    "smoker": "No",
+    "region": "northeast",
+    "sex": "male",
+}
+TEMPLATES = (
+    "insurance_app/base_final.html",
+    "insurance_app/predict.html",
+    "insurance_app/prediction_history.html",
+    "insurance_app/book_appointment.html",
+    "insurance_app/includes/prediction_result.html",
+    "insurance_app/includes/appointment_lists.html",
+)
+
+
+def setup_django(database: str) -> None:
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ["DATABASE_URL"] = f"sqlite:///{database}"
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "brief_app.settings")
+
+    import django
+
+    django.setup()
+
+    from django.core.management import call_command
+    from django.test.utils import setup_test_environment
+
+    call_command("migrate", verbosity=0)
+    setup_test_environment()  # Records the contexts of the rendered pages.
+
+
+def page_context(response):
+    """The template name and context of the page rendered for `response`."""
+    from django.test.utils import ContextList
+
+    from insurance_app.jinja import Template
+
+    contexts = response.context
+    if not isinstance(contexts, ContextList):
+        contexts = [contexts]
+    for template, context in zip(response.templates, contexts):
+        if isinstance(template, Template):
+            return template.name, dict(context)
+    raise SystemExit("The page was not rendered with Jinja2")
+
+
+def time_render(engine, name: str, context: dict, request, runs: int) -> float:
+    template = engine.get_template(name)
+    template.render(dict(context), request)
+    start = time.perf_counter()
+    for _ in range(runs):
+        template.render(dict(context), request)
+    return (time.perf_counter() - start) / runs
+
+
+def time_load(cache_dir) -> float:
+    """Seconds to load `TEMPLATES` into a fresh Jinja2 environment."""
+    import jinja2
+    from django.template import engines
+    from django.test import override_settings
+
+    from insurance_app import jinja
+
+    dirs = engines["jinja2"].template_dirs
+    with override_settings(JINJA2_BYTECODE_DIR=cache_dir):
+        env = jinja.environment(loader=jinja2.FileSystemLoader(dirs))
+    if cache_dir is None:
+        env.bytecode_cache = None
+    start = time.perf_counter()
+    for name in TEMPLATES:
+        env.get_template(name)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50)
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_django(f"{tmp}/bench.sqlite3")
+
+        from django.template import engines
+        from django.test import Client
+        from django.urls import reverse
+
+        from insurance_app.models import Appointment, PredictionHistory, UserProfile
+
+        user = UserProfile.objects.create_user("bench", **PROFILE)
+        today = date.today()
+        for i in range(args.rows):
+            PredictionHistory.objects.create(
+                user=user, predicted_charges=1000 + i * 7.5, **PROFILE
+            )
+        Appointment.objects.bulk_create(
+            Appointment(
+                user=user,
+                reason="Policy Inquiry",
+                date=today + timedelta(days=day - args.rows // 2),
+                time="10:00",
+            )
+            for day in range(args.rows)
+        )
+        client = Client()
+        client.force_login(user)
+        pages = [
+            ("predict", client.post(reverse("predict"), PROFILE)),
+            ("history", client.get(reverse("prediction_history"))),
+            ("book", client.get(reverse("book_appointment"))),
+        ]
+
+        print(f"{'page':<9}{'django ms':>11}{'jinja2 ms':>11}{'speed-up':>10}")
+        for page, response in pages:
+            name, context = page_context(response)
+            request = response.wsgi_request
+            django_s, jinja_s = (
+                time_render(engines[alias], name, context, request, args.runs)
+                for alias in ("django", "jinja2")
+            )
+            print(
+                f"{page:<9}{django_s * 1000:>11.3f}{jinja_s * 1000:>11.3f}"
+                f"{django_s / jinja_s:>9.1f}x"
+            )
+
+        cache_dir = Path(tmp) / "bytecode"
+        cache_dir.mkdir()
+        compile_s = time_load(None)
+        time_load(str(cache_dir))  # Fills the cache.
+        cached_s = time_load(str(cache_dir))
+        print(f"\n{'load':<20}{'ms':>8}")
+        print(f"{'compiled':<20}{compile_s * 1000:>8.2f}")
+        print(f"{'bytecode cache':<20}{cached_s * 1000:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
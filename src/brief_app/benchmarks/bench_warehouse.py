@@ -0,0 +1,106 @@
+"""Benchmark incremental warehouse exports against the size of the table.
+
+For each table size, seeds a synthetic dataset, runs the first (full) export,
+then adds `--new-rows` predictions and times the incremental run that picks
+them up. The incremental run should cost the same whatever the table size:
+
+    cd src/brief_app
+    python benchmarks/bench_warehouse.py --users 20000 200000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def setup_django(database: str, export_dir: str) -> None:
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ["DATABASE_URL"] = f"sqlite:///{database}"
+    os.environ["WAREHOUSE_EXPORT_DIR"] = export_dir
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "brief_app.settings")
+
+    import django
+
+    django.setup()
+
+
+def reset(users: int, predictions_per_user: float) -> None:
+    from django.core.management import call_command
+
+    from insurance_app import synthetic
+
+    call_command("flush", interactive=False, verbosity=0)
+    synthetic.generate(
+        users=users,
+        messages=0,
+        availability_days=0,
+        distributions=synthetic.Distributions(
+            predictions_per_user=predictions_per_user, appointments_per_user=0
+        ),
+    )
+
+
+def add_predictions(count: int) -> None:
+    from insurance_app.models import PredictionHistory, UserProfile
+
+    user = UserProfile.objects.order_by("pk").first()
+    PredictionHistory.objects.bulk_create(
+        PredictionHistory(
+            user=user,
+            age=40,
+            weight=80,
+            height=180,
+            num_children=1,
+            smoker="No",
+            region="Northeast",
+            sex="Male",
+            predicted_charges=1000,
+        )
+        for _ in range(count)
+    )
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, nargs="+", default=[20_000, 200_000])
+    parser.add_argument("--predictions-per-user", type=float, default=5)
+    parser.add_argument("--new-rows", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_django(f"{tmp}/bench.sqlite3", f"{tmp}/warehouse")
+
+        import shutil
+
+        from django.core.management import call_command
+
+        from insurance_app import warehouse
+        from insurance_app.models import PredictionHistory
+
+        call_command("migrate", verbosity=0)
+        print(f"{'table rows':>12}{'full s':>9}{'new rows':>10}{'incremental ms':>16}")
+        for users in args.users:
+            shutil.rmtree(warehouse.export_dir(), ignore_errors=True)
+            reset(users, args.predictions_per_user)
+            rows = PredictionHistory.objects.count()
+            # The rows were just created: export them without waiting.
+            full, _ = timed(warehouse.export_changes, settle_seconds=0)
+            add_predictions(args.new_rows)
+            incremental, result = timed(warehouse.export_changes, settle_seconds=0)
+            assert result.rows == args.new_rows, result
+            print(f"{rows:>12}{full:>9.1f}{result.rows:>10}{incremental * 1000:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
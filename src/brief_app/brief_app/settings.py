@@ -10,6 +10,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
 import os
+import sys
 from pathlib import Path
 from dotenv import load_dotenv
 import dj_database_url
@@ -17,6 +18,25 @@ import dj_database_url
 # Load the environmental variables of fichier .env
 load_dotenv()
 
+
+def env_bool(name: str, default: bool) -> bool:
+    """Read a boolean environment variable ("true", "1", "yes" are truthy)."""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("true", "1", "yes", "on")
+
+
+def env_int(name: str, default: int | None) -> int | None:
+    """Read an integer environment variable; "none" means no limit."""
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    if value.strip().lower() == "none":
+        return None
+    return int(value)
+
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -55,8 +75,11 @@ TAILWIND_APP_NAME = "theme"
 
 
 MIDDLEWARE = [
+    "insurance_app.middleware.QueryBudgetMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
+    "insurance_app.middleware.PrerenderedPageMiddleware",
+    "insurance_app.middleware.ReplicaStickinessMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -68,35 +91,146 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = "brief_app.urls"
 
+TEMPLATE_CONTEXT_PROCESSORS = [
+    "django.template.context_processors.debug",
+    "django.template.context_processors.request",
+    "django.contrib.auth.context_processors.auth",
+    "django.contrib.messages.context_processors.messages",
+]
+
+# Templates: the busiest pages are ported to Jinja2 under
+# insurance_app/jinja2/; the Jinja2 engine is tried first and every other
+# template falls back to the Django engine. JINJA2_TEMPLATES=false renders
+# everything with Django templates. Compiled Jinja2 templates are cached as
+# bytecode under JINJA2_BYTECODE_DIR (a per-user temporary directory when
+# unset), so new worker processes skip compiling them.
+JINJA2_TEMPLATES = env_bool("JINJA2_TEMPLATES", True)
+JINJA2_BYTECODE_DIR = os.getenv("JINJA2_BYTECODE_DIR")
+
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
         "DIRS": [BASE_DIR / "templates"],
         "APP_DIRS": True,
-        "OPTIONS": {
-            "context_processors": [
-                "django.template.context_processors.debug",
-                "django.template.context_processors.request",
-                "django.contrib.auth.context_processors.auth",
-                "django.contrib.messages.context_processors.messages",
-            ],
-        },
+        "OPTIONS": {"context_processors": TEMPLATE_CONTEXT_PROCESSORS},
     },
 ]
+if JINJA2_TEMPLATES:
+    TEMPLATES.insert(
+        0,
+        {
+            "NAME": "jinja2",
+            "BACKEND": "insurance_app.jinja.Jinja2",
+            "APP_DIRS": True,
+            "OPTIONS": {
+                "environment": "insurance_app.jinja.environment",
+                "context_processors": TEMPLATE_CONTEXT_PROCESSORS,
+            },
+        },
+    )
 
 WSGI_APPLICATION = "brief_app.wsgi.application"
 
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
+#
+# Connection reuse is driven from the environment:
+#   DB_CONN_MAX_AGE        seconds a connection is kept between requests
+#                          (0 closes it after each request, "none" = forever)
+#   DB_CONN_HEALTH_CHECKS  ping reused connections before handing them out
+#   DB_POOL                use the psycopg 3 connection pool (PostgreSQL only)
+#   DB_POOL_MIN_SIZE / DB_POOL_MAX_SIZE / DB_POOL_TIMEOUT
+#   DB_PGBOUNCER           behind pgbouncer in transaction pooling mode: no
+#                          server-side cursors and no prepared statements
+#
+# SQLite (the fallback when DATABASE_URL is unset) is tuned for concurrent
+# gunicorn workers unless DB_SQLITE_TUNING is false: WAL journal,
+# synchronous=NORMAL, a memory-mapped and larger page cache, a busy timeout of
+# DB_SQLITE_TIMEOUT seconds and BEGIN IMMEDIATE for atomic blocks so writers
+# queue on the lock instead of failing with "database is locked".
+
+SQLITE_PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA mmap_size=134217728",  # 128 MiB
+    "PRAGMA cache_size=-20000",  # ~20 MB
+    "PRAGMA temp_store=MEMORY",
+]
+
+
+def database_config(url: str) -> dict:
+    """Build a DATABASES entry for `url` with the connection settings above."""
+    config = dj_database_url.parse(
+        url,
+        conn_max_age=env_int("DB_CONN_MAX_AGE", 60),
+        conn_health_checks=env_bool("DB_CONN_HEALTH_CHECKS", True),
+    )
+    options = config.setdefault("OPTIONS", {})
+
+    if config["ENGINE"] == "django.db.backends.sqlite3":
+        if env_bool("DB_SQLITE_TUNING", True):
+            options["init_command"] = ";".join(SQLITE_PRAGMAS)
+            options["transaction_mode"] = "IMMEDIATE"
+            options["timeout"] = env_int("DB_SQLITE_TIMEOUT", 20)
+        return config
+    if config["ENGINE"] != "django.db.backends.postgresql":
+        return config
+
+    if env_bool("DB_POOL", False):
+        # The pool owns connection lifetime; Django refuses persistent
+        # connections on top of it.
+        config["CONN_MAX_AGE"] = 0
+        options["pool"] = {
+            "min_size": env_int("DB_POOL_MIN_SIZE", 2),
+            "max_size": env_int("DB_POOL_MAX_SIZE", 10),
+            "timeout": env_int("DB_POOL_TIMEOUT", 10),
+        }
+    if env_bool("DB_PGBOUNCER", False):
+        config["DISABLE_SERVER_SIDE_CURSORS"] = True
+        options["prepare_threshold"] = None
+    return config
 
 
 DATABASES = {
-    "default": dj_database_url.config(
-        default="sqlite:///" + str(BASE_DIR / "db.sqlite3")
+    "default": database_config(
+        os.getenv("DATABASE_URL") or "sqlite:///" + str(BASE_DIR / "db.sqlite3")
     )
 }
 
+# Read replicas: DATABASE_REPLICA_URLS is a comma-separated list of URLs, exposed
+# as aliases replica_1, replica_2, ... Reads are spread over them by
+# PrimaryReplicaRouter; a client that just wrote keeps reading from the primary
+# for DB_REPLICA_STICKY_SECONDS (see ReplicaStickinessMiddleware).
+DATABASE_REPLICAS = []
+for index, url in enumerate(
+    filter(None, map(str.strip, os.getenv("DATABASE_REPLICA_URLS", "").split(","))),
+    start=1,
+):
+    alias = f"replica_{index}"
+    DATABASES[alias] = {**database_config(url), "TEST": {"MIRROR": "default"}}
+    DATABASE_REPLICAS.append(alias)
+
+# Prediction history sharding: PREDICTION_SHARD_URLS is a comma-separated list
+# of URLs, exposed as aliases shard_0, shard_1, ... Each user's PredictionHistory
+# rows live on one shard picked by hashing the user id. Every shard needs
+# `manage.py migrate --database shard_N`. Changing the number of shards moves
+# users to other shards, so existing rows must be rebalanced first.
+PREDICTION_SHARDS = []
+for index, url in enumerate(
+    filter(None, map(str.strip, os.getenv("PREDICTION_SHARD_URLS", "").split(",")))
+):
+    alias = f"shard_{index}"
+    DATABASES[alias] = database_config(url)
+    PREDICTION_SHARDS.append(alias)
+
+DATABASE_ROUTERS = [
+    "insurance_app.routers.PredictionShardRouter",
+    "insurance_app.routers.PrimaryReplicaRouter",
+]
+
+DATABASE_REPLICA_STICKY_SECONDS = env_int("DB_REPLICA_STICKY_SECONDS", 10)
+
 print("DATABASE_URL:", os.getenv("DATABASE_URL"))
 
 # DATABASES = {
@@ -106,6 +240,103 @@ print("DATABASE_URL:", os.getenv("DATABASE_URL"))
 #     }
 # }
 
+# Cache tiers (see insurance_app/caching.py):
+#   "default"  shared by every process when CACHE_URL names a cache server
+#              (redis://host:port/db, memcached://host:port) or a directory
+#              (file:///path); this process's memory when CACHE_URL is unset
+#   "local"    always this process's memory, an LRU of CACHE_LOCAL_MAX_ENTRIES
+# Cached values are kept CACHE_TIMEOUT seconds unless invalidated sooner.
+CACHE_BACKENDS = {
+    "redis": "django.core.cache.backends.redis.RedisCache",
+    "memcached": "django.core.cache.backends.memcached.PyMemcacheCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+}
+CACHE_TIMEOUT = env_int("CACHE_TIMEOUT", 300)
+
+
+def cache_config(url: str | None) -> dict:
+    """Build the "default" CACHES entry for `url`."""
+    if not url:
+        return {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "default",
+            "TIMEOUT": CACHE_TIMEOUT,
+        }
+    scheme, _, location = url.partition("://")
+    if scheme not in CACHE_BACKENDS:
+        raise ValueError(f"unsupported CACHE_URL scheme {scheme!r}")
+    return {
+        "BACKEND": CACHE_BACKENDS[scheme],
+        "LOCATION": location if scheme in ("file", "memcached") else url,
+        "TIMEOUT": CACHE_TIMEOUT,
+        "KEY_PREFIX": "assur",
+    }
+
+
+CACHES = {
+    "default": cache_config(os.getenv("CACHE_URL")),
+    "local": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "local",
+        "TIMEOUT": CACHE_TIMEOUT,
+        "OPTIONS": {"MAX_ENTRIES": env_int("CACHE_LOCAL_MAX_ENTRIES", 1000)},
+    },
+}
+
+# Session stores (SESSION_STORE):
+#   "db"              django_session rows
+#   "cached_db"       django_session rows read through the "default" cache, so
+#                     a session costs no query; the default when CACHE_URL is
+#                     set (in process memory, other workers would keep serving
+#                     a logged-out session)
+#   "signed_cookies"  the cookie itself: no server writes, but a copied cookie
+#                     stays valid until it expires, even after logout
+# The database stores only write a session whose content changed (see
+# insurance_app/sessions). `manage.py purge_sessions` deletes expired rows.
+SESSION_ENGINES = {
+    "db": "insurance_app.sessions.db",
+    "cached_db": "insurance_app.sessions.cached_db",
+    "signed_cookies": "django.contrib.sessions.backends.signed_cookies",
+}
+SESSION_STORE = os.getenv(
+    "SESSION_STORE", "cached_db" if os.getenv("CACHE_URL") else "db"
+)
+if SESSION_STORE not in SESSION_ENGINES:
+    raise ValueError(f"unsupported SESSION_STORE {SESSION_STORE!r}")
+SESSION_ENGINE = SESSION_ENGINES[SESSION_STORE]
+
+# Retention: rows older than ARCHIVE_RETENTION_DAYS are moved by
+# `manage.py archive_old_rows` into compressed monthly files under ARCHIVE_DIR.
+ARCHIVE_DIR = Path(os.getenv("ARCHIVE_DIR", BASE_DIR / "archive"))
+ARCHIVE_RETENTION_DAYS = env_int("ARCHIVE_RETENTION_DAYS", 730)
+
+# A prediction submitted again with the same inputs within this many seconds
+# reuses the logged result and bumps its repeat count; 0 logs every one.
+PREDICTION_REPEAT_WINDOW = env_int("PREDICTION_REPEAT_WINDOW", 3600)
+
+# Pricing model used for quotes. Replacing the file changes the model version;
+# run `manage.py refresh_quotes` after a rollout to re-quote every profile.
+PRICING_MODEL_PATH = Path(
+    os.getenv("PRICING_MODEL_PATH", BASE_DIR / "insurance_app" / "model" / "model.pkl")
+)
+
+# Warehouse feed: `manage.py export_changes` appends the predictions created
+# since its last run to partitioned files and manifests under
+# WAREHOUSE_EXPORT_DIR (shared storage when the job runs on several nodes).
+WAREHOUSE_EXPORT_DIR = Path(os.getenv("WAREHOUSE_EXPORT_DIR", BASE_DIR / "warehouse"))
+
+# Query budgets: QueryBudgetMiddleware checks the queries of each request
+# against the budget of its URL name (insurance_app/query_budget.py). Over
+# budget it logs a warning, or raises when QUERY_BUDGET_STRICT is on (the
+# default under `manage.py test` and pytest). SELECTs slower than
+# SLOW_QUERY_MS are explained into a per-process log of the last
+# SLOW_QUERY_LOG_SIZE entries, shown to staff at /query-log/.
+QUERY_BUDGET_STRICT = env_bool(
+    "QUERY_BUDGET_STRICT", sys.argv[1:2] == ["test"] or "pytest" in sys.modules
+)
+SLOW_QUERY_MS = env_int("SLOW_QUERY_MS", 100)
+SLOW_QUERY_LOG_SIZE = env_int("SLOW_QUERY_LOG_SIZE", 50)
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -149,11 +380,34 @@ STATICFILES_DIRS = [
 # STATIC_ROOT = BASE_DIR / "insurance_app" / "staticfiles"
 STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles")
 
-# WhiteNoise settings for serving static files efficiently
-STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
+# WhiteNoise serves the files collectstatic writes under hashed, compressed
+# names with far-future caching (see insurance_app/storage.py).
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "insurance_app.storage.HashedStaticFilesStorage"},
+}
+
+# Pre-rendered pages: `manage.py prerender_pages`, run after collectstatic,
+# writes the anonymous version of the marketing pages under PRERENDER_DIR.
+# PrerenderedPageMiddleware serves them to visitors without a session, cached
+# by browsers for PRERENDER_MAX_AGE seconds; other requests render the page.
+PRERENDER_DIR = Path(os.getenv("PRERENDER_DIR", BASE_DIR / "prerendered"))
+PRERENDER_MAX_AGE = env_int("PRERENDER_MAX_AGE", 3600)
 
 AUTH_USER_MODEL = "insurance_app.UserProfile"
 
+# Authenticated users are read from the "default" cache by CachedModelBackend,
+# in an entry versioned by the user's cache tag, which saving or deleting the
+# profile (password changes included) and quote refreshes bump. On by default
+# only when CACHE_URL names a shared cache: a version bumped in one process's
+# memory is not seen by the others. ModelBackend stays listed so sessions
+# opened with it remain valid.
+AUTH_USER_CACHE = env_bool("AUTH_USER_CACHE", bool(os.getenv("CACHE_URL")))
+AUTHENTICATION_BACKENDS = [
+    "insurance_app.backends.CachedModelBackend",
+    "django.contrib.auth.backends.ModelBackend",
+]
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -1,13 +1,230 @@
-from typing import Any
+import io
+from datetime import timedelta
+from typing import Any, Callable, Iterable, Iterator, Optional
 from django import forms
-from django.contrib import admin
-from django.http import HttpRequest
-from django.db.models import Field as ModelField
+from django.contrib import admin, messages
+from django.contrib.auth import get_permission_codename
+from django.contrib.auth.admin import UserAdmin
+from django.core.exceptions import PermissionDenied
+from django.http import HttpRequest, HttpResponse, StreamingHttpResponse
+from django.db.models import Count, Field as ModelField, QuerySet, TextChoices
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import URLPattern, path
+from django.utils.text import capfirst
+
+from . import bulk, erasure
+from .availability import TIME_SLOT_CHOICES
+from .changelists import ScalableAdminMixin
+from .models import (
+    AgeCategory,
+    BmiCategory,
+    UserProfile,
+    PredictionHistory,
+    Job,
+    ContactMessage,
+    Availability,
+    AvailabilityRule,
+    AvailabilityException,
+    Appointment,
+)
+
+
+def search_by_username_prefix(queryset: QuerySet, search_term: str) -> QuerySet:
+    """
+    Restricts `queryset` to rows of users whose username starts with the term.
+
+    The users are looked up in a subquery answered from the username search
+    index, instead of joining the user table and scanning it with LIKE.
+    """
+    search_term = search_term.strip()
+    if not search_term:
+        return queryset
+    users = UserProfile.objects.filter(username__istartswith=search_term)
+    return queryset.filter(user__in=users.values("pk"))
+
+
+class ChoicesListFilter(admin.SimpleListFilter):
+    """
+    List filter over fixed choices.
+
+    The default filter of a field without `choices` (or of a generated column)
+    lists its values with a `SELECT DISTINCT` over the whole table.
+    """
+
+    choices_class: type[TextChoices]
+
+    def lookups(self, request: HttpRequest, model_admin: Any) -> Any:
+        return self.choices_class.choices
+
+    def queryset(self, request: HttpRequest, queryset: QuerySet) -> QuerySet:
+        if self.value():
+            return queryset.filter(**{self.parameter_name: self.value()})
+        return queryset
+
+
+class BmiCategoryFilter(ChoicesListFilter):
+    title = "BMI category"
+    parameter_name = "bmi_category"
+    choices_class = BmiCategory
+
+
+class AgeCategoryFilter(ChoicesListFilter):
+    title = "age category"
+    parameter_name = "age_category"
+    choices_class = AgeCategory
+
+
+class SmokerFilter(ChoicesListFilter):
+    title = "smoker"
+    parameter_name = "smoker"
+    choices_class = UserProfile.SmokerType
+
+
+class RegionFilter(ChoicesListFilter):
+    title = "region"
+    parameter_name = "region"
+    choices_class = UserProfile.RegionType
 
-from .models import UserProfile, Job, ContactMessage, Availability, Appointment
 
 # Register your models here.
-admin.site.register(UserProfile)
+@admin.register(UserProfile)
+class UserProfileAdmin(ScalableAdminMixin, UserAdmin):
+    """
+    Admin configuration for the UserProfile model.
+
+    Builds on Django's `UserAdmin` (password hashing, permissions) with the
+    insurance profile fields. Search matches the beginning of the username,
+    answered from the username search index, and the list is never counted in
+    full (see `insurance_app.changelists`).
+
+    Deletions go through `insurance_app.erasure`, which empties the user's
+    predictions and appointments in batches: the built-in delete collects
+    every related prediction in memory and times out for users with a long
+    history. The delete confirmation pages list the users with counts of
+    what they own instead of every related row, and the "Erase selected
+    users" action asks for the same confirmation.
+    """
+
+    fieldsets = UserAdmin.fieldsets + (
+        (
+            "Insurance profile",
+            {
+                "fields": (
+                    ("age", "sex"),
+                    ("weight", "height", "bmi"),
+                    ("num_children", "smoker", "region"),
+                    ("bmi_category", "age_category"),
+                    ("quoted_charges", "quoted_at", "quote_model_version"),
+                )
+            },
+        ),
+    )
+    readonly_fields = (
+        "bmi",
+        "bmi_category",
+        "age_category",
+        "quoted_charges",
+        "quoted_at",
+        "quote_model_version",
+    )
+    list_display = (
+        "username",
+        "email",
+        "first_name",
+        "last_name",
+        "region",
+        "smoker",
+        "is_staff",
+        "date_joined",
+    )
+    list_filter = ("is_staff", "is_superuser", "is_active", "region", "smoker")
+    search_fields = ("^username",)
+    search_help_text = "Search by the beginning of the username."
+    date_hierarchy = "date_joined"
+    ordering = ("-date_joined",)
+    actions = ["erase_users"]
+
+    def get_deleted_objects(
+        self, objs: Iterable[UserProfile], request: HttpRequest
+    ) -> tuple[list[str], dict[str, int], set[str], list[str]]:
+        """
+        Summarizes a deletion without running Django's deletion collector.
+
+        Lists the users alone and counts their predictions and appointments;
+        deleting those needs the delete permission on their models too.
+        """
+        users = list(objs)
+        predictions, appointments = erasure.count_owned([user.pk for user in users])
+        model_count = {UserProfile._meta.verbose_name_plural: len(users)}
+        perms_needed = set()
+        for model, count in (
+            (PredictionHistory, predictions),
+            (Appointment, appointments),
+        ):
+            if not count:
+                continue
+            opts = model._meta
+            model_count[opts.verbose_name_plural] = count
+            codename = get_permission_codename("delete", opts)
+            if not request.user.has_perm(f"{opts.app_label}.{codename}"):
+                perms_needed.add(opts.verbose_name)
+        deleted_objects = [
+            f"{capfirst(UserProfile._meta.verbose_name)}: {user}" for user in users
+        ]
+        return deleted_objects, model_count, perms_needed, []
+
+    def delete_model(self, request: HttpRequest, obj: UserProfile) -> None:
+        """
+        Erases the user through `insurance_app.erasure`.
+        """
+        erasure.erase_user(obj)
+
+    def delete_queryset(self, request: HttpRequest, queryset: QuerySet) -> None:
+        """
+        Erases the users one after the other through `insurance_app.erasure`.
+        """
+        for _ in erasure.erase_users(list(queryset.values_list("pk", flat=True))):
+            pass
+
+    @admin.action(
+        description="Erase selected users and all their data",
+        permissions=["delete"],
+    )
+    def erase_users(
+        self, request: HttpRequest, queryset: QuerySet
+    ) -> Optional[TemplateResponse]:
+        """
+        Asks for confirmation, then erases the selected users through
+        `insurance_app.erasure`.
+        """
+        deleted_objects, model_count, perms_needed, _ = self.get_deleted_objects(
+            queryset, request
+        )
+        if "apply" in request.POST and not perms_needed:
+            user_ids = list(queryset.values_list("pk", flat=True))
+            results = list(erasure.erase_users(user_ids))
+            predictions = sum(result.predictions for result in results)
+            self.message_user(
+                request,
+                f"Erased {len(results)} user(s) and {predictions} predictions.",
+                messages.SUCCESS,
+            )
+            return None
+        return TemplateResponse(
+            request,
+            "admin/insurance_app/userprofile/erase_confirmation.html",
+            {
+                **self.admin_site.each_context(request),
+                "title": "Erase users",
+                "opts": self.opts,
+                "deleted_objects": deleted_objects,
+                "model_count": model_count.items(),
+                "perms_lacking": perms_needed,
+                "selected": request.POST.getlist(admin.helpers.ACTION_CHECKBOX_NAME),
+                "select_across": request.POST.get("select_across", "0"),
+            },
+        )
 
 
 @admin.register(Job)
@@ -17,13 +234,56 @@ class JobAdmin(admin.ModelAdmin):
     list_display = ("title", "location", "experience")
 
 
+@admin.register(PredictionHistory)
+class PredictionHistoryAdmin(ScalableAdminMixin, admin.ModelAdmin):
+    """
+    Admin configuration for the PredictionHistory model.
+
+    Lists the newest predictions from the timestamp index, with the user
+    fetched in the same query. Filters use fixed choices and search matches the
+    beginning of the username. With `PREDICTION_SHARD_URLS` set, only the rows
+    of the default database are listed.
+    """
+
+    list_display = (
+        "user",
+        "timestamp",
+        "age",
+        "smoker",
+        "region",
+        "bmi_category",
+        "predicted_charges",
+    )
+    list_select_related = ("user",)
+    list_filter = (BmiCategoryFilter, AgeCategoryFilter, SmokerFilter, RegionFilter)
+    autocomplete_fields = ("user",)
+    search_fields = ("user__username",)
+    search_help_text = "Search by the beginning of the username."
+    date_hierarchy = "timestamp"
+
+    def get_search_results(
+        self, request: HttpRequest, queryset: QuerySet, search_term: str
+    ) -> tuple[QuerySet, bool]:
+        """
+        Restricts the predictions to users whose username starts with the term.
+        """
+        return search_by_username_prefix(queryset, search_term), False
+
+
 @admin.register(ContactMessage)
-class ContactMessageAdmin(admin.ModelAdmin):
-    """Admin configuration for the ContactMessage model."""
+class ContactMessageAdmin(ScalableAdminMixin, admin.ModelAdmin):
+    """
+    Admin configuration for the ContactMessage model.
+
+    Search matches the beginning of the email address, answered from the email
+    search index rather than a scan of every message body.
+    """
 
     list_display = ("name", "email", "submitted_at")
-    search_fields = ("name", "email", "message")
+    search_fields = ("^email",)
+    search_help_text = "Search by the beginning of the email address."
     list_filter = ("submitted_at",)
+    date_hierarchy = "submitted_at"
 
 
 class AvailabilityAdminForm(forms.ModelForm):
@@ -34,9 +294,7 @@ class AvailabilityAdminForm(forms.ModelForm):
     using checkboxes for hours between 09:00 and 18:00.
     """
 
-    TIME_CHOICES = [
-        (f"{hour:02d}:00", f"{hour:02d}:00") for hour in range(9, 19)
-    ]  # 09:00 - 18:00
+    TIME_CHOICES = TIME_SLOT_CHOICES  # 09:00 - 18:00
 
     time_slots = forms.MultipleChoiceField(
         choices=TIME_CHOICES, widget=forms.CheckboxSelectMultiple
@@ -53,16 +311,232 @@ class AvailabilityAdminForm(forms.ModelForm):
         return self.cleaned_data["time_slots"]
 
 
-class AvailabilityAdmin(admin.ModelAdmin):
+class CsvImportForm(forms.Form):
+    """Upload of a CSV file to import."""
+
+    csv_file = forms.FileField(label="CSV file")
+
+
+class AvailabilityRangeForm(forms.Form):
+    """
+    Time slots to offer, or explicit availability to drop, over a date range.
+    """
+
+    MAX_DAYS = 731
+
+    start_date = forms.DateField(widget=forms.DateInput(attrs={"type": "date"}))
+    end_date = forms.DateField(widget=forms.DateInput(attrs={"type": "date"}))
+    weekdays = forms.TypedMultipleChoiceField(
+        choices=AvailabilityRule.Weekday.choices,
+        coerce=int,
+        widget=forms.CheckboxSelectMultiple,
+        required=False,
+        help_text="Leave empty for every day of the week.",
+    )
+    time_slots = forms.MultipleChoiceField(
+        choices=TIME_SLOT_CHOICES,
+        widget=forms.CheckboxSelectMultiple,
+        required=False,
+        help_text="Leave empty to close the days.",
+    )
+    clear = forms.BooleanField(
+        required=False,
+        label="Remove instead",
+        help_text="Drop the explicit availability so the days follow the weekly "
+        "rules again.",
+    )
+
+    def clean(self) -> dict[str, Any]:
+        """
+        Ensure the range is not inverted and at most `MAX_DAYS` long.
+        """
+        cleaned_data = super().clean()
+        start_date = cleaned_data.get("start_date")
+        end_date = cleaned_data.get("end_date")
+        if start_date and end_date:
+            if end_date < start_date:
+                raise forms.ValidationError("'End date' must be after 'start date'.")
+            if end_date - start_date >= timedelta(days=self.MAX_DAYS):
+                raise forms.ValidationError(
+                    f"A range covers at most {self.MAX_DAYS} days."
+                )
+        return cleaned_data
+
+
+class MoveAppointmentsForm(forms.Form):
+    """Where to move the selected appointments."""
+
+    days = forms.IntegerField(
+        required=False,
+        help_text="Shift each appointment by this many days (negative moves "
+        "them earlier).",
+    )
+    to_date = forms.DateField(
+        required=False,
+        label="Or move to date",
+        widget=forms.DateInput(attrs={"type": "date"}),
+    )
+    time = forms.ChoiceField(
+        choices=[("", "Keep the current time")] + TIME_SLOT_CHOICES, required=False
+    )
+
+    def clean(self) -> dict[str, Any]:
+        """
+        Ensure exactly one way of changing the date, or a new time, is given.
+        """
+        cleaned_data = super().clean()
+        days, to_date = cleaned_data.get("days"), cleaned_data.get("to_date")
+        if days and to_date:
+            raise forms.ValidationError("Give either a shift or a date, not both.")
+        if not (days or to_date or cleaned_data.get("time")):
+            raise forms.ValidationError("Give a shift, a date or a time.")
+        return cleaned_data
+
+
+class BulkAdminMixin:
+    """
+    CSV import page, CSV export action and intermediate forms for bulk actions.
+
+    Subclasses name the `insurance_app.bulk` functions that read and write
+    their CSV format. Imports and exports are streamed; see `insurance_app.bulk`.
+    """
+
+    csv_importer: Callable[[Iterable[str]], int]
+    csv_exporter: Callable[[QuerySet], Iterator[str]]
+    csv_columns: tuple[str, ...]
+
+    def get_urls(self) -> list[URLPattern]:
+        info = self.model._meta.app_label, self.model._meta.model_name
+        return [
+            path(
+                "import/",
+                self.admin_site.admin_view(self.import_csv_view),
+                name="%s_%s_import" % info,
+            ),
+        ] + super().get_urls()
+
+    def render_bulk_form(
+        self,
+        request: HttpRequest,
+        title: str,
+        form: forms.Form,
+        action: Optional[str] = None,
+        help_text: str = "",
+    ) -> TemplateResponse:
+        """
+        Renders `form` in the admin; for an action, keeps the selection.
+        """
+        return TemplateResponse(
+            request,
+            "admin/insurance_app/bulk_form.html",
+            {
+                **self.admin_site.each_context(request),
+                "title": title,
+                "opts": self.model._meta,
+                "form": form,
+                "action": action,
+                "selected": request.POST.getlist(admin.helpers.ACTION_CHECKBOX_NAME),
+                "select_across": request.POST.get("select_across", "0"),
+                "help_text": help_text,
+            },
+        )
+
+    def import_csv_view(self, request: HttpRequest) -> HttpResponse:
+        """
+        Imports an uploaded CSV file; an invalid row rolls the whole file back.
+        """
+        if not (
+            self.has_add_permission(request) and self.has_change_permission(request)
+        ):
+            raise PermissionDenied
+        form = CsvImportForm(request.POST or None, request.FILES or None)
+        if request.method == "POST" and form.is_valid():
+            lines = io.TextIOWrapper(
+                form.cleaned_data["csv_file"].file, encoding="utf-8-sig", newline=""
+            )
+            try:
+                imported = self.csv_importer(lines)
+            except (bulk.CsvImportError, UnicodeDecodeError) as exc:
+                form.add_error("csv_file", str(exc))
+            else:
+                self.message_user(
+                    request, f"Imported {imported} row(s).", messages.SUCCESS
+                )
+                info = self.model._meta.app_label, self.model._meta.model_name
+                return redirect("admin:%s_%s_changelist" % info)
+        return self.render_bulk_form(
+            request,
+            f"Import {self.model._meta.verbose_name_plural} from CSV",
+            form,
+            help_text=f"Columns: {', '.join(self.csv_columns)}.",
+        )
+
+    @admin.action(description="Export selected to CSV", permissions=["view"])
+    def export_csv(
+        self, request: HttpRequest, queryset: QuerySet
+    ) -> StreamingHttpResponse:
+        """
+        Streams the selected rows as a CSV download.
+        """
+        response = StreamingHttpResponse(
+            self.csv_exporter(queryset), content_type="text/csv"
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="{self.model._meta.model_name}.csv"'
+        )
+        return response
+
+
+class AvailabilityAdmin(BulkAdminMixin, admin.ModelAdmin):
     """
     Admin configuration for the Availability model.
 
     Uses a custom form to allow selection of multiple time slots.
     Displays the date and a comma-separated list of available times.
+    Whole date ranges are opened, closed or reset at once from the "Set
+    availability for dates" page, and days are imported and exported as CSV.
     """
 
     form = AvailabilityAdminForm
     list_display = ("date", "display_times")
+    date_hierarchy = "date"
+    actions = ["export_csv"]
+    csv_importer = staticmethod(bulk.import_availability)
+    csv_exporter = staticmethod(bulk.export_availability)
+    csv_columns = bulk.AVAILABILITY_COLUMNS
+
+    def get_urls(self) -> list[URLPattern]:
+        return [
+            path(
+                "set-range/",
+                self.admin_site.admin_view(self.set_range_view),
+                name="insurance_app_availability_set_range",
+            ),
+        ] + super().get_urls()
+
+    def set_range_view(self, request: HttpRequest) -> HttpResponse:
+        """
+        Sets, closes or clears every day of a date range in one statement.
+        """
+        if not (
+            self.has_add_permission(request) and self.has_change_permission(request)
+        ):
+            raise PermissionDenied
+        form = AvailabilityRangeForm(request.POST or None)
+        if request.method == "POST" and form.is_valid():
+            data = form.cleaned_data
+            if data["clear"]:
+                removed = bulk.clear_availability(data["start_date"], data["end_date"])
+                message = f"Removed the availability of {removed} day(s)."
+            else:
+                days = bulk.date_range(
+                    data["start_date"], data["end_date"], data["weekdays"] or None
+                )
+                written = bulk.set_availability(days, data["time_slots"])
+                message = f"Set the availability of {written} day(s)."
+            self.message_user(request, message, messages.SUCCESS)
+            return redirect("admin:insurance_app_availability_changelist")
+        return self.render_bulk_form(request, "Set availability for dates", form)
 
     def display_times(self, obj: Availability) -> str:
         """
@@ -74,18 +548,187 @@ class AvailabilityAdmin(admin.ModelAdmin):
 admin.site.register(Availability, AvailabilityAdmin)
 
 
-class AppointmentAdmin(admin.ModelAdmin):
+class AvailabilityRuleAdminForm(forms.ModelForm):
+    """
+    Admin form for weekly availability rules.
+
+    Reuses the hourly checkboxes of `AvailabilityAdminForm`.
+    """
+
+    time_slots = forms.MultipleChoiceField(
+        choices=TIME_SLOT_CHOICES, widget=forms.CheckboxSelectMultiple
+    )
+
+    class Meta:
+        model = AvailabilityRule
+        fields = ["weekday", "time_slots", "valid_from", "valid_until"]
+
+    def clean(self) -> dict[str, Any]:
+        """
+        Ensure the validity period is not inverted.
+        """
+        cleaned_data = super().clean()
+        valid_from = cleaned_data.get("valid_from")
+        valid_until = cleaned_data.get("valid_until")
+        if valid_from and valid_until and valid_until < valid_from:
+            raise forms.ValidationError("'Valid until' must be after 'valid from'.")
+        return cleaned_data
+
+
+@admin.register(AvailabilityRule)
+class AvailabilityRuleAdmin(admin.ModelAdmin):
+    """
+    Admin configuration for the AvailabilityRule model.
+
+    One row per weekday replaces a row per date in `Availability`.
+    """
+
+    form = AvailabilityRuleAdminForm
+    list_display = ("weekday", "display_times", "valid_from", "valid_until")
+    list_filter = ("weekday",)
+
+    def display_times(self, obj: AvailabilityRule) -> str:
+        """
+        Returns a comma-separated string of the rule's time slots for display.
+        """
+        return ", ".join(obj.time_slots)
+
+
+class AvailabilityExceptionAdminForm(forms.ModelForm):
+    """
+    Admin form for holidays and blocked hours.
+
+    Leaving every slot unticked closes the whole day.
+    """
+
+    blocked_slots = forms.MultipleChoiceField(
+        choices=TIME_SLOT_CHOICES,
+        widget=forms.CheckboxSelectMultiple,
+        required=False,
+        help_text="Leave empty to close the whole day.",
+    )
+
+    class Meta:
+        model = AvailabilityException
+        fields = ["start_date", "end_date", "blocked_slots", "reason"]
+
+    def clean(self) -> dict[str, Any]:
+        """
+        Ensure the exception does not end before it starts.
+        """
+        cleaned_data = super().clean()
+        start_date = cleaned_data.get("start_date")
+        end_date = cleaned_data.get("end_date")
+        if start_date and end_date and end_date < start_date:
+            raise forms.ValidationError("'End date' must be after 'start date'.")
+        return cleaned_data
+
+
+@admin.register(AvailabilityException)
+class AvailabilityExceptionAdmin(admin.ModelAdmin):
+    """
+    Admin configuration for the AvailabilityException model.
+    """
+
+    form = AvailabilityExceptionAdminForm
+    list_display = ("start_date", "end_date", "reason", "display_blocked")
+    date_hierarchy = "start_date"
+
+    def display_blocked(self, obj: AvailabilityException) -> str:
+        """
+        Returns the blocked slots, or "Closed" when the whole day is blocked.
+        """
+        return ", ".join(obj.blocked_slots) or "Closed"
+
+
+class AppointmentAdmin(BulkAdminMixin, ScalableAdminMixin, admin.ModelAdmin):
     """
     Admin configuration for the Appointment model.
 
     Provides list display, filtering, search, and customizes the time field choices.
+    Search matches the beginning of the username, so it is answered from the
+    username search index and the (user, date) index instead of a table scan;
+    reason and date have their own filters. Users are fetched with the page and
+    picked with an autocomplete instead of a select of every user.
+
+    Selected appointments can be moved or cancelled together, and appointments
+    are imported and exported as CSV.
     """
 
     list_display = ("user", "reason", "date", "time")
+    list_select_related = ("user",)
+    autocomplete_fields = ("user",)
     list_filter = ("reason", "date")
-    search_fields = ("user__username", "reason", "date")
+    search_fields = ("user__username",)
+    search_help_text = "Search by the beginning of the username."
     date_hierarchy = "date"
     ordering = ("-date",)
+    actions = ["move_appointments", "cancel_appointments", "export_csv"]
+    csv_importer = staticmethod(bulk.import_appointments)
+    csv_exporter = staticmethod(bulk.export_appointments)
+    csv_columns = bulk.APPOINTMENT_COLUMNS
+
+    @admin.action(description="Move selected appointments", permissions=["change"])
+    def move_appointments(
+        self, request: HttpRequest, queryset: QuerySet
+    ) -> Optional[TemplateResponse]:
+        """
+        Asks where to move the selection, then reschedules it in one bulk update.
+        """
+        form = MoveAppointmentsForm(request.POST if "apply" in request.POST else None)
+        if form.is_bound and form.is_valid():
+            moved = bulk.move_appointments(
+                queryset,
+                days=form.cleaned_data["days"] or 0,
+                to_date=form.cleaned_data["to_date"],
+                time=form.cleaned_data["time"],
+            )
+            self.message_user(
+                request, f"Moved {moved} appointment(s).", messages.SUCCESS
+            )
+            return None
+        return self.render_bulk_form(
+            request, "Move appointments", form, action="move_appointments"
+        )
+
+    @admin.action(description="Cancel selected appointments", permissions=["delete"])
+    def cancel_appointments(
+        self, request: HttpRequest, queryset: QuerySet
+    ) -> Optional[TemplateResponse]:
+        """
+        Asks for confirmation, listing the appointments per date, then deletes
+        the selection with one statement.
+        """
+        if "apply" in request.POST:
+            cancelled = bulk.cancel_appointments(queryset)
+            self.message_user(
+                request, f"Cancelled {cancelled} appointment(s).", messages.SUCCESS
+            )
+            return None
+        dates = list(
+            queryset.order_by("date").values("date").annotate(count=Count("pk"))
+        )
+        return TemplateResponse(
+            request,
+            "admin/insurance_app/appointment/cancel_confirmation.html",
+            {
+                **self.admin_site.each_context(request),
+                "title": "Cancel appointments",
+                "opts": self.opts,
+                "dates": dates,
+                "total": sum(row["count"] for row in dates),
+                "selected": request.POST.getlist(admin.helpers.ACTION_CHECKBOX_NAME),
+                "select_across": request.POST.get("select_across", "0"),
+            },
+        )
+
+    def get_search_results(
+        self, request: HttpRequest, queryset: QuerySet, search_term: str
+    ) -> tuple[QuerySet, bool]:
+        """
+        Restricts the appointments to users whose username starts with the term.
+        """
+        return search_by_username_prefix(queryset, search_term), False
 
     def formfield_for_choice_field(
         self, db_field: ModelField, request: HttpRequest, **kwargs: Any
@@ -96,9 +739,7 @@ class AppointmentAdmin(admin.ModelAdmin):
         if db_field.name == "time" and (
             hasattr(db_field, "choices") or db_field.get_internal_type() == "CharField"
         ):
-            kwargs["choices"] = [
-                (f"{hour:02}:00", f"{hour:02}:00") for hour in range(9, 19)
-            ]
+            kwargs["choices"] = TIME_SLOT_CHOICES
         return super().formfield_for_choice_field(db_field, request, **kwargs)
 
 
@@ -0,0 +1,262 @@
+"""Portfolio analytics served from daily rollups.
+
+`refresh_rollups()` folds prediction history into `PortfolioRollup` rows
+incrementally: each history database has a `RollupCheckpoint` holding the
+highest id already counted, and every batch updates the rollups and moves the
+checkpoint in the same transaction, so a refresh can be interrupted or run
+concurrently without counting a row twice. Rows younger than `SETTLE_SECONDS`
+are left for the next run, which gives transactions that were still open when
+their id was assigned time to commit.
+
+The dashboard functions (`breakdown()`, `trend()`) only read rollups, whatever
+the size of the history: monthly rows for the whole months of the requested
+range and daily rows for the days at either end. Percentiles come from
+merging the per-row quantile sketches.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import sharding
+from .models import PortfolioRollup, PredictionHistory, RollupCheckpoint
+from .sketches import QuantileSketch
+
+DIMENSIONS: List[str] = [
+    value
+    for value in PortfolioRollup.Dimension.values
+    if value != PortfolioRollup.Dimension.ALL
+]
+BATCH_SIZE = 10000
+SETTLE_SECONDS = 60
+PERCENTILES: Dict[str, float] = {"p50": 0.5, "p90": 0.9, "p99": 0.99}
+
+RollupKey = Tuple[str, date, str, str]
+DAY = PortfolioRollup.Grain.DAY
+MONTH = PortfolioRollup.Grain.MONTH
+
+
+@dataclass
+class _Bucket:
+    count: int = 0
+    total: Decimal = Decimal(0)
+    sketch: QuantileSketch = field(default_factory=QuantileSketch)
+
+    def add(self, charges: Decimal) -> None:
+        self.count += 1
+        self.total += charges
+        self.sketch.add(float(charges))
+
+    def merge(self, count: int, total: Decimal, sketch: Dict[str, Any]) -> None:
+        self.count += count
+        self.total += total
+        self.sketch.merge(QuantileSketch.from_json(sketch))
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "average": self.total / self.count if self.count else None,
+            **{name: self.sketch.quantile(q) for name, q in PERCENTILES.items()},
+        }
+
+
+def _day(timestamp: datetime) -> date:
+    return (
+        timezone.localdate(timestamp)
+        if timezone.is_aware(timestamp)
+        else timestamp.date()
+    )
+
+
+def _month(day: date) -> date:
+    return day.replace(day=1)
+
+
+def _next_month(day: date) -> date:
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _merge_into_rollups(buckets: Dict[RollupKey, _Bucket]) -> None:
+    days = {day for _, day, _, _ in buckets}
+    existing = {
+        (row.grain, row.day, row.dimension, row.value): row
+        for row in PortfolioRollup.objects.select_for_update().filter(day__in=days)
+    }
+    to_create, to_update = [], []
+    for (grain, day, dimension, value), bucket in buckets.items():
+        row = existing.get((grain, day, dimension, value))
+        if row is None:
+            to_create.append(
+                PortfolioRollup(
+                    grain=grain,
+                    day=day,
+                    dimension=dimension,
+                    value=value,
+                    count=bucket.count,
+                    total_charges=bucket.total,
+                    sketch=bucket.sketch.to_json(),
+                )
+            )
+            continue
+        sketch = QuantileSketch.from_json(row.sketch)
+        sketch.merge(bucket.sketch)
+        row.count += bucket.count
+        row.total_charges += bucket.total
+        row.sketch = sketch.to_json()
+        to_update.append(row)
+    PortfolioRollup.objects.bulk_create(to_create)
+    PortfolioRollup.objects.bulk_update(to_update, ["count", "total_charges", "sketch"])
+
+
+def _refresh_batch(alias: str, batch_size: int, settled_before: datetime) -> int:
+    """Roll up the next batch of `alias`; returns the number of rows consumed."""
+    with transaction.atomic():
+        checkpoint, _ = RollupCheckpoint.objects.select_for_update().get_or_create(
+            source=alias
+        )
+        rows = list(
+            PredictionHistory.objects.using(alias)
+            .filter(pk__gt=checkpoint.last_id)
+            .order_by("pk")
+            .values_list("pk", "timestamp", *DIMENSIONS, "predicted_charges")[
+                :batch_size
+            ]
+        )
+        buckets: Dict[RollupKey, _Bucket] = defaultdict(_Bucket)
+        consumed = 0
+        for pk, timestamp, *values, charges in rows:
+            if timestamp >= settled_before:
+                break
+            day = _day(timestamp)
+            for grain, start in ((DAY, day), (MONTH, _month(day))):
+                buckets[(grain, start, PortfolioRollup.Dimension.ALL, "")].add(charges)
+                for dimension, value in zip(DIMENSIONS, values):
+                    buckets[(grain, start, dimension, value)].add(charges)
+            checkpoint.last_id = pk
+            consumed += 1
+        if consumed:
+            _merge_into_rollups(buckets)
+            checkpoint.save()
+    return consumed
+
+
+def refresh_rollups(
+    batch_size: int = BATCH_SIZE, settle_seconds: int = SETTLE_SECONDS
+) -> int:
+    """
+    Fold prediction history added since the last refresh into the rollups.
+
+    Args:
+        batch_size (int): History rows read and committed per transaction.
+        settle_seconds (int): Rows younger than this are left for the next run.
+
+    Returns:
+        int: Number of history rows rolled up.
+    """
+    settled_before = timezone.now() - timedelta(seconds=settle_seconds)
+    total = 0
+    for alias in sharding.history_aliases():
+        while consumed := _refresh_batch(alias, batch_size, settled_before):
+            total += consumed
+            if consumed < batch_size:
+                break
+    return total
+
+
+def last_refresh() -> Optional[datetime]:
+    """When the rollups were last refreshed, if ever."""
+    return (
+        RollupCheckpoint.objects.order_by("-updated_at")
+        .values_list("updated_at", flat=True)
+        .first()
+    )
+
+
+def _covering(start: date, end: date, months: bool) -> Q:
+    """Rollup rows covering `start`..`end`, using monthly rows where possible."""
+    days = Q(grain=DAY, day__range=(start, end))
+    if not months:
+        return days
+    first_month = start if start.day == 1 else _next_month(start)
+    after_months = _month(end + timedelta(days=1))
+    if first_month >= after_months:
+        return days
+    return (
+        Q(grain=MONTH, day__gte=first_month, day__lt=after_months)
+        | Q(grain=DAY, day__gte=start, day__lt=first_month)
+        | Q(grain=DAY, day__gte=after_months, day__lte=end)
+    )
+
+
+def _rollup_rows(
+    dimension: str,
+    start: date,
+    end: date,
+    value: Optional[str] = None,
+    months: bool = True,
+) -> Iterable[Tuple[date, str, int, Decimal, Dict[str, Any]]]:
+    rows = PortfolioRollup.objects.filter(
+        _covering(start, end, months), dimension=dimension
+    )
+    if value is not None:
+        rows = rows.filter(value=value)
+    return rows.values_list("day", "value", "count", "total_charges", "sketch")
+
+
+def breakdown(dimension: str, start: date, end: date) -> List[Dict[str, Any]]:
+    """
+    Premium distribution per value of `dimension` between two days.
+
+    Returns:
+        list[dict]: One dict per value with `value`, `count`, `average` and the
+        `PERCENTILES`, ordered by value.
+    """
+    buckets: Dict[str, _Bucket] = defaultdict(_Bucket)
+    for _, value, count, total, sketch in _rollup_rows(dimension, start, end):
+        buckets[value].merge(count, total, sketch)
+    return [{"value": value, **buckets[value].summary()} for value in sorted(buckets)]
+
+
+def _period_start(day: date, period: str) -> date:
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    if period == "month":
+        return _month(day)
+    return day
+
+
+def trend(
+    start: date,
+    end: date,
+    period: str = "day",
+    dimension: str = PortfolioRollup.Dimension.ALL,
+    value: str = "",
+) -> List[Dict[str, Any]]:
+    """
+    Premium statistics over time, per "day", "week" or "month".
+
+    Args:
+        start (date): First day included.
+        end (date): Last day included.
+        period (str): Size of each point of the series.
+        dimension (str): Restrict to one dimension value, the whole portfolio
+            by default.
+        value (str): The value of `dimension` to follow.
+
+    Returns:
+        list[dict]: One dict per period with `period`, `count`, `average` and
+        the `PERCENTILES`, oldest first.
+    """
+    buckets: Dict[date, _Bucket] = defaultdict(_Bucket)
+    rows = _rollup_rows(dimension, start, end, value, months=period == "month")
+    for day, _, count, total, sketch in rows:
+        buckets[_period_start(day, period)].merge(count, total, sketch)
+    return [{"period": key, **buckets[key].summary()} for key in sorted(buckets)]
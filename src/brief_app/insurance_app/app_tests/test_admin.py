@@ -1,13 +1,41 @@
+from datetime import date, datetime
+from unittest.mock import patch
+
 from django.test import TestCase
 from django.contrib.admin.sites import site
-from insurance_app.models import Job, ContactMessage, Availability, Appointment
+from django.db import connection
+from django.db.models import Max, Min
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from insurance_app import changelists
+from insurance_app.changelists import EstimatedCountPaginator, skip_scan
+from insurance_app.models import (
+    UserProfile,
+    PredictionHistory,
+    Job,
+    ContactMessage,
+    Availability,
+    AvailabilityRule,
+    AvailabilityException,
+    Appointment,
+)
 from insurance_app.admin import (
+    UserProfileAdmin,
+    PredictionHistoryAdmin,
     JobAdmin,
     ContactMessageAdmin,
     AvailabilityAdmin,
+    AvailabilityRuleAdmin,
+    AvailabilityExceptionAdmin,
     AppointmentAdmin,
 )
-from insurance_app.admin import AvailabilityAdminForm
+from insurance_app.admin import (
+    AvailabilityAdminForm,
+    AvailabilityRuleAdminForm,
+    AvailabilityExceptionAdminForm,
+)
 
 
 class AdminSiteTest(TestCase):
@@ -31,6 +59,10 @@ class AdminSiteTest(TestCase):
         self.assertIn(Appointment, site._registry)
         self.assertIsInstance(site._registry[Appointment], AppointmentAdmin)
 
+    def test_user_and_prediction_admins_registered(self):
+        self.assertIsInstance(site._registry[UserProfile], UserProfileAdmin)
+        self.assertIsInstance(site._registry[PredictionHistory], PredictionHistoryAdmin)
+
     def test_display_times_method(self):
         # Test the display_times method in AvailabilityAdmin
         availability = Availability.objects.create(
@@ -92,3 +124,165 @@ class TestAvailabilityAdminFormCleanTimeSlots(TestCase):
 
         # Assert
         self.assertIsNone(result)
+
+
+class AvailabilityRuleAdminTest(TestCase):
+    def test_rule_and_exception_admins_registered(self):
+        self.assertIsInstance(site._registry[AvailabilityRule], AvailabilityRuleAdmin)
+        self.assertIsInstance(
+            site._registry[AvailabilityException], AvailabilityExceptionAdmin
+        )
+
+    def test_rule_form_rejects_inverted_period(self):
+        form = AvailabilityRuleAdminForm(
+            data={
+                "weekday": 0,
+                "time_slots": ["09:00"],
+                "valid_from": "2050-02-01",
+                "valid_until": "2050-01-01",
+            }
+        )
+        self.assertFalse(form.is_valid())
+
+    def test_exception_form_allows_closing_whole_day(self):
+        form = AvailabilityExceptionAdminForm(
+            data={"start_date": "2050-12-25", "end_date": "2050-12-26"}
+        )
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data["blocked_slots"], [])
+
+
+class ScalableChangeListTest(TestCase):
+    PROFILE = {
+        "age": 30,
+        "weight": 70,
+        "height": 175,
+        "num_children": 0,
+        "smoker": "No",
+        "region": "Northeast",
+        "sex": "Male",
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = UserProfile.objects.create_superuser("admin", password="pass")
+        cls.user = UserProfile.objects.create_user("alice", **cls.PROFILE)
+        cls.moments = [
+            datetime(2024, 12, 31, 23, 30),
+            datetime(2025, 3, 1, 0, 15),
+            datetime(2025, 3, 1, 22, 0),
+            datetime(2025, 3, 30, 12, 0),
+            datetime(2026, 7, 14, 9, 0),
+        ]
+        for moment in cls.moments:
+            prediction = PredictionHistory.objects.create(
+                user=cls.user, predicted_charges=1000, **cls.PROFILE
+            )
+            # auto_now_add ignores a timestamp passed to create().
+            PredictionHistory.objects.filter(pk=prediction.pk).update(
+                timestamp=timezone.make_aware(moment)
+            )
+            Appointment.objects.create(
+                user=cls.user, reason="Consultation", date=moment.date(), time="10:00"
+            )
+
+    def test_date_lists_match_the_database(self):
+        predictions = PredictionHistory.objects.all()
+        appointments = Appointment.objects.filter(date__year=2025)
+        for kind in ("year", "month", "day"):
+            for order in ("ASC", "DESC"):
+                with self.subTest(kind=kind, order=order):
+                    self.assertEqual(
+                        list(
+                            skip_scan(predictions).datetimes("timestamp", kind, order)
+                        ),
+                        list(predictions.datetimes("timestamp", kind, order)),
+                    )
+                    self.assertEqual(
+                        list(skip_scan(appointments).dates("date", kind, order)),
+                        list(appointments.dates("date", kind, order)),
+                    )
+
+    def test_date_list_costs_one_query_per_period(self):
+        with self.assertNumQueries(4):  # 2024, 2025, 2026, and nothing after
+            skip_scan(Appointment.objects.all()).dates("date", "year")
+
+    def test_min_and_max_are_split_into_one_query_each(self):
+        queryset = Appointment.objects.all()
+        expected = queryset.aggregate(first=Min("date"), last=Max("date"))
+        with self.assertNumQueries(2):
+            result = skip_scan(queryset).aggregate(first=Min("date"), last=Max("date"))
+        self.assertEqual(result, expected)
+
+    @patch.object(changelists, "COUNT_LIMIT", 3)
+    def test_paginator_estimates_unfiltered_and_caps_filtered_counts(self):
+        Appointment.objects.filter(date__year=2025).first().delete()
+        self.assertEqual(Appointment.objects.count(), 4)
+        # The primary key span still includes the deleted row.
+        self.assertEqual(
+            EstimatedCountPaginator(Appointment.objects.order_by("pk"), 2).count, 5
+        )
+        filtered = Appointment.objects.filter(reason="Consultation").order_by("pk")
+        self.assertEqual(EstimatedCountPaginator(filtered, 2).count, 3)
+        self.assertEqual(EstimatedCountPaginator([1, 2, 3, 4], 2).count, 4)
+
+    def test_paginator_counts_small_tables_exactly(self):
+        Appointment.objects.filter(date__year=2025).first().delete()
+        self.assertEqual(
+            EstimatedCountPaginator(Appointment.objects.order_by("pk"), 2).count, 4
+        )
+
+    def test_changelists_render_drill_downs_and_searches(self):
+        self.client.force_login(self.admin)
+        pages = {
+            "userprofile": [{}, {"q": "ALI"}, {"date_joined__year": date.today().year}],
+            "predictionhistory": [
+                {},
+                {"q": "ali"},
+                {"timestamp__year": 2025, "timestamp__month": 3},
+                {"bmi_category": "normal", "smoker": "No"},
+            ],
+            "appointment": [{}, {"date__year": 2025}, {"q": "alice"}],
+            "contactmessage": [{}, {"q": "x@"}],
+        }
+        for model, queries in pages.items():
+            url = reverse(f"admin:insurance_app_{model}_changelist")
+            for params in queries:
+                with self.subTest(model=model, params=params):
+                    response = self.client.get(url, params)
+                    self.assertEqual(response.status_code, 200)
+                    self.assertFalse(response.context["cl"].show_full_result_count)
+
+        response = self.client.get(
+            reverse("admin:insurance_app_predictionhistory_changelist"),
+            {"timestamp__year": 2025, "timestamp__month": 3},
+        )
+        self.assertEqual(response.context["cl"].result_count, 3)
+        self.assertContains(response, "timestamp__day=30")
+        self.assertNotContains(response, "timestamp__day=31")
+
+    def test_prediction_list_fetches_users_in_the_page_query(self):
+        self.client.force_login(self.admin)
+        url = reverse("admin:insurance_app_predictionhistory_changelist")
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        PredictionHistory.objects.create(
+            user=self.admin, predicted_charges=1, **self.PROFILE
+        )
+        with self.assertNumQueries(len(queries)):
+            self.client.get(url)
+
+    def test_user_autocomplete_serves_the_appointment_form(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(
+            reverse("admin:autocomplete"),
+            {
+                "term": "ali",
+                "app_label": "insurance_app",
+                "model_name": "appointment",
+                "field_name": "user",
+            },
+        )
+        self.assertEqual(
+            [result["text"] for result in response.json()["results"]], ["alice"]
+        )
@@ -0,0 +1,148 @@
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from insurance_app import analytics
+from insurance_app.models import (
+    PortfolioRollup,
+    PredictionHistory,
+    RollupCheckpoint,
+    UserProfile,
+)
+from insurance_app.sketches import RELATIVE_ACCURACY, QuantileSketch
+
+
+class QuantileSketchTest(SimpleTestCase):
+    def test_quantiles_within_relative_error(self):
+        rng = random.Random(1)
+        values = sorted(rng.lognormvariate(9, 0.6) for _ in range(5000))
+        sketch = QuantileSketch()
+        sketch.extend(values)
+        for q in (0.01, 0.5, 0.9, 0.99):
+            exact = values[int(q * (len(values) - 1))]
+            self.assertAlmostEqual(
+                sketch.quantile(q) / exact, 1, delta=RELATIVE_ACCURACY * 1.01
+            )
+
+    def test_merge_equals_single_sketch(self):
+        values = [100, 250, 1000, 1000, 40000, 0]
+        whole, left, right = QuantileSketch(), QuantileSketch(), QuantileSketch()
+        whole.extend(values)
+        left.extend(values[:3])
+        right.extend(values[3:])
+        left.merge(QuantileSketch.from_json(right.to_json()))
+        self.assertEqual(left.to_json(), whole.to_json())
+        self.assertEqual(left.count, 6)
+        self.assertEqual(left.quantile(0), 0.0)
+
+    def test_empty(self):
+        self.assertIsNone(QuantileSketch.from_json({}).quantile(0.5))
+
+
+class RollupRefreshTest(TestCase):
+    def setUp(self):
+        self.user = UserProfile.objects.create_user(username="u", password="pass")
+
+    def predict(self, charges, days_ago=0, region="Northeast", smoker="No"):
+        prediction = PredictionHistory.objects.create(
+            user=self.user,
+            age=30,
+            weight=70,
+            height=175,
+            num_children=0,
+            smoker=smoker,
+            region=region,
+            sex="Male",
+            predicted_charges=charges,
+        )
+        if days_ago:
+            PredictionHistory.objects.filter(pk=prediction.pk).update(
+                timestamp=timezone.now() - timedelta(days=days_ago)
+            )
+        return prediction
+
+    def refresh(self, **kwargs):
+        return analytics.refresh_rollups(settle_seconds=0, **kwargs)
+
+    def test_incremental_refresh_counts_each_row_once(self):
+        self.predict(1000, days_ago=1)
+        self.predict(3000, days_ago=1, region="Southwest", smoker="Yes")
+        self.assertEqual(self.refresh(), 2)
+        self.assertEqual(self.refresh(), 0)
+
+        last = self.predict(2000, days_ago=1)
+        self.assertEqual(self.refresh(batch_size=1), 1)
+        self.assertEqual(RollupCheckpoint.objects.get().last_id, last.pk)
+
+        day = timezone.localdate() - timedelta(days=1)
+        total = PortfolioRollup.objects.get(day=day, dimension="all")
+        self.assertEqual((total.count, total.total_charges), (3, Decimal("6000")))
+        # Every dimension accounts for every row.
+        for dimension in analytics.DIMENSIONS:
+            rows = PortfolioRollup.objects.filter(day=day, dimension=dimension)
+            self.assertEqual(sum(row.count for row in rows), 3)
+
+    def test_recent_rows_wait_for_next_run(self):
+        self.predict(1000)
+        self.assertEqual(analytics.refresh_rollups(settle_seconds=3600), 0)
+        self.assertEqual(self.refresh(), 1)
+
+    def test_breakdown_and_trend(self):
+        for charges in (1000, 2000, 3000):
+            self.predict(charges, days_ago=2)
+        self.predict(10000, days_ago=1, smoker="Yes")
+        self.refresh()
+        end = timezone.localdate()
+        start = end - timedelta(days=6)
+
+        by_smoker = {
+            row["value"]: row for row in analytics.breakdown("smoker", start, end)
+        }
+        self.assertEqual(by_smoker["No"]["count"], 3)
+        self.assertEqual(by_smoker["No"]["average"], Decimal("2000"))
+        self.assertAlmostEqual(by_smoker["No"]["p50"], 2000, delta=2000 * 0.02)
+        self.assertEqual(by_smoker["Yes"]["count"], 1)
+
+        daily = analytics.trend(start, end)
+        self.assertEqual([row["count"] for row in daily], [3, 1])
+        monthly = analytics.trend(start, end, period="month")
+        self.assertEqual(sum(row["count"] for row in monthly), 4)
+
+    def test_long_ranges_combine_monthly_and_daily_rows(self):
+        for days_ago in (1, 40, 75, 200):
+            self.predict(1000, days_ago=days_ago)
+        self.refresh()
+        end = timezone.localdate()
+        self.assertEqual(
+            PortfolioRollup.objects.filter(dimension="all", grain="month").count(),
+            len({(end - timedelta(days=d)).replace(day=1) for d in (1, 40, 75, 200)}),
+        )
+        for days, expected in ((30, 1), (90, 3), (365, 4)):
+            start = end - timedelta(days=days - 1)
+            rows = analytics.breakdown("sex", start, end)
+            self.assertEqual(sum(row["count"] for row in rows), expected, days)
+            monthly = analytics.trend(start, end, period="month")
+            self.assertEqual(sum(row["count"] for row in monthly), expected, days)
+
+    def test_dashboard_is_staff_only_and_reads_rollups_only(self):
+        self.predict(1000, days_ago=1)
+        self.refresh()
+        url = reverse("portfolio_analytics")
+
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        staff = UserProfile.objects.create_user(
+            username="staff", password="pass", is_staff=True
+        )
+        self.client.force_login(staff)
+        # session + user, breakdown, trend, last refresh
+        with self.assertNumQueries(5):
+            response = self.client.get(url, {"dimension": "smoker", "days": 30})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["breakdown"][0]["value"], "No")
+        self.assertEqual(response.context["trend"][0]["count"], 1)
@@ -0,0 +1,110 @@
+import json
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from insurance_app import archive
+from insurance_app.models import ContactMessage, PredictionHistory, UserProfile
+
+
+class ArchiveOldRowsTest(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        override = override_settings(ARCHIVE_DIR=self.tmp.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.user = UserProfile.objects.create_user(username="old", password="pass")
+        now = timezone.now()
+        for months_ago in (30, 26, 1):
+            prediction = PredictionHistory.objects.create(
+                user=self.user,
+                age=40,
+                weight=80,
+                height=180,
+                num_children=1,
+                smoker="No",
+                region="Northeast",
+                sex="Male",
+                predicted_charges=1000 + months_ago,
+            )
+            message = ContactMessage.objects.create(
+                name="Bob", email="b@b.com", message=f"{months_ago} months ago"
+            )
+            old = now - timedelta(days=30 * months_ago)
+            PredictionHistory.objects.filter(pk=prediction.pk).update(timestamp=old)
+            ContactMessage.objects.filter(pk=message.pk).update(submitted_at=old)
+
+    def run_command(self, *args):
+        out = StringIO()
+        call_command("archive_old_rows", "--pause", "0", *args, stdout=out)
+        return out.getvalue()
+
+    def test_moves_old_rows_into_monthly_archive(self):
+        output = self.run_command("--older-than-days", "365", "--batch-size", "1")
+
+        self.assertIn("predictions@default: 2 rows", output)
+        self.assertEqual(PredictionHistory.objects.count(), 1)
+        self.assertEqual(ContactMessage.objects.count(), 1)
+
+        self.assertEqual(len(archive.archived_months("predictions")), 2)
+        charges = sorted(
+            row["predicted_charges"] for row in archive.iter_archived("predictions")
+        )
+        self.assertEqual(charges, ["1026.00", "1030.00"])
+        messages = [row["message"] for row in archive.iter_archived("messages")]
+        self.assertCountEqual(messages, ["30 months ago", "26 months ago"])
+
+    def test_iter_archived_filters_months(self):
+        self.run_command("--older-than-days", "365")
+        months = archive.archived_months("predictions")
+        rows = list(archive.iter_archived("predictions", start=months[-1]))
+        self.assertEqual(len(rows), 1)
+
+    def test_max_rows_limits_a_run(self):
+        self.run_command("--dataset", "messages", "--max-rows", "1")
+        self.assertEqual(ContactMessage.objects.count(), 2)
+        self.run_command("--dataset", "messages")
+        self.assertEqual(ContactMessage.objects.count(), 1)
+        self.assertEqual(PredictionHistory.objects.count(), 3)
+
+    def test_restart_finishes_an_interrupted_delete(self):
+        dataset = archive.DATASETS["messages"]
+        oldest = ContactMessage.objects.order_by("submitted_at").first()
+        rows = list(
+            ContactMessage.objects.filter(pk=oldest.pk).values_list(*dataset.columns)
+        )
+        parts = archive._plan_parts(
+            dataset, rows, dataset.columns.index("submitted_at")
+        )
+        for relative, part_rows in parts.items():
+            archive._write_part(dataset, relative, part_rows)
+        archive._save_checkpoint(
+            dataset,
+            "default",
+            {"pending_ids": [oldest.pk], "pending_parts": list(parts)},
+        )
+
+        # A later run with a shorter retention must not archive the row twice.
+        self.run_command("--dataset", "messages", "--older-than-days", "10000")
+        self.assertFalse(ContactMessage.objects.filter(pk=oldest.pk).exists())
+        self.assertEqual(len(list(archive.iter_archived("messages"))), 1)
+
+    def test_restart_discards_partial_parts(self):
+        dataset = archive.DATASETS["messages"]
+        missing = "messages/2000-01/part-000000000001-000000000001.csv.gz"
+        archive._save_checkpoint(
+            dataset, "default", {"pending_ids": [1], "pending_parts": [missing]}
+        )
+        self.run_command("--dataset", "messages", "--older-than-days", "10000")
+
+        checkpoint = json.loads(
+            archive._checkpoint_path(dataset, "default").read_text()
+        )
+        self.assertEqual(checkpoint["pending_ids"], [])
+        self.assertEqual(ContactMessage.objects.count(), 3)
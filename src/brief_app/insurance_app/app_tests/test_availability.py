@@ -0,0 +1,93 @@
+from datetime import date
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from insurance_app.availability import (
+    DEFAULT_TIME_SLOTS,
+    get_availability,
+    get_time_slots,
+)
+from insurance_app.models import (
+    Availability,
+    AvailabilityException,
+    AvailabilityRule,
+)
+
+MONDAY = date(2050, 1, 3)
+TUESDAY = date(2050, 1, 4)
+
+
+class AvailabilityResolutionTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        AvailabilityRule.objects.create(
+            weekday=AvailabilityRule.Weekday.MONDAY,
+            time_slots=["09:00", "10:00", "11:00"],
+            valid_from=date(2050, 1, 1),
+        )
+
+    def test_rule_applies_on_matching_weekday_only(self):
+        self.assertEqual(get_time_slots(MONDAY), ["09:00", "10:00", "11:00"])
+        self.assertEqual(get_time_slots(TUESDAY), [])
+
+    def test_rule_respects_validity_period(self):
+        self.assertEqual(get_time_slots(date(2049, 12, 27)), [])
+
+        AvailabilityRule.objects.update(valid_until=date(2050, 1, 5))
+        cache.clear()
+        self.assertEqual(get_time_slots(date(2050, 1, 10)), [])
+
+    def test_exception_blocks_hours(self):
+        AvailabilityException.objects.create(
+            start_date=MONDAY, end_date=MONDAY, blocked_slots=["10:00"]
+        )
+        self.assertEqual(get_time_slots(MONDAY), ["09:00", "11:00"])
+
+    def test_exception_without_slots_closes_whole_days(self):
+        AvailabilityException.objects.create(
+            start_date=MONDAY, end_date=date(2050, 1, 10), reason="Holiday"
+        )
+        self.assertEqual(get_time_slots(MONDAY), [])
+        self.assertEqual(get_time_slots(date(2050, 1, 10)), [])
+        self.assertEqual(get_time_slots(date(2050, 1, 17)), ["09:00", "10:00", "11:00"])
+
+    def test_explicit_availability_overrides_rules(self):
+        Availability.objects.create(date=MONDAY, time_slots=["15:00"])
+        self.assertEqual(get_time_slots(MONDAY), ["15:00"])
+
+    def test_window_costs_constant_queries(self):
+        with self.assertNumQueries(3):
+            window = get_availability(date(2050, 1, 1), date(2050, 6, 30))
+        self.assertEqual(len(window), 181)
+        self.assertEqual(sum(1 for slots in window.values() if slots), 26)
+
+    def test_window_is_served_from_cache(self):
+        get_availability(MONDAY, date(2050, 2, 28))
+        with self.assertNumQueries(0):
+            get_availability(MONDAY, date(2050, 2, 28))
+
+    def test_saving_rules_invalidates_cache(self):
+        self.assertEqual(get_time_slots(TUESDAY), [])
+        AvailabilityRule.objects.create(
+            weekday=AvailabilityRule.Weekday.TUESDAY,
+            time_slots=["14:00"],
+            valid_from=date(2050, 1, 1),
+        )
+        self.assertEqual(get_time_slots(TUESDAY), ["14:00"])
+
+    def test_get_available_times_uses_rules(self):
+        resp = self.client.get(reverse("get_available_times"), {"date": "2050-01-03"})
+        self.assertJSONEqual(resp.content, {"times": ["09:00", "10:00", "11:00"]})
+
+    def test_get_available_times_invalid_date(self):
+        resp = self.client.get(reverse("get_available_times"), {"date": "not-a-date"})
+        self.assertJSONEqual(resp.content, {"times": []})
+
+
+class DefaultTimeSlotsTest(TestCase):
+    def test_default_slots_span_opening_hours(self):
+        self.assertEqual(DEFAULT_TIME_SLOTS[0], "09:00")
+        self.assertEqual(DEFAULT_TIME_SLOTS[-1], "18:00")
+        self.assertEqual(len(DEFAULT_TIME_SLOTS), 10)
@@ -0,0 +1,111 @@
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from insurance_app import caching, pricing
+from insurance_app.models import UserProfile
+
+PROFILE = {
+    "age": 30,
+    "weight": 70,
+    "height": 175,
+    "num_children": 0,
+    "smoker": "No",
+    "region": "Northeast",
+    "sex": "Male",
+}
+
+
+@override_settings(AUTH_USER_CACHE=True)
+class CachedUserTest(TestCase):
+    url = reverse("welcome")
+
+    def setUp(self):
+        for tier in caching.TIERS:
+            caches[tier].clear()
+        self.user = UserProfile.objects.create_user(
+            "alice", password="Secret-pass-1", **PROFILE
+        )
+        self.client.force_login(self.user)
+
+    def request_user(self, client=None, url=None):
+        return (client or self.client).get(url or self.url).wsgi_request.user
+
+    def test_user_is_served_from_the_cache(self):
+        with self.assertNumQueries(2):  # session + user
+            self.client.get(self.url)
+        with self.assertNumQueries(1):  # session
+            response = self.client.get(self.url)
+        self.assertContains(response, "Welcome, alice!")
+
+    def test_profile_edit(self):
+        self.request_user()
+        data = {**PROFILE, "username": "alice", "email": "a@example.com"}
+        response = self.client.post(
+            reverse("profile"), {**data, "first_name": "Alicia"}
+        )
+        self.assertRedirects(response, reverse("profile"))
+        self.assertEqual(self.request_user().first_name, "Alicia")
+
+    def test_admin_edits(self):
+        self.request_user()
+        self.user.refresh_from_db()
+        self.user.is_staff = True
+        self.user.save()
+        self.assertTrue(self.request_user().is_staff)
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertFalse(self.request_user().is_authenticated)
+
+    def test_deleted_user(self):
+        self.request_user()
+        self.user.delete()
+        self.assertFalse(self.request_user().is_authenticated)
+
+    def test_quote_refresh(self):
+        self.assertIsNone(self.request_user().quoted_charges)
+        refreshed, _ = pricing.refresh_quotes(UserProfile.objects.all())
+        self.assertEqual(refreshed, 1)
+        self.user.refresh_from_db()
+        self.assertIsNotNone(self.user.quoted_charges)
+        self.assertEqual(self.request_user().quoted_charges, self.user.quoted_charges)
+
+    def test_password_change_ends_the_other_sessions(self):
+        other = Client()
+        other.force_login(self.user)
+        self.assertTrue(self.request_user(other).is_authenticated)
+
+        self.client.post(
+            reverse("changepassword"),
+            {
+                "old_password": "Secret-pass-1",
+                "new_password1": "Other-pass-2",
+                "new_password2": "Other-pass-2",
+            },
+        )
+        self.assertTrue(self.request_user().is_authenticated)
+        # The stale session is flushed, past the welcome page's query budget.
+        user = self.request_user(other, url=reverse("profile"))
+        self.assertFalse(user.is_authenticated)
+
+    def test_logout(self):
+        self.request_user()
+        self.client.post(reverse("logout_user"))
+        self.assertFalse(self.request_user().is_authenticated)
+
+    def test_cache_failure_reads_the_database(self):
+        with mock.patch.object(
+            caching, "get_or_set", side_effect=ConnectionError("cache down")
+        ), self.assertLogs("insurance_app.backends", "WARNING"):
+            with self.assertNumQueries(2):
+                user = self.request_user()
+        self.assertEqual(user.pk, self.user.pk)
+
+    @override_settings(AUTH_USER_CACHE=False)
+    def test_disabled(self):
+        self.request_user()
+        with self.assertNumQueries(2):
+            self.request_user()
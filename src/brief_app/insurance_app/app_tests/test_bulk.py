@@ -0,0 +1,275 @@
+from datetime import date
+from io import StringIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from insurance_app import availability, bulk
+from insurance_app.models import Appointment, Availability, UserProfile
+
+
+def writes(queries):
+    """The INSERT/UPDATE/DELETE statements among captured queries."""
+    return [
+        query["sql"]
+        for query in queries
+        if query["sql"].startswith(("INSERT", "UPDATE", "DELETE"))
+    ]
+
+
+class BulkAvailabilityTest(TestCase):
+    def test_set_availability_upserts_a_range_in_one_statement(self):
+        Availability.objects.create(date=date(2030, 6, 3), time_slots=["09:00"])
+        days = bulk.date_range(date(2030, 6, 1), date(2030, 6, 30), weekdays=[0, 2])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as queries:
+                written = bulk.set_availability(days, ["11:00", "10:00"])
+
+        self.assertEqual(written, 8)  # 4 Mondays and 4 Wednesdays
+        self.assertEqual(len(writes(queries)), 1)
+        self.assertEqual(Availability.objects.count(), 8)
+        self.assertEqual(
+            Availability.objects.get(date=date(2030, 6, 3)).time_slots,
+            ["10:00", "11:00"],
+        )
+        self.assertEqual(availability.get_time_slots("2030-06-05"), ["10:00", "11:00"])
+
+    def test_set_availability_rejects_unknown_slots(self):
+        with self.assertRaisesMessage(ValueError, "unknown time slots: 23:00"):
+            bulk.set_availability([date(2030, 6, 3)], ["23:00"])
+
+    def test_clear_availability_drops_the_range(self):
+        for day in (1, 2, 3):
+            Availability.objects.create(date=date(2030, 6, day), time_slots=[])
+        self.assertEqual(bulk.clear_availability(date(2030, 6, 2), date(2030, 6, 9)), 2)
+        self.assertEqual(
+            list(Availability.objects.values_list("date", flat=True)),
+            [date(2030, 6, 1)],
+        )
+
+    def test_import_streams_batches_in_one_transaction(self):
+        lines = ["date,time_slots\n"] + [
+            f"2030-07-{day:02d},09:00 10:00\n" for day in range(1, 6)
+        ]
+        lines.append("2030-07-06,\n")
+        original, bulk.BATCH_SIZE = bulk.BATCH_SIZE, 2
+        try:
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(bulk.import_availability(iter(lines)), 6)
+        finally:
+            bulk.BATCH_SIZE = original
+        self.assertEqual(len(writes(queries)), 3)
+        self.assertEqual(Availability.objects.get(date="2030-07-06").time_slots, [])
+
+    def test_invalid_row_rolls_back_the_whole_import(self):
+        lines = StringIO(
+            "date,time_slots\n2030-07-01,09:00\n2030-07-02,9am\n2030-07-03,10:00\n"
+        )
+        with self.assertRaisesMessage(
+            bulk.CsvImportError, "Line 3: unknown time slots: 9am"
+        ):
+            bulk.import_availability(lines)
+        self.assertFalse(Availability.objects.exists())
+
+        with self.assertRaisesMessage(bulk.CsvImportError, "missing columns: date"):
+            bulk.import_availability(StringIO("day,time_slots\n"))
+
+    def test_export_round_trips(self):
+        Availability.objects.create(date=date(2030, 6, 2), time_slots=[])
+        Availability.objects.create(
+            date=date(2030, 6, 1), time_slots=["09:00", "10:00"]
+        )
+        lines = list(bulk.export_availability(Availability.objects.all()))
+        self.assertEqual(
+            lines,
+            ["date,time_slots\r\n", "2030-06-01,09:00 10:00\r\n", "2030-06-02,\r\n"],
+        )
+        Availability.objects.all().delete()
+        self.assertEqual(bulk.import_availability(lines), 2)
+
+
+class BulkAppointmentTest(TestCase):
+    def setUp(self):
+        self.alice = UserProfile.objects.create_user("alice")
+        self.appointments = Appointment.objects.bulk_create(
+            Appointment(
+                user=self.alice,
+                reason="Consultation",
+                date=date(2030, 6, day),
+                time="10:00",
+            )
+            for day in (1, 2, 3)
+        )
+
+    def test_move_by_days_updates_each_date_once(self):
+        for days, expected in ((1, [2, 3, 4]), (-2, [31, 1, 2])):
+            with self.subTest(days=days):
+                with CaptureQueriesContext(connection) as queries:
+                    moved = bulk.move_appointments(Appointment.objects.all(), days=days)
+                self.assertEqual(moved, 3)
+                # One UPDATE per distinct date; consecutive dates are not moved
+                # twice.
+                self.assertEqual(len(writes(queries)), 3)
+                self.assertEqual(
+                    [
+                        day.day
+                        for day in Appointment.objects.order_by("date").values_list(
+                            "date", flat=True
+                        )
+                    ],
+                    expected,
+                )
+
+    def test_move_to_date_and_time(self):
+        with CaptureQueriesContext(connection) as queries:
+            bulk.move_appointments(
+                Appointment.objects.filter(date__gte=date(2030, 6, 2)),
+                to_date=date(2030, 7, 1),
+                time="15:00",
+            )
+        self.assertEqual(len(writes(queries)), 1)
+        self.assertEqual(
+            sorted(Appointment.objects.values_list("date", "time")),
+            [
+                (date(2030, 6, 1), "10:00"),
+                (date(2030, 7, 1), "15:00"),
+                (date(2030, 7, 1), "15:00"),
+            ],
+        )
+
+    def test_cancel_in_one_statement(self):
+        with CaptureQueriesContext(connection) as queries:
+            cancelled = bulk.cancel_appointments(
+                Appointment.objects.filter(date__lte=date(2030, 6, 2))
+            )
+        self.assertEqual(cancelled, 2)
+        self.assertEqual(len(writes(queries)), 1)
+
+    def test_import_and_export(self):
+        UserProfile.objects.create_user("bob")
+        lines = StringIO(
+            "username,reason,date,time\n"
+            "bob,Insurance Claim,2030-08-01,09:00\n"
+            "alice,Policy Inquiry,2030-08-02,18:00\n"
+        )
+        self.assertEqual(bulk.import_appointments(lines), 2)
+        exported = list(
+            bulk.export_appointments(Appointment.objects.filter(date__month=8))
+        )
+        self.assertEqual(
+            exported,
+            [
+                "username,reason,date,time\r\n",
+                "bob,Insurance Claim,2030-08-01,09:00\r\n",
+                "alice,Policy Inquiry,2030-08-02,18:00\r\n",
+            ],
+        )
+
+    def test_import_reports_unknown_users(self):
+        lines = StringIO(
+            "username,reason,date,time\n"
+            "alice,Consultation,2030-08-01,09:00\n"
+            "carol,Consultation,2030-08-01,09:00\n"
+        )
+        with self.assertRaisesMessage(
+            bulk.CsvImportError, "Line 3: unknown user 'carol'"
+        ):
+            bulk.import_appointments(lines)
+        self.assertEqual(Appointment.objects.count(), 3)
+
+
+class BulkAdminTest(TestCase):
+    def setUp(self):
+        self.admin = UserProfile.objects.create_superuser("admin", password="pass")
+        self.client.force_login(self.admin)
+        self.appointment = Appointment.objects.create(
+            user=self.admin, reason="Consultation", date=date(2030, 6, 1), time="10:00"
+        )
+
+    def test_set_range_page(self):
+        url = reverse("admin:insurance_app_availability_set_range")
+        self.assertContains(self.client.get(url), "Set availability for dates")
+        response = self.client.post(
+            url,
+            {
+                "start_date": "2030-06-01",
+                "end_date": "2030-06-07",
+                "time_slots": ["09:00", "10:00"],
+            },
+            follow=True,
+        )
+        self.assertContains(response, "Set the availability of 7 day(s).")
+        self.assertEqual(Availability.objects.count(), 7)
+
+        response = self.client.post(
+            url,
+            {"start_date": "2030-06-07", "end_date": "2030-06-01", "clear": "on"},
+        )
+        self.assertContains(response, "must be after")
+        self.client.post(
+            url, {"start_date": "2030-06-01", "end_date": "2030-06-03", "clear": "on"}
+        )
+        self.assertEqual(Availability.objects.count(), 4)
+
+    def test_import_page(self):
+        url = reverse("admin:insurance_app_availability_import")
+        upload = SimpleUploadedFile(
+            "days.csv", b"\xef\xbb\xbfdate,time_slots\n2030-06-01,09:00\n"
+        )
+        response = self.client.post(url, {"csv_file": upload}, follow=True)
+        self.assertContains(response, "Imported 1 row(s).")
+
+        url = reverse("admin:insurance_app_appointment_import")
+        upload = SimpleUploadedFile("appointments.csv", b"username,reason\n")
+        response = self.client.post(url, {"csv_file": upload})
+        self.assertContains(response, "missing columns: date, time")
+
+    def test_move_action_asks_then_applies(self):
+        url = reverse("admin:insurance_app_appointment_changelist")
+        selection = {
+            "action": "move_appointments",
+            "_selected_action": [self.appointment.pk],
+        }
+        response = self.client.post(url, selection)
+        self.assertContains(response, "Move appointments")
+        self.assertContains(response, f'value="{self.appointment.pk}"')
+
+        response = self.client.post(
+            url, {**selection, "index": 0, "apply": "Apply", "days": 7}, follow=True
+        )
+        self.assertContains(response, "Moved 1 appointment(s).")
+        self.appointment.refresh_from_db()
+        self.assertEqual(self.appointment.date, date(2030, 6, 8))
+
+    def test_export_action_streams_csv(self):
+        response = self.client.post(
+            reverse("admin:insurance_app_appointment_changelist"),
+            {"action": "export_csv", "_selected_action": [self.appointment.pk]},
+        )
+        self.assertTrue(response.streaming)
+        self.assertEqual(
+            b"".join(response.streaming_content).decode(),
+            "username,reason,date,time\r\nadmin,Consultation,2030-06-01,10:00\r\n",
+        )
+
+    def test_cancel_action_asks_then_applies(self):
+        url = reverse("admin:insurance_app_appointment_changelist")
+        selection = {
+            "action": "cancel_appointments",
+            "_selected_action": [self.appointment.pk],
+        }
+        response = self.client.post(url, selection)
+        self.assertContains(response, "cancel the 1 selected appointment(s)?")
+        self.assertContains(response, "June 1, 2030: 1")
+        self.assertContains(response, f'value="{self.appointment.pk}"')
+        self.assertTrue(Appointment.objects.exists())
+
+        response = self.client.post(
+            url, {**selection, "index": 0, "apply": "Yes"}, follow=True
+        )
+        self.assertContains(response, "Cancelled 1 appointment(s).")
+        self.assertFalse(Appointment.objects.exists())
@@ -0,0 +1,202 @@
+import tempfile
+from datetime import date, timedelta
+
+from django.core.cache import caches
+from django.template import Context, Template, TemplateSyntaxError
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from brief_app.settings import cache_config
+from insurance_app import archive, caching
+from insurance_app.availability import get_availability
+from insurance_app.models import Job, PredictionHistory, UserProfile
+
+PROFILE = {
+    "age": 30,
+    "weight": 70,
+    "height": 175,
+    "num_children": 0,
+    "smoker": "No",
+    "region": "Northeast",
+    "sex": "Male",
+}
+
+
+class CacheTestCase(TestCase):
+    def setUp(self):
+        for tier in caching.TIERS:
+            caches[tier].clear()
+        caching.clear_stats()
+
+    def stats(self, name):
+        return next(entry for entry in caching.stats() if entry.name == name)
+
+
+class TaggedCacheTest(CacheTestCase):
+    def test_get_or_set_counts_hits_and_misses(self):
+        calls = []
+        for _ in range(3):
+            value = caching.get_or_set(
+                "answer", lambda: calls.append(1) or 42, tags=["t"], tier="local"
+            )
+        self.assertEqual((value, len(calls)), (42, 1))
+        stats = self.stats("answer")
+        self.assertEqual((stats.hits, stats.misses), (2, 1))
+        self.assertAlmostEqual(stats.ratio, 2 / 3)
+
+    def test_invalidating_a_tag_drops_its_entries_only(self):
+        calls = []
+
+        @caching.cached(tags=lambda key: [f"tag:{key}", "all"])
+        def compute(key):
+            calls.append(key)
+            return key.upper()
+
+        self.assertEqual([compute("a"), compute("b"), compute("a")], ["A", "B", "A"])
+        caching.invalidate("tag:a")
+        self.assertEqual([compute("a"), compute("b")], ["A", "B"])
+        self.assertEqual(calls, ["a", "b", "a"])
+        caching.invalidate("all")
+        compute("b")
+        self.assertEqual(calls, ["a", "b", "a", "b"])
+
+    def test_evicted_tag_version_does_not_revive_old_entries(self):
+        caching.get_or_set("value", lambda: "old", tags=["t"])
+        caching.invalidate("t")
+        caches["default"].delete(f"{caching.TAG_PREFIX}:t")
+        self.assertEqual(caching.get_or_set("value", lambda: "new", tags=["t"]), "new")
+
+    def test_unknown_tier(self):
+        with self.assertRaises(ValueError):
+            caching.get_or_set("value", lambda: 1, tier="disk")
+
+    def test_fragment_tag(self):
+        template = Template(
+            '{% load cache_tags %}{% cachedfragment "greeting" "t" %}'
+            "{{ name }}{% endcachedfragment %}"
+        )
+        self.assertEqual(template.render(Context({"name": "a"})), "a")
+        self.assertEqual(template.render(Context({"name": "b"})), "a")
+        caching.invalidate("t")
+        self.assertEqual(template.render(Context({"name": "b"})), "b")
+        with self.assertRaises(TemplateSyntaxError):
+            Template(
+                '{% load cache_tags %}{% cachedfragment "x" %}{% endcachedfragment %}'
+            )
+
+
+class CacheConsumersTest(CacheTestCase):
+    def test_join_us_is_served_from_cache_until_a_job_changes(self):
+        Job.objects.create(title="Actuary", description="Price risks")
+        self.client.get(reverse("join_us"))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("join_us"))
+        self.assertContains(response, "Actuary")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Job.objects.create(title="Underwriter", description="Assess risks")
+        self.assertContains(self.client.get(reverse("join_us")), "Underwriter")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Job.objects.filter(title="Actuary").get().delete()
+        self.assertNotContains(self.client.get(reverse("join_us")), "Actuary")
+        self.assertGreater(self.stats("fragment:job-openings").hits, 0)
+
+    def test_history_stats_are_cached_until_a_new_prediction(self):
+        user = UserProfile.objects.create_user("alice", password="pass", **PROFILE)
+        PredictionHistory.objects.create(user=user, predicted_charges=1000, **PROFILE)
+        self.client.force_login(user)
+        url = reverse("prediction_history")
+        self.client.get(url)
+        # session + user, history version, paginator count, page: the summary
+        # comes from the cache
+        with self.assertNumQueries(5):
+            response = self.client.get(url)
+        self.assertEqual(response.context["total_predictions"], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            PredictionHistory.objects.create(
+                user=user, predicted_charges=3000, **PROFILE
+            )
+        response = self.client.get(url)
+        self.assertEqual(response.context["total_predictions"], 2)
+        self.assertEqual(response.context["average_charges"], 2000)
+        stats = self.stats("history-stats")
+        self.assertEqual((stats.hits, stats.misses), (1, 2))
+
+    def test_history_stats_follow_deletes(self):
+        user = UserProfile.objects.create_user("alice", password="pass", **PROFILE)
+        first, second, third = (
+            PredictionHistory.objects.create(
+                user=user, predicted_charges=charges, **PROFILE
+            )
+            for charges in (1000, 2000, 3000)
+        )
+        self.client.force_login(user)
+        url = reverse("prediction_history")
+        self.assertEqual(self.client.get(url).context["total_predictions"], 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        response = self.client.get(url)
+        self.assertEqual(response.context["total_predictions"], 2)
+        self.assertEqual(response.context["average_charges"], 2500)
+        self.assertEqual(response.context["paginator"].count, 2)
+
+        PredictionHistory.objects.filter(pk=second.pk).update(
+            timestamp=timezone.now() - timedelta(days=400)
+        )
+        with tempfile.TemporaryDirectory() as tmp, override_settings(
+            ARCHIVE_DIR=tmp
+        ), self.captureOnCommitCallbacks(execute=True):
+            dataset = archive.DATASETS["predictions"]
+            cutoff = timezone.now() - timedelta(days=365)
+            self.assertEqual(len(list(archive.archive_batches(dataset, cutoff))), 1)
+        response = self.client.get(url)
+        self.assertEqual(response.context["total_predictions"], 1)
+        self.assertEqual(response.context["average_charges"], 3000)
+        self.assertEqual(response.context["paginator"].count, 1)
+
+    def test_availability_lookups_are_counted(self):
+        get_availability(date(2050, 1, 1), date(2050, 1, 7))
+        get_availability(date(2050, 1, 1), date(2050, 1, 10))
+        stats = self.stats("availability")
+        self.assertEqual((stats.hits, stats.misses), (7, 10))
+
+    def test_staff_see_hit_ratios(self):
+        staff = UserProfile.objects.create_user("staff", password="pass", is_staff=True)
+        self.client.force_login(staff)
+        self.client.get(reverse("join_us"))
+        self.client.get(reverse("join_us"))
+        response = self.client.get(reverse("query_log"))
+        self.assertContains(response, "fragment:job-openings")
+        self.assertContains(response, "50%")
+
+
+class CacheConfigTest(SimpleTestCase):
+    def test_tiers(self):
+        self.assertIn("LocMemCache", cache_config(None)["BACKEND"])
+        redis = cache_config("redis://127.0.0.1:6379/1")
+        self.assertIn("RedisCache", redis["BACKEND"])
+        self.assertEqual(redis["LOCATION"], "redis://127.0.0.1:6379/1")
+        memcached = cache_config("memcached://127.0.0.1:11211")
+        self.assertEqual(memcached["LOCATION"], "127.0.0.1:11211")
+        files = cache_config("file:///var/cache/assur")
+        self.assertIn("FileBasedCache", files["BACKEND"])
+        self.assertEqual(files["LOCATION"], "/var/cache/assur")
+        with self.assertRaises(ValueError):
+            cache_config("mongodb://localhost")
+
+    @override_settings(
+        CACHES={
+            alias: {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+            for alias in caching.TIERS
+        }
+    )
+    def test_disabled_cache_always_computes(self):
+        calls = []
+        for _ in range(2):
+            caching.get_or_set("value", lambda: calls.append(1), tags=["t"])
+        caching.invalidate("t")
+        self.assertEqual(len(calls), 2)
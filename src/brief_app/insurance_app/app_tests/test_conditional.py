@@ -0,0 +1,229 @@
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
+
+from django.db.models import F
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from insurance_app import bulk, pricing
+from insurance_app.models import Appointment, PredictionHistory, UserProfile
+
+PROFILE = {
+    "age": 30,
+    "weight": 70,
+    "height": 175,
+    "num_children": 0,
+    "smoker": "No",
+    "region": "Northeast",
+    "sex": "Male",
+}
+
+
+class ConditionalTestCase(TestCase):
+    url = ""
+
+    def setUp(self):
+        self.user = UserProfile.objects.create_user(
+            "alice", password="Secret-pass-1", **PROFILE
+        )
+        self.client.force_login(self.user)
+        self.client.get(self.url)  # Sets the CSRF cookie.
+
+    def etag(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Cache-Control"], "private, no-cache")
+        return response["ETag"]
+
+    def assertNotModified(self, etag, queries):
+        with self.assertNumQueries(queries):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["ETag"], etag)
+
+    def assertModified(self, etag):
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+
+class ProfileConditionalTest(ConditionalTestCase):
+    url = reverse("profile")
+
+    def test_unchanged_profile(self):
+        # session + user only
+        self.assertNotModified(self.etag(), 2)
+
+    def test_profile_edit(self):
+        etag = self.etag()
+        data = {**PROFILE, "username": "alice", "email": "a@example.com"}
+        data.update(first_name="Alice", last_name="Smith")
+        self.client.post(self.url, data)
+        response = self.client.get(self.url)  # Shows the success message.
+        self.assertFalse(response.has_header("ETag"))
+        self.assertModified(etag)
+
+    def test_quote_refresh_and_admin_edit(self):
+        etag = self.etag()
+        UserProfile.objects.filter(pk=self.user.pk).update(quoted_charges=1234)
+        self.assertModified(etag)
+        etag = self.etag()
+        self.user.refresh_from_db()
+        self.user.is_staff = True
+        self.user.save()
+        self.assertModified(etag)
+
+    def test_password_change(self):
+        etag = self.etag()
+        self.client.post(
+            reverse("changepassword"),
+            {
+                "old_password": "Secret-pass-1",
+                "new_password1": "Other-pass-2",
+                "new_password2": "Other-pass-2",
+            },
+        )
+        self.client.get(self.url)  # Shows the success message.
+        self.assertModified(etag)
+
+    def test_new_csrf_cookie(self):
+        etag = self.etag()
+        self.client.logout()  # Drops the cookies.
+        self.client.force_login(self.user)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header("ETag"))
+        self.assertModified(etag)
+
+    def test_anonymous_user_is_redirected(self):
+        etag = self.etag()
+        self.client.logout()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 302)
+
+
+class HistoryConditionalTest(ConditionalTestCase):
+    url = reverse("prediction_history")
+
+    def setUp(self):
+        self.prediction = PredictionHistory.objects.create(
+            user=UserProfile.objects.create_user("bob"),
+            predicted_charges=500,
+            **PROFILE,
+        )
+        super().setUp()
+
+    def create(self):
+        return PredictionHistory.objects.create(
+            user=self.user, predicted_charges=1000, **PROFILE
+        )
+
+    def test_unchanged_history(self):
+        self.create()
+        # session + user, history version: no page queries or rendering
+        self.assertNotModified(self.etag(), 3)
+
+    def test_new_prediction(self):
+        etag = self.etag()
+        self.create()
+        self.assertModified(etag)
+
+    def test_repeated_prediction(self):
+        prediction = self.create()
+        etag = self.etag()
+        PredictionHistory.objects.filter(pk=prediction.pk).update(
+            repeat_count=F("repeat_count") + 1
+        )
+        self.assertModified(etag)
+
+    def test_deleted_prediction(self):
+        self.create()
+        etag = self.etag()
+        PredictionHistory.objects.filter(user=self.user).delete()
+        self.assertModified(etag)
+
+    def test_other_users_predictions(self):
+        etag = self.etag()
+        self.prediction.delete()
+        self.assertNotModified(etag, 3)
+
+    def test_predict_view(self):
+        etag = self.etag()
+        with mock.patch.object(pricing, "refresh_quote", return_value=1000):
+            self.client.post(reverse("predict"), PROFILE)
+        self.assertModified(etag)
+
+
+class AppointmentConditionalTest(ConditionalTestCase):
+    url = reverse("book_appointment")
+
+    def setUp(self):
+        super().setUp()
+        self.appointment = Appointment.objects.create(
+            user=self.user,
+            reason="Policy Inquiry",
+            date=timezone.now().date() + timedelta(days=3),
+            time="10:00",
+        )
+
+    def test_unchanged_appointments(self):
+        # session + user, appointment version
+        self.assertNotModified(self.etag(), 3)
+
+    def test_booking(self):
+        etag = self.etag()
+        self.client.post(
+            self.url,
+            {
+                "reason": "Insurance Claim",
+                "date": timezone.now().date() + timedelta(days=5),
+                "time": "09:00",
+            },
+        )
+        response = self.client.get(self.url)
+        self.assertContains(response, "booked successfully")
+        self.assertFalse(response.has_header("ETag"))
+        self.assertModified(etag)
+
+    def test_admin_move(self):
+        etag = self.etag()
+        bulk.move_appointments(Appointment.objects.all(), days=1)
+        self.assertModified(etag)
+        etag = self.etag()
+        bulk.move_appointments(Appointment.objects.all(), time="11:00")
+        self.assertModified(etag)
+
+    def test_admin_edit(self):
+        etag = self.etag()
+        self.appointment.reason = "Insurance Claim"
+        self.appointment.save()
+        self.assertModified(etag)
+
+    def test_cancel(self):
+        etag = self.etag()
+        bulk.cancel_appointments(Appointment.objects.all())
+        self.assertModified(etag)
+
+    def test_import(self):
+        etag = self.etag()
+        bulk.import_appointments(
+            StringIO(
+                "username,reason,date,time\nalice,Policy Inquiry,2030-08-01,09:00\n"
+            )
+        )
+        self.assertModified(etag)
+
+    def test_day_change(self):
+        etag = self.etag()
+        tomorrow = timezone.now() + timedelta(days=1)
+        with mock.patch("django.utils.timezone.now", return_value=tomorrow):
+            self.assertModified(etag)
+
+    def test_post_is_not_conditional(self):
+        response = self.client.post(self.url, {}, HTTP_IF_NONE_MATCH=self.etag())
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header("ETag"))
+        self.assertIsInstance(response.context["today"], date)
@@ -0,0 +1,168 @@
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth.models import Permission
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from insurance_app import erasure
+from insurance_app.models import Appointment, PredictionHistory, UserProfile
+
+
+class ErasureTest(TestCase):
+    def create_user(self, username, predictions=5, appointments=2):
+        user = UserProfile.objects.create_user(username=username, password="pass")
+        PredictionHistory.objects.bulk_create(
+            PredictionHistory(
+                user=user,
+                age=30,
+                weight=70,
+                height=175,
+                num_children=0,
+                smoker="No",
+                region="Northeast",
+                sex="Male",
+                predicted_charges=100 + i,
+            )
+            for i in range(predictions)
+        )
+        Appointment.objects.bulk_create(
+            Appointment(user=user, reason="Consultation", time="10:00")
+            for _ in range(appointments)
+        )
+        return user
+
+    def setUp(self):
+        self.alice = self.create_user("alice")
+        self.bob = self.create_user("bob")
+
+    def test_erase_user_in_batches(self):
+        result = erasure.erase_user(self.alice, batch_size=2)
+
+        self.assertEqual((result.predictions, result.appointments), (5, 2))
+        self.assertFalse(UserProfile.objects.filter(username="alice").exists())
+        self.assertFalse(PredictionHistory.objects.filter(user_id=result.user_id))
+        self.assertFalse(Appointment.objects.filter(user_id=result.user_id))
+        # Other users are untouched.
+        self.assertEqual(PredictionHistory.objects.filter(user=self.bob).count(), 5)
+
+    def test_batches_bound_the_query_count(self):
+        # 5 predictions in batches of 2: three reads of ids and three deletes,
+        # plus the final empty read; 2 appointments: one round plus that read.
+        with self.assertNumQueries((3 + 3 + 1) + (1 + 1 + 1)):
+            erasure._delete_in_batches(
+                PredictionHistory.objects.for_user(self.alice), 2, 0
+            )
+            erasure._delete_in_batches(
+                Appointment.objects.filter(user=self.alice), 2, 0
+            )
+
+    def test_erase_users_reports_missing_ids(self):
+        missing = []
+        results = list(
+            erasure.erase_users([self.alice.pk, 9999, self.bob.pk], missing=missing)
+        )
+        self.assertEqual([r.username for r in results], ["alice", "bob"])
+        self.assertEqual(missing, [9999])
+        self.assertEqual(PredictionHistory.objects.count(), 0)
+
+    def test_command_by_username_and_ids_file(self):
+        carol = self.create_user("carol")
+        with tempfile.NamedTemporaryFile("w", suffix=".txt") as ids_file:
+            ids_file.write(f"{self.bob.pk}\n\n{carol.pk}\n")
+            ids_file.flush()
+            out = StringIO()
+            call_command(
+                "erase_users",
+                "alice",
+                "--ids-file",
+                ids_file.name,
+                "--noinput",
+                stdout=out,
+                stderr=StringIO(),
+            )
+        self.assertIn(
+            "Erased 3 user(s), 15 predictions and 6 appointments.", out.getvalue()
+        )
+        self.assertEqual(UserProfile.objects.count(), 0)
+
+    def test_command_without_users(self):
+        with self.assertRaises(CommandError):
+            call_command("erase_users", "nobody", "--noinput", stderr=StringIO())
+
+    def login_admin(self):
+        admin = UserProfile.objects.create_superuser(
+            username="admin", password="pass", email="admin@example.com"
+        )
+        self.client.force_login(admin)
+
+    def test_admin_action_asks_for_confirmation(self):
+        self.login_admin()
+        url = reverse("admin:insurance_app_userprofile_changelist")
+        action = {"action": "erase_users", "_selected_action": [self.alice.pk]}
+        response = self.client.post(url, action)
+        self.assertContains(response, "Are you sure you want to erase")
+        self.assertContains(response, "Insurance Predictions: 5")
+        self.assertTrue(UserProfile.objects.filter(pk=self.alice.pk).exists())
+
+        response = self.client.post(url, {**action, "apply": "1"}, follow=True)
+        self.assertContains(response, "Erased 1 user(s) and 5 predictions.")
+        self.assertFalse(UserProfile.objects.filter(pk=self.alice.pk).exists())
+        self.assertTrue(UserProfile.objects.filter(pk=self.bob.pk).exists())
+
+    def test_admin_action_needs_permission_on_the_history(self):
+        staff = UserProfile.objects.create_user("staff", password="pass", is_staff=True)
+        staff.user_permissions.set(
+            Permission.objects.filter(
+                codename__in=["view_userprofile", "delete_userprofile"]
+            )
+        )
+        self.client.force_login(staff)
+        response = self.client.post(
+            reverse("admin:insurance_app_userprofile_changelist"),
+            {
+                "action": "erase_users",
+                "_selected_action": [self.alice.pk],
+                "apply": "1",
+            },
+        )
+        self.assertContains(response, "doesn't have permission")
+        self.assertTrue(UserProfile.objects.filter(pk=self.alice.pk).exists())
+
+    def test_admin_delete_page(self):
+        self.login_admin()
+        url = reverse("admin:insurance_app_userprofile_delete", args=[self.alice.pk])
+        # The summary counts the history instead of collecting it.
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(url)
+        self.assertContains(response, "Insurance Predictions: 5")
+        self.assertFalse(
+            any(
+                query["sql"].startswith('SELECT "insurance_app_predictionhistory"."id"')
+                for query in captured
+            )
+        )
+        with patch.object(erasure, "erase_user", wraps=erasure.erase_user) as erase:
+            self.client.post(url, {"post": "yes"})
+        erase.assert_called_once()
+        self.assertFalse(UserProfile.objects.filter(pk=self.alice.pk).exists())
+        self.assertFalse(PredictionHistory.objects.filter(user_id=self.alice.pk))
+
+    def test_admin_delete_selected(self):
+        self.login_admin()
+        with patch.object(erasure, "erase_users", wraps=erasure.erase_users) as erase:
+            self.client.post(
+                reverse("admin:insurance_app_userprofile_changelist"),
+                {
+                    "action": "delete_selected",
+                    "_selected_action": [self.alice.pk, self.bob.pk],
+                    "post": "yes",
+                },
+            )
+        erase.assert_called_once()
+        self.assertFalse(UserProfile.objects.filter(username__in=["alice", "bob"]))
+        self.assertEqual(PredictionHistory.objects.count(), 0)
@@ -0,0 +1,134 @@
+import csv
+import json
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from insurance_app import exports
+from insurance_app.models import PredictionHistory, UserProfile
+
+PROFILE = {
+    "age": 30,
+    "weight": 70,
+    "height": 175,
+    "num_children": 0,
+    "smoker": "No",
+    "region": "Northeast",
+    "sex": "Male",
+}
+
+
+class PredictionExportTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = UserProfile.objects.create_user("alice", password="pass")
+        cls.bob = UserProfile.objects.create_user("bob", password="pass")
+        cls.staff = UserProfile.objects.create_user(
+            "staff", password="pass", is_staff=True
+        )
+        cls.start = timezone.make_aware(datetime(2025, 1, 1, 12))
+        # Two of alice's predictions share a timestamp, to exercise the cursor.
+        moments = [0, 1, 1, 2, 3]
+        for user in (cls.alice, cls.bob):
+            for hours in moments:
+                prediction = PredictionHistory.objects.create(
+                    user=user, predicted_charges=1000 + hours, **PROFILE
+                )
+                PredictionHistory.objects.filter(pk=prediction.pk).update(
+                    timestamp=cls.start + timedelta(hours=hours)
+                )
+
+    def download(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test_user_export_streams_own_history_oldest_first(self):
+        self.client.force_login(self.alice)
+        content = self.download(reverse("export_prediction_history"))
+        rows = list(csv.DictReader(content.splitlines()))
+
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(list(rows[0]), list(exports.EXPORT_FIELDS))
+        self.assertEqual(rows[0]["timestamp"], "2025-01-01T11:00:00+00:00")
+        self.assertEqual(rows[0]["predicted_charges"], "1000.00")
+        self.assertEqual(rows[0]["smoker"], "No")
+        alice_ids = set(
+            PredictionHistory.objects.filter(user=self.alice).values_list(
+                "id", flat=True
+            )
+        )
+        self.assertEqual({int(row["id"]) for row in rows}, alice_ids)
+
+    def test_resume_after_cursor(self):
+        self.client.force_login(self.alice)
+        url = reverse("export_prediction_history")
+        lines = self.download(url, format="ndjson").splitlines()
+        # Interrupted after the first of the two rows sharing a timestamp.
+        last = json.loads(lines[1])
+        rest = self.download(
+            url, format="ndjson", after=last["timestamp"], after_id=last["id"]
+        ).splitlines()
+        self.assertEqual(rest, lines[2:])
+
+        # Without an id, the export resumes after every row of the timestamp.
+        rest = self.download(url, format="ndjson", after=last["timestamp"])
+        self.assertEqual(rest.splitlines(), lines[3:])
+
+    def test_rows_are_read_in_chunks(self):
+        queryset = PredictionHistory.objects.filter(user=self.alice)
+        with patch.object(exports, "CHUNK_SIZE", 2):
+            with self.assertNumQueries(1):
+                rows = exports.iter_rows(
+                    queryset, ["id"], chunk_size=exports.CHUNK_SIZE
+                )
+                self.assertEqual(len(list(rows)), 5)
+
+    def test_staff_export_covers_every_user(self):
+        url = reverse("export_predictions")
+        self.client.force_login(self.alice)
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        self.client.force_login(self.staff)
+        content = self.download(url, format="ndjson")
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(len(rows), 10)
+        self.assertEqual(list(rows[0]), list(exports.STAFF_EXPORT_FIELDS))
+        self.assertEqual({row["user_id"] for row in rows}, {self.alice.pk, self.bob.pk})
+        keys = [(row["timestamp"], row["id"]) for row in rows]
+        self.assertEqual(keys, sorted(keys))
+
+    def test_shards_are_merged_in_timestamp_order(self):
+        with patch(
+            "insurance_app.sharding.history_aliases", return_value=["default"] * 2
+        ):
+            rows = list(exports.iter_all_rows(exports.STAFF_EXPORT_FIELDS))
+        self.assertEqual(len(rows), 20)
+        timestamps = [row[2] for row in rows]
+        self.assertEqual(timestamps, sorted(timestamps))
+
+    def test_bad_parameters(self):
+        self.client.force_login(self.alice)
+        url = reverse("export_prediction_history")
+        self.assertEqual(self.client.get(url, {"format": "xml"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"after": "yesterday"}).status_code, 400)
+        response = self.client.get(url, {"after": "2025-01-01T12:00", "after_id": "x"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_bad_parameters_are_not_reflected(self):
+        self.client.force_login(self.alice)
+        url = reverse("export_prediction_history")
+        for params in (
+            {"after": "<script>alert(1)</script>"},
+            {"after": "2025-13-01T12:00<script>"},
+            {"after": "2025-01-01T12:00", "after_id": "<img src=x onerror=alert(1)>"},
+            {"after": "2025-01-01T12:00", "after_id": "١٢"},
+        ):
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response["Content-Type"], "text/plain")
+            self.assertNotIn(b"<", response.content)
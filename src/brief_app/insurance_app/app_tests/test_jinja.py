@@ -0,0 +1,110 @@
+import re
+from datetime import timedelta
+from unittest import skipUnless
+
+from django.conf import settings
+from django.template import engines
+from django.test import TestCase
+from django.test.utils import ContextList
+from django.urls import reverse
+from django.utils import timezone
+
+from insurance_app import jinja
+from insurance_app.models import Appointment, PredictionHistory, UserProfile
+
+PROFILE = {
+    "age": 30,
+    "weight": 70,
+    "height": 175,
+    "num_children": 0,
+    "smoker": "No",
+    "region": "northeast",
+    "sex": "male",
+}
+PREDICTION = {"age": 35, "height": 180, "weight": 75, "num_children": 1}
+
+
+def normalize(html: str) -> str:
+    """`html` without layout whitespace or per-render CSRF tokens."""
+    html = re.sub(r'name="csrfmiddlewaretoken" value="[^"]+"', "csrf", html)
+    html = re.sub(r"\s+", " ", html)
+    return re.sub(r"> <", "><", html).strip()
+
+
+@skipUnless(settings.JINJA2_TEMPLATES, "Jinja2 templates are disabled")
+class JinjaEquivalenceTest(TestCase):
+    """The Jinja2 ports render the same pages as their Django templates."""
+
+    def setUp(self):
+        self.user = UserProfile.objects.create_user(
+            "alice", password="pass", first_name="Alice", **PROFILE
+        )
+        self.client.force_login(self.user)
+
+    def assertSameAsDjango(self, response):
+        # Form widgets are rendered by Django templates around the page.
+        contexts = response.context
+        if not isinstance(contexts, ContextList):
+            contexts = [contexts]
+        index, template = next(
+            (i, t)
+            for i, t in enumerate(response.templates)
+            if isinstance(t, jinja.Template)
+        )
+        context = dict(contexts[index])
+        django = engines["django"].get_template(template.name)
+        self.assertEqual(
+            normalize(response.content.decode()),
+            normalize(django.render(context, response.wsgi_request)),
+        )
+
+    def test_predict(self):
+        self.assertSameAsDjango(self.client.get(reverse("predict")))
+        self.assertSameAsDjango(
+            self.client.post(reverse("predict"), {**PREDICTION, "smoker": "Yes"})
+        )
+        self.assertSameAsDjango(self.client.post(reverse("predict"), {"age": -1}))
+        response = self.client.post(reverse("predict_result"), {"age": 30})
+        self.assertEqual(response.status_code, 400)
+        self.assertSameAsDjango(response)
+
+    def test_prediction_history(self):
+        url = reverse("prediction_history")
+        self.assertSameAsDjango(self.client.get(url))
+        now = timezone.now()
+        for i in range(12):
+            PredictionHistory.objects.create(
+                user=self.user,
+                predicted_charges=1000 + i * 333.333,
+                repeat_count=i % 3,
+                **{**PROFILE, "weight": 50 + i * 5},
+            )
+        PredictionHistory.objects.update(timestamp=now - timedelta(hours=5))
+        self.assertSameAsDjango(self.client.get(url))
+        self.assertSameAsDjango(self.client.get(url, {"page": 2}))
+        self.assertSameAsDjango(self.client.get(url, {"bmi_category": "obese"}))
+
+    def test_book_appointment(self):
+        url = reverse("book_appointment")
+        self.assertSameAsDjango(self.client.get(url))
+        today = timezone.now().date()
+        for days in (-10, -1, 0, 3, 30):
+            Appointment.objects.create(
+                user=self.user,
+                reason="Policy Inquiry",
+                date=today + timedelta(days=days),
+                time="10:00",
+            )
+        booking = {"reason": "Consultation", "date": today, "time": "09:00"}
+        self.client.post(url, booking)
+        self.assertSameAsDjango(self.client.get(url))  # With the message.
+        self.assertSameAsDjango(self.client.post(url, {"time": "09:00"}))
+        self.assertSameAsDjango(self.client.post(reverse("appointment_list"), booking))
+
+    def test_environment(self):
+        env = engines["jinja2"].env
+        self.assertIsNotNone(env.bytecode_cache)
+        template = env.from_string(
+            "{{ missing.attribute }}|{{ value|floatformat(2) }}|{{ 'x'|time_range|first }}"
+        )
+        self.assertEqual(template.render(value=1 / 3), "|0.33|09:00")
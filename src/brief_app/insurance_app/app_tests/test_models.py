@@ -8,6 +8,11 @@ from insurance_app.models import (
     ContactMessage,
     Availability,
     Appointment,
+    AgeCategory,
+    BmiCategory,
+    categorize_age,
+    categorize_bmi,
+    compute_bmi,
 )
 
 
@@ -136,6 +141,77 @@ class PredictionHistoryModelTest(TestCase):
         self.assertEqual(prediction.bmi, 24.7)  # another normal case
 
 
+class GeneratedColumnsTest(TestCase):
+    def setUp(self):
+        self.user = UserProfile.objects.create_user(
+            username="generated", password="testpass123", age=30, weight=70, height=175
+        )
+
+    def create_prediction(self, age, weight, height):
+        return PredictionHistory.objects.create(
+            user=self.user,
+            age=age,
+            weight=weight,
+            height=height,
+            num_children=0,
+            smoker="No",
+            region="Northeast",
+            sex="Male",
+            predicted_charges=1000,
+        )
+
+    def test_database_matches_python(self):
+        cases = [
+            (age, weight, height)
+            for age in (18, 19, 26, 36, 46, 70)
+            for weight in (0, 45, 60, 75, 90, 130)
+            for height in (0, 150, 175, 200)
+        ]
+        for case in cases:
+            self.create_prediction(*case)
+        rows = PredictionHistory.objects.values_list(
+            "age", "weight", "height", "bmi", "bmi_category", "age_category"
+        )
+        self.assertEqual(len(rows), len(cases))
+        for age, weight, height, bmi, bmi_category, age_category in rows:
+            expected = compute_bmi(weight, height)
+            self.assertEqual(bmi, expected)
+            self.assertEqual(bmi_category, categorize_bmi(expected))
+            self.assertEqual(age_category, categorize_age(age))
+
+    def test_categories_can_be_filtered_and_aggregated(self):
+        self.create_prediction(30, 50, 175)
+        self.create_prediction(40, 100, 175)
+        self.create_prediction(40, 110, 175)
+        summary = {
+            row["bmi_category"]: row["count"]
+            for row in PredictionHistory.objects.category_summary("bmi_category")
+        }
+        self.assertEqual(summary, {"under_weight": 1, "obese": 2})
+        self.assertEqual(
+            PredictionHistory.objects.filter(
+                age_category=AgeCategory.MID_ADULTHOOD
+            ).count(),
+            2,
+        )
+
+    def test_values_refresh_after_update(self):
+        self.assertEqual(self.user.bmi_category, BmiCategory.NORMAL_WEIGHT)
+        self.user.weight = 110
+        self.user.save()
+        with self.assertNumQueries(1):
+            self.assertEqual(self.user.bmi, 35.9)
+            self.assertEqual(self.user.bmi_category, BmiCategory.OBESE)
+            self.assertEqual(self.user.age_category, AgeCategory.EARLY_ADULTHOOD)
+
+    def test_unsaved_instance_uses_python(self):
+        user = UserProfile(age=20, weight=90, height=180)
+        with self.assertNumQueries(0):
+            self.assertEqual(user.bmi, 27.8)
+            self.assertEqual(user.bmi_category, BmiCategory.OVER_WEIGHT)
+            self.assertEqual(user.age_category, AgeCategory.YOUNG_ADULT)
+
+
 class JobApplicationModelTest(TestCase):
     def test_jobapplication_creation(self):
         application = JobApplication.objects.create(
@@ -0,0 +1,107 @@
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from insurance_app import prerender
+from insurance_app.prerender import PAGES
+from insurance_app.models import UserProfile
+
+
+class PrerenderedPagesTest(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        root = Path(self.tmp.name)
+        override = override_settings(
+            PRERENDER_DIR=root / "pages", STATIC_ROOT=root / "static"
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_pages_match_the_anonymous_dynamic_render(self):
+        dynamic = {name: self.client.get(reverse(name)).content for name in PAGES}
+        out = StringIO()
+        call_command("prerender_pages", stdout=out, stderr=StringIO())
+        self.assertIn(f"Pre-rendered {len(PAGES)} page(s)", out.getvalue())
+        for name in PAGES:
+            with self.subTest(name=name):
+                written = prerender.page_file(reverse(name))
+                self.assertEqual(written.read_bytes(), dynamic[name])
+                self.assertTrue(written.with_suffix(".html.gz").exists())
+
+    def test_partial_rebuild_keeps_the_other_pages(self):
+        prerender.build()
+        about = prerender.page_file(reverse("about"))
+        home = prerender.page_file(reverse("home"))
+        about.write_bytes(b"old")
+        home.write_bytes(b"kept")
+        stale = prerender.output_dir() / "retired" / "index.html"
+        stale.parent.mkdir()
+        stale.write_bytes(b"retired")
+
+        call_command("prerender_pages", page=["about"], stdout=StringIO())
+        self.assertEqual(about.read_bytes(), prerender.render_page("about"))
+        self.assertEqual(home.read_bytes(), b"kept")
+        for name in PAGES:
+            with self.subTest(name=name):
+                self.assertTrue(prerender.page_file(reverse(name)).exists())
+        self.assertTrue(stale.exists())
+
+        prerender.build()  # A full build drops pages no longer in PAGES.
+        self.assertFalse(stale.exists())
+        self.assertNotEqual(home.read_bytes(), b"kept")
+        self.assertEqual(
+            [path.name for path in prerender.output_dir().parent.iterdir()],
+            ["pages"],
+        )
+
+    def test_assets_are_linked_by_hashed_name(self):
+        template = Template(
+            "{% load static %}{% static 'css/styles.css' %} "
+            "{% static 'images/missing.svg' %}"
+        )
+        self.assertEqual(
+            template.render(Context()),
+            "/static/css/styles.css /static/images/missing.svg",
+        )
+        call_command("collectstatic", interactive=False, verbosity=0)
+        hashed, missing = template.render(Context()).split()
+        self.assertRegex(hashed, r"^/static/css/styles\.[0-9a-f]{12}\.css$")
+        self.assertEqual(missing, "/static/images/missing.svg")
+
+    def test_anonymous_visitors_get_the_file(self):
+        prerender.build()
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("about"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Cache-Control"], "max-age=3600, public")
+        self.assertIn("Cookie", response["Vary"])
+        self.assertEqual(response["X-Frame-Options"], "DENY")
+        self.assertNotIn("csrftoken", response.cookies)
+        body = b"".join(response.streaming_content)
+        self.assertEqual(body, prerender.page_file(reverse("about")).read_bytes())
+
+        response = self.client.get(
+            reverse("about"), HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_other_requests_are_rendered(self):
+        prerender.build(["welcome"])
+        user = UserProfile.objects.create_user("alice", password="pass")
+        self.client.force_login(user)
+        response = self.client.get(reverse("welcome"))
+        self.assertContains(response, "Welcome, alice!")
+        self.assertFalse(response.streaming)
+
+        self.client.logout()
+        self.assertFalse(self.client.get(reverse("home")).streaming)  # Not built.
+
+    def test_missing_pages_disable_the_middleware(self):
+        response = self.client.get(reverse("about"))
+        self.assertFalse(response.streaming)
@@ -0,0 +1,240 @@
+import pickle
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django.urls import reverse
+
+from insurance_app import pricing
+from insurance_app.models import PredictionHistory, UserProfile
+from insurance_app.views import PredictChargesView
+
+
+class FlatRateModel:
+    """Stand-in pricing model: a base rate, plus a surcharge for smokers."""
+
+    calls = 0
+
+    def __init__(self, rate):
+        self.rate = rate
+
+    def predict(self, features):
+        FlatRateModel.calls += 1
+        return [
+            self.rate + 500 * smoker + age
+            for smoker, age in zip(features["smoker"], features["age"])
+        ]
+
+
+PROFILE = {
+    "age": 30,
+    "weight": 70,
+    "height": 175,
+    "num_children": 0,
+    "smoker": "No",
+    "region": "Northeast",
+    "sex": "Male",
+}
+
+
+class PricingTestCase(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.use_model(rate=1000)
+        FlatRateModel.calls = 0
+
+    def use_model(self, rate):
+        path = Path(self.tmp.name) / f"model-{rate}.pkl"
+        path.write_bytes(pickle.dumps(FlatRateModel(rate)))
+        override = override_settings(PRICING_MODEL_PATH=path)
+        override.enable()
+        self.addCleanup(override.disable)
+        return pricing.load_model().version
+
+    def create_user(self, username="alice", **profile):
+        with self.captureOnCommitCallbacks(execute=True):
+            return UserProfile.objects.create_user(
+                username, password="pass", **{**PROFILE, **profile}
+            )
+
+
+class ModelLoadingTest(PricingTestCase):
+
+    def test_unreadable_model_is_logged(self):
+        path = Path(self.tmp.name) / "broken.pkl"
+        path.write_bytes(b"not a pickle")
+        with override_settings(PRICING_MODEL_PATH=path):
+            with self.assertLogs("insurance_app.pricing", "ERROR") as logs:
+                self.assertIsNone(pricing.load_model())
+        self.assertIn("broken.pkl", logs.output[0])
+
+    def test_predict_view_logs_a_missing_model(self):
+        path = Path(self.tmp.name) / "missing.pkl"
+        with override_settings(PRICING_MODEL_PATH=path):
+            with self.assertLogs("insurance_app.views", "ERROR") as logs:
+                self.assertIsNone(PredictChargesView().load_model())
+        self.assertIn("could not be loaded", logs.output[0])
+
+
+class LatestQuoteTest(PricingTestCase):
+
+    def test_quote_is_stored_once_the_profile_is_committed(self):
+        user = self.create_user()
+        user.refresh_from_db()
+        self.assertEqual(user.quoted_charges, Decimal("1030.00"))
+        self.assertEqual(user.quote_model_version, pricing.load_model().version)
+        self.assertEqual(FlatRateModel.calls, 1)
+
+    def test_only_pricing_changes_requote(self):
+        user = self.create_user()
+        with self.captureOnCommitCallbacks(execute=True):
+            user.first_name = "Alice"
+            user.save()
+        self.assertEqual(FlatRateModel.calls, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            user.smoker = "Yes"
+            user.save()
+        user.refresh_from_db()
+        self.assertEqual(user.quoted_charges, Decimal("1530.00"))
+        self.assertEqual(FlatRateModel.calls, 2)
+
+    def test_late_refresh_does_not_overwrite_newer_inputs(self):
+        user = self.create_user()
+        stale = UserProfile.objects.get(pk=user.pk)
+        UserProfile.objects.filter(pk=user.pk).update(age=50)
+        stale.smoker = "Yes"
+        pricing.refresh_quote(stale)
+        user.refresh_from_db()
+        self.assertEqual(user.quoted_charges, Decimal("1030.00"))
+
+    def test_unpriceable_profile_has_no_quote(self):
+        user = self.create_user(smoker="")
+        user.refresh_from_db()
+        self.assertIsNone(user.quoted_charges)
+        self.assertTrue(pricing.quote_is_current(user, pricing.load_model()))
+        self.assertEqual(FlatRateModel.calls, 0)
+
+    def test_pages_show_the_quote_without_inference(self):
+        user = self.create_user()
+        self.client.force_login(user)
+        FlatRateModel.calls = 0
+        for name in ("welcome", "profile"):
+            with self.subTest(name=name):
+                response = self.client.get(reverse(name))
+                self.assertContains(response, "Current premium")
+                self.assertContains(response, "$1030.00")
+        self.assertEqual(FlatRateModel.calls, 0)
+
+    def test_predict_view_reuses_the_quote_of_unchanged_inputs(self):
+        user = self.create_user()
+        self.client.force_login(user)
+        data = {key: PROFILE[key] for key in ("age", "weight", "height")}
+        data.update(num_children=0, smoker="No")
+        FlatRateModel.calls = 0
+        response = self.client.post(reverse("predict"), data)
+        self.assertEqual(response.context["predicted_charges"], Decimal("1030.00"))
+        self.assertEqual(FlatRateModel.calls, 0)
+
+        data["age"] = 40
+        response = self.client.post(reverse("predict"), data)
+        self.assertEqual(response.context["predicted_charges"], Decimal("1040.00"))
+        self.assertEqual(FlatRateModel.calls, 1)
+
+    def test_rollout_requotes_stale_profiles_in_batches(self):
+        for name in ("a", "b", "c"):
+            self.create_user(name)
+        self.create_user("unpriced", smoker="")
+        version = self.use_model(rate=2000)
+        FlatRateModel.calls = 0
+
+        out = StringIO()
+        call_command("refresh_quotes", "--batch-size", "2", stdout=out)
+        self.assertIn(f"4 profile(s) quoted with model {version}", out.getvalue())
+        self.assertEqual(FlatRateModel.calls, 2)  # One call per batch.
+        quotes = dict(UserProfile.objects.values_list("username", "quoted_charges"))
+        self.assertEqual(
+            quotes,
+            {
+                "a": Decimal("2030.00"),
+                "b": Decimal("2030.00"),
+                "c": Decimal("2030.00"),
+                "unpriced": None,
+            },
+        )
+
+        call_command("refresh_quotes", stdout=out)
+        self.assertIn("0 profile(s) quoted", out.getvalue())
+        call_command("refresh_quotes", "--all", stdout=out)
+        self.assertIn("4 profile(s) quoted", out.getvalue())
+
+
+class RepeatedPredictionTest(PricingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user()
+        self.client.force_login(self.user)
+        self.data = {key: PROFILE[key] for key in ("age", "weight", "height")}
+        self.data.update(num_children=0, smoker="No")
+
+    def predict(self, **changes):
+        response = self.client.post(reverse("predict"), {**self.data, **changes})
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_repeat_bumps_the_logged_prediction(self):
+        self.predict()
+        response = self.predict()
+        self.assertEqual(response.context["predicted_charges"], Decimal("1030.00"))
+        prediction = PredictionHistory.objects.get()
+        self.assertEqual(prediction.repeat_count, 1)
+        self.assertEqual(
+            prediction.inputs_hash,
+            pricing.submission_digest(PROFILE, pricing.load_model().version),
+        )
+
+        response = self.client.get(reverse("prediction_history"))
+        self.assertContains(response, "&times;2")
+
+    def test_new_inputs_or_model_are_logged(self):
+        self.predict()
+        self.predict(age=40)
+        self.use_model(rate=2000)
+        self.predict(age=40)
+        charges = PredictionHistory.objects.order_by("pk").values_list(
+            "predicted_charges", "repeat_count"
+        )
+        self.assertEqual(
+            list(charges),
+            [(Decimal("1030.00"), 0), (Decimal("1040.00"), 0), (Decimal("2040.00"), 0)],
+        )
+
+    def test_repeat_after_the_window_is_logged(self):
+        first = pricing.record_prediction(self.user)
+        PredictionHistory.objects.filter(pk=first.pk).update(
+            timestamp=timezone.now() - timedelta(hours=2)
+        )
+        second = pricing.record_prediction(self.user)
+        self.assertNotEqual(second.pk, first.pk)
+        with override_settings(PREDICTION_REPEAT_WINDOW=0):
+            pricing.record_prediction(self.user)
+        self.assertEqual(PredictionHistory.objects.count(), 3)
+
+    def test_duplicate_check_is_one_index_probe(self):
+        pricing.record_prediction(self.user)
+        with self.assertNumQueries(2):  # probe, then bump
+            pricing.record_prediction(self.user)
+        plan = str(
+            PredictionHistory.objects.filter(
+                user=self.user, inputs_hash="x", timestamp__gte=timezone.now()
+            )
+            .order_by("-timestamp")
+            .explain()
+        )
+        self.assertIn("insurance_a_user_id_f901c6_idx", plan)
@@ -0,0 +1,163 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from insurance_app import query_budget
+from insurance_app.models import (
+    Availability,
+    ContactMessage,
+    Job,
+    PredictionHistory,
+    UserProfile,
+)
+from insurance_app.urls import urlpatterns
+
+PROFILE = {
+    "age": 30,
+    "weight": 70,
+    "height": 175,
+    "num_children": 0,
+    "smoker": "No",
+    "region": "Northeast",
+    "sex": "Male",
+}
+
+# The job listings of the Join Us page are cached; these tests need its query.
+NO_CACHE = {
+    alias: {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+    for alias in ("default", "local")
+}
+
+
+class QueryBudgetTest(TestCase):
+    def setUp(self):
+        self.user = UserProfile.objects.create_user(
+            username="user", password="password123", email="u@example.com", **PROFILE
+        )
+        self.staff = UserProfile.objects.create_user(
+            username="staff", password="pass", is_staff=True
+        )
+        for charges in (1000, 2000, 3000):
+            PredictionHistory.objects.create(
+                user=self.user, predicted_charges=charges, **PROFILE
+            )
+        Job.objects.create(title="Analyst")
+        self.message = ContactMessage.objects.create(
+            name="X", email="x@example.com", message="hi"
+        )
+        self.day = timezone.localdate() + timedelta(days=3)
+        Availability.objects.create(date=self.day, time_slots=["10:00", "11:00"])
+        query_budget.clear_slow_queries()
+
+    def test_every_route_has_a_budget(self):
+        names = {pattern.name for pattern in urlpatterns}
+        self.assertEqual(names - set(query_budget.BUDGETS), set())
+
+    def test_routes_stay_within_budget(self):
+        # QUERY_BUDGET_STRICT is on under test: any request over its budget
+        # raises QueryBudgetExceeded out of the test client.
+        anonymous = [
+            "home",
+            "signup",
+            "login",
+            "welcome",
+            "about",
+            "join_us",
+            "contact",
+            "contact_form",
+            "apply_thank_you",
+            "health_advices",
+            "cybersecurity_awareness",
+            "password_reset",
+            "password_reset_done",
+            "password_reset_complete",
+            "testing",
+        ]
+        for name in anonymous:
+            with self.subTest(name):
+                response = self.client.get(reverse(name))
+                self.assertIn("Server-Timing", response)
+        self.client.get(reverse("password_reset_confirm", args=["MQ", "bad-token"]))
+        self.client.get(reverse("get_available_times"), {"date": self.day})
+        self.client.post(reverse("password_reset"), {"email": "u@example.com"})
+        self.client.post(
+            reverse("login"), {"username": "user", "password": "password123"}
+        )
+
+        for name in (
+            "profile",
+            "predict",
+            "prediction_history",
+            "book_appointment",
+            "changepassword",
+        ):
+            with self.subTest(name):
+                self.assertEqual(self.client.get(reverse(name)).status_code, 200)
+        self.client.get(reverse("prediction_history"), {"bmi_category": "obese"})
+        self.client.post(
+            reverse("book_appointment"),
+            {"date": self.day, "time": "10:00", "reason": "Consultation"},
+        )
+        self.client.post(
+            reverse("changepassword"),
+            {
+                "old_password": "password123",
+                "new_password1": "new_complex_password123",
+                "new_password2": "new_complex_password123",
+            },
+        )
+        self.client.post(reverse("logout_user"))
+
+        self.client.force_login(self.staff)
+        for name in ("messages_list", "portfolio_analytics", "query_log"):
+            with self.subTest(name):
+                self.assertEqual(self.client.get(reverse(name)).status_code, 200)
+        self.client.post(reverse("solve_message", args=[self.message.pk]))
+
+    def test_history_summary_comes_from_one_query(self):
+        self.client.force_login(self.user)
+        # session + user, category summary, paginator count, page
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse("prediction_history"))
+        self.assertEqual(response.context["total_predictions"], 3)
+        self.assertEqual(response.context["average_charges"], 2000)
+        self.assertEqual(response.context["paginator"].count, 3)
+
+    @patch.dict(query_budget.BUDGETS, {"join_us": query_budget.Budget(0)})
+    @override_settings(CACHES=NO_CACHE)
+    def test_over_budget_raises_in_strict_mode_and_warns_otherwise(self):
+        with self.assertRaisesMessage(
+            query_budget.QueryBudgetExceeded, "join_us (/join-us/) ran 1 queries"
+        ):
+            self.client.get(reverse("join_us"))
+
+        with override_settings(QUERY_BUDGET_STRICT=False):
+            with self.assertLogs("insurance_app.query_budget", "WARNING") as logs:
+                response = self.client.get(reverse("join_us"))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("budget is 0", logs.output[0])
+
+    @override_settings(SLOW_QUERY_MS=0, SLOW_QUERY_LOG_SIZE=2, CACHES=NO_CACHE)
+    def test_slow_queries_are_explained_into_a_ring_buffer(self):
+        url = reverse("query_log")
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.client.logout()
+        query_budget.clear_slow_queries()
+
+        self.client.get(reverse("join_us"))
+        captured = query_budget.slow_queries()
+        self.assertEqual(len(captured), 1)
+        self.assertEqual(captured[0].view, "join_us")
+        self.assertIn("insurance_app_job", captured[0].sql)
+        self.assertIn("SCAN", captured[0].plan)
+
+        for _ in range(3):
+            self.client.get(reverse("join_us"))
+        self.assertEqual(len(query_budget.slow_queries()), 2)
+
+        self.client.force_login(self.staff)
+        self.assertContains(self.client.get(url), "insurance_app_job")
@@ -0,0 +1,99 @@
+from datetime import date, timedelta
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from insurance_app import synthetic
+from insurance_app.models import Appointment, ContactMessage, UserProfile
+from insurance_app.query_budget import explain
+
+
+def index_name(model, fields):
+    return next(index.name for index in model._meta.indexes if index.fields == fields)
+
+
+@skipUnless(connection.vendor == "sqlite", "plans are SQLite EXPLAIN QUERY PLAN")
+class HotQueryPlanTest(TestCase):
+    """Each hot query shape is answered from an index, not a table scan."""
+
+    @classmethod
+    def setUpTestData(cls):
+        synthetic.generate(
+            users=200,
+            messages=200,
+            availability_days=0,
+            distributions=synthetic.Distributions(
+                predictions_per_user=0, appointments_per_user=3
+            ),
+        )
+        cls.user = UserProfile.objects.order_by("pk").first()
+        cls.staff = UserProfile.objects.create_superuser("admin", password="pass")
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def plans(self, queries, table):
+        """Plans of the captured queries that read `table`."""
+        return [
+            explain(connection, query["sql"], None)
+            for query in queries
+            if query["sql"].startswith("SELECT") and f'FROM "{table}"' in query["sql"]
+        ]
+
+    def assertUsesIndex(self, plan, name):
+        self.assertRegex(plan, rf"USING (COVERING )?INDEX {name}\b")
+
+    def test_book_appointment_lists_by_user_and_date(self):
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("book_appointment"))
+
+        plans = self.plans(queries, "insurance_app_appointment")
+        self.assertEqual(len(plans), 2)  # upcoming and past
+        for plan in plans:
+            self.assertUsesIndex(plan, index_name(Appointment, ["user", "date"]))
+            self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_admin_date_hierarchy_and_username_search(self):
+        self.client.force_login(self.staff)
+        url = reverse("admin:insurance_app_appointment_changelist")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {"q": self.user.username[:-1]})
+        self.assertEqual(response.status_code, 200)
+
+        plans = "\n".join(self.plans(queries, "insurance_app_appointment"))
+        self.assertIn("insurance_app_userprofile_username_ci", plans)
+        self.assertUsesIndex(plans, index_name(Appointment, ["user", "date"]))
+
+        with CaptureQueriesContext(connection) as queries:
+            year = date.today().year
+            self.client.get(url, {"date__year": year})
+        plans = self.plans(queries, "insurance_app_appointment")
+        self.assertTrue(plans)
+        for plan in plans:
+            self.assertUsesIndex(plan, index_name(Appointment, ["date"]))
+
+    def test_messages_listed_newest_first_from_index(self):
+        self.client.force_login(self.staff)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("messages_list"))
+
+        (plan,) = self.plans(queries, "insurance_app_contactmessage")
+        self.assertUsesIndex(plan, index_name(ContactMessage, ["-submitted_at"]))
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_search_matches_username_prefix_only(self):
+        Appointment.objects.create(
+            user=self.staff,
+            reason="Consultation",
+            date=date.today() + timedelta(days=1),
+            time="10:00",
+        )
+        self.client.force_login(self.staff)
+        url = reverse("admin:insurance_app_appointment_changelist")
+        response = self.client.get(url, {"q": "ADM"})
+        self.assertEqual(response.context["cl"].result_count, 1)
+        response = self.client.get(url, {"q": "dmin"})
+        self.assertEqual(response.context["cl"].result_count, 0)
@@ -0,0 +1,72 @@
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from insurance_app import routers
+from insurance_app.middleware import ReplicaStickinessMiddleware
+from insurance_app.models import PredictionHistory
+
+router = routers.PrimaryReplicaRouter()
+
+
+@override_settings(DATABASE_REPLICAS=["replica_1", "replica_2"])
+class PrimaryReplicaRouterTest(SimpleTestCase):
+    def test_reads_go_to_replicas(self):
+        with routers.request_context():
+            self.assertIn(
+                router.db_for_read(PredictionHistory), {"replica_1", "replica_2"}
+            )
+
+    def test_writes_go_to_primary_and_pin_reads(self):
+        with routers.request_context():
+            self.assertEqual(router.db_for_write(PredictionHistory), "default")
+            self.assertEqual(router.db_for_read(PredictionHistory), "default")
+            self.assertTrue(routers.wrote_to_primary())
+
+    def test_pinned_request_reads_primary(self):
+        with routers.request_context(pinned=True):
+            self.assertEqual(router.db_for_read(PredictionHistory), "default")
+
+    def test_use_primary_is_scoped(self):
+        with routers.request_context():
+            with routers.use_primary():
+                self.assertEqual(router.db_for_read(PredictionHistory), "default")
+            self.assertNotEqual(router.db_for_read(PredictionHistory), "default")
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_everything_uses_primary(self):
+        with routers.request_context():
+            self.assertEqual(router.db_for_read(PredictionHistory), "default")
+
+
+@override_settings(DATABASE_REPLICAS=["replica_1"], DATABASE_REPLICA_STICKY_SECONDS=10)
+class ReplicaStickinessMiddlewareTest(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.read_from = None
+
+    def reading_view(self, request):
+        self.read_from = router.db_for_read(PredictionHistory)
+        return HttpResponse()
+
+    def writing_view(self, request):
+        router.db_for_write(PredictionHistory)
+        return HttpResponse()
+
+    def test_write_sets_sticky_cookie(self):
+        middleware = ReplicaStickinessMiddleware(self.writing_view)
+        response = middleware(self.factory.post("/predict-charges/"))
+        cookie = response.cookies[ReplicaStickinessMiddleware.cookie_name]
+        self.assertEqual(cookie["max-age"], 10)
+
+    def test_read_only_request_uses_replica_without_cookie(self):
+        middleware = ReplicaStickinessMiddleware(self.reading_view)
+        response = middleware(self.factory.get("/prediction-history/"))
+        self.assertEqual(self.read_from, "replica_1")
+        self.assertNotIn(ReplicaStickinessMiddleware.cookie_name, response.cookies)
+
+    def test_sticky_cookie_keeps_reads_on_primary(self):
+        middleware = ReplicaStickinessMiddleware(self.reading_view)
+        request = self.factory.get("/prediction-history/")
+        request.COOKIES[ReplicaStickinessMiddleware.cookie_name] = "1"
+        middleware(request)
+        self.assertEqual(self.read_from, "default")
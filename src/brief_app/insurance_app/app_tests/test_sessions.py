@@ -0,0 +1,182 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.sessions.models import Session
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from insurance_app.models import UserProfile
+from insurance_app.sessions import db
+
+PROFILE = {
+    "age": 30,
+    "weight": 70,
+    "height": 175,
+    "num_children": 0,
+    "smoker": "No",
+    "region": "Northeast",
+    "sex": "Male",
+}
+
+
+def session_writes(captured) -> list[str]:
+    return [
+        query["sql"]
+        for query in captured
+        if "django_session" in query["sql"] and not query["sql"].startswith("SELECT")
+    ]
+
+
+class WriteCoalescingTest(TestCase):
+
+    def assertWrites(self, count, save):
+        with CaptureQueriesContext(connection) as captured:
+            save()
+        self.assertEqual(len(session_writes(captured)), count)
+
+    def setUp(self):
+        self.session = db.SessionStore()
+        self.session["cart"] = [1, 2]
+        self.session.set_expiry(600)
+        self.session.save()
+
+    def reload(self):
+        return db.SessionStore(self.session.session_key)
+
+    def test_unchanged_session_is_not_written(self):
+        session = self.reload()
+        session["cart"] = [1, 2]
+        session.set_expiry(600)
+        self.assertWrites(0, session.save)
+
+    def test_changed_session_is_written(self):
+        session = self.reload()
+        session["cart"] = [1, 2, 3]
+        session.save()
+        self.assertEqual(self.reload()["cart"], [1, 2, 3])
+        session.set_expiry(1200)
+        self.assertWrites(1, session.save)
+        self.assertEqual(self.reload().get_expiry_age(), 1200)
+
+    def test_cycled_key_is_inserted_by_the_save(self):
+        old_key = self.session.session_key
+        self.assertWrites(1, self.session.cycle_key)  # The old row's deletion.
+        self.assertFalse(Session.objects.filter(pk=old_key).exists())
+        self.assertFalse(self.session.exists(self.session.session_key))
+        self.session["user"] = "1"
+        self.assertWrites(1, self.session.save)
+        self.assertEqual(self.reload()["cart"], [1, 2])
+        self.assertEqual(self.reload()["user"], "1")
+
+    @override_settings(SESSION_SAVE_EVERY_REQUEST=True)
+    def test_save_every_request(self):
+        session = self.reload()
+        session.load()
+        self.assertWrites(1, session.save)
+
+
+class LoginSessionTest(TestCase):
+
+    def setUp(self):
+        UserProfile.objects.create_user("alice", password="Secret-pass-1", **PROFILE)
+
+    def login(self, **data):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.post(
+                reverse("login"),
+                {"username": "alice", "password": "Secret-pass-1", **data},
+            )
+        writes = session_writes(captured)  # Before the redirect resets the log.
+        self.assertRedirects(response, reverse("welcome"))
+        return writes
+
+    def test_login_writes_the_session_once(self):
+        writes = self.login(remember_me="on")
+        self.assertEqual(len(writes), 1)
+        self.assertTrue(writes[0].startswith("INSERT"))
+        self.assertEqual(self.client.session.get_expiry_age(), 1209600)
+        self.assertFalse(self.client.session.get_expire_at_browser_close())
+
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(reverse("welcome"))
+        self.assertContains(response, "Welcome, alice!")
+        self.assertEqual(session_writes(captured), [])
+
+    def test_session_without_remember_me_ends_with_the_browser(self):
+        self.login()
+        self.assertTrue(self.client.session.get_expire_at_browser_close())
+
+    def test_logout_deletes_the_session(self):
+        self.login()
+        key = self.client.session.session_key
+        self.client.post(reverse("logout_user"))
+        self.assertFalse(Session.objects.filter(pk=key).exists())
+        response = self.client.get(reverse("profile"))
+        self.assertEqual(response.status_code, 302)
+
+    @override_settings(SESSION_ENGINE="insurance_app.sessions.cached_db")
+    def test_cached_sessions_are_read_from_the_cache(self):
+        caches["default"].clear()
+        self.login()
+        with self.assertNumQueries(1):  # The user.
+            response = self.client.get(reverse("welcome"))
+        self.assertContains(response, "Welcome, alice!")
+
+        key = self.client.session.session_key
+        self.client.post(reverse("logout_user"))
+        self.assertFalse(Session.objects.filter(pk=key).exists())
+        self.assertFalse(self.client.session.exists(key))
+
+    @override_settings(SESSION_ENGINE="django.contrib.sessions.backends.signed_cookies")
+    def test_signed_cookie_sessions(self):
+        self.assertEqual(self.login(remember_me="on"), [])
+        with self.assertNumQueries(1):  # The user.
+            response = self.client.get(reverse("welcome"))
+        self.assertContains(response, "Welcome, alice!")
+
+
+class PurgeSessionsTest(TestCase):
+
+    def setUp(self):
+        now = timezone.now()
+        for i in range(5):
+            Session.objects.create(
+                session_key=f"expired{i:025d}",
+                session_data="",
+                expire_date=now - timedelta(minutes=i + 1),
+            )
+        Session.objects.create(
+            session_key="live" + "0" * 28,
+            session_data="",
+            expire_date=now + timedelta(days=1),
+        )
+
+    def purge(self, **options):
+        out = StringIO()
+        call_command("purge_sessions", pause=0, stdout=out, **options)
+        return out.getvalue()
+
+    def test_expired_sessions_are_deleted_in_batches(self):
+        with CaptureQueriesContext(connection) as captured:
+            output = self.purge(batch_size=2)
+        self.assertIn("5 expired sessions deleted", output)
+        self.assertEqual(len(session_writes(captured)), 3)
+        self.assertEqual(
+            list(Session.objects.values_list("pk", flat=True)), ["live" + "0" * 28]
+        )
+
+    def test_max_rows(self):
+        self.assertIn(
+            "3 expired sessions deleted", self.purge(batch_size=2, max_rows=3)
+        )
+        self.assertIn("2 expired sessions deleted", self.purge())
+        self.assertEqual(Session.objects.count(), 1)
+
+    def test_clearsessions(self):
+        call_command("clearsessions")
+        self.assertEqual(Session.objects.count(), 1)
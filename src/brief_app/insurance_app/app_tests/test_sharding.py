@@ -0,0 +1,107 @@
+"""Sharding tests.
+
+The routing tests always run. The end-to-end tests need real shard databases,
+e.g. two local SQLite files:
+
+    PREDICTION_SHARD_URLS=sqlite:////tmp/shard0.sqlite3,sqlite:////tmp/shard1.sqlite3 \\
+        python manage.py test insurance_app.app_tests.test_sharding
+"""
+
+from collections import Counter
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.conf import settings
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+
+from insurance_app import sharding
+from insurance_app.models import PredictionHistory, UserProfile
+from insurance_app.routers import PredictionShardRouter
+
+SHARDS = ["shard_0", "shard_1", "shard_2"]
+router = PredictionShardRouter()
+
+
+@override_settings(PREDICTION_SHARDS=SHARDS)
+class ShardRoutingTest(SimpleTestCase):
+    def test_shard_is_stable_and_spread(self):
+        self.assertEqual(sharding.shard_for_user(42), sharding.shard_for_user(42))
+        counts = Counter(sharding.shard_for_user(user_id) for user_id in range(3000))
+        self.assertEqual(set(counts), set(SHARDS))
+        self.assertTrue(all(800 < count < 1200 for count in counts.values()))
+
+    def test_router_uses_user_of_instance(self):
+        user = UserProfile(pk=7)
+        prediction = PredictionHistory(user_id=7)
+        expected = sharding.shard_for_user(7)
+        self.assertEqual(
+            router.db_for_write(PredictionHistory, instance=user), expected
+        )
+        self.assertEqual(
+            router.db_for_write(PredictionHistory, instance=prediction), expected
+        )
+        self.assertEqual(router.db_for_read(PredictionHistory, instance=user), expected)
+
+    def test_router_ignores_other_models_and_unhinted_queries(self):
+        self.assertIsNone(router.db_for_read(UserProfile, instance=UserProfile(pk=7)))
+        self.assertIsNone(router.db_for_read(PredictionHistory))
+
+    def test_for_user_targets_shard(self):
+        user = UserProfile(pk=7)
+        queryset = PredictionHistory.objects.for_user(user)
+        self.assertEqual(queryset.db, sharding.shard_for_user(7))
+
+    @override_settings(PREDICTION_SHARDS=[])
+    def test_disabled_sharding(self):
+        self.assertIsNone(sharding.shard_for_user(7))
+        self.assertEqual(sharding.history_aliases(), ["default"])
+
+
+@skipUnless(settings.PREDICTION_SHARDS, "PREDICTION_SHARD_URLS not configured")
+class ShardedPredictionHistoryTest(TransactionTestCase):
+    databases = "__all__"
+
+    def create_prediction(self, user, charges):
+        return PredictionHistory.objects.create(
+            user=user,
+            age=30,
+            weight=70,
+            height=175,
+            num_children=0,
+            smoker="No",
+            region="Northeast",
+            sex="Male",
+            predicted_charges=charges,
+        )
+
+    def setUp(self):
+        self.users = [
+            UserProfile.objects.create_user(username=f"user{i}", password="pass")
+            for i in range(8)
+        ]
+        for user in self.users:
+            self.create_prediction(user, 100)
+            self.create_prediction(user, 300)
+
+    def test_rows_live_on_the_user_shard_only(self):
+        for user in self.users:
+            shard = sharding.shard_for_user(user.pk)
+            for alias in settings.PREDICTION_SHARDS:
+                count = PredictionHistory.objects.using(alias).filter(user=user).count()
+                self.assertEqual(count, 2 if alias == shard else 0)
+            self.assertEqual(PredictionHistory.objects.for_user(user).count(), 2)
+            self.assertEqual(user.insurance_predictions.count(), 2)
+
+    def test_stats_fan_out_and_merge(self):
+        stats = sharding.prediction_stats()
+        self.assertEqual(stats["count"], 16)
+        self.assertEqual(stats["total"], Decimal("3200"))
+        self.assertEqual(stats["average"], Decimal("200"))
+
+    def test_deleting_user_clears_their_shard(self):
+        user = self.users[0]
+        shard = sharding.shard_for_user(user.pk)
+        user.delete()
+        self.assertEqual(
+            PredictionHistory.objects.using(shard).filter(user_id=user.pk).count(), 0
+        )
@@ -0,0 +1,123 @@
+import json
+import tempfile
+from datetime import datetime, timezone as dt_timezone
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from insurance_app import synthetic
+from insurance_app.models import (
+    Appointment,
+    Availability,
+    ContactMessage,
+    PredictionHistory,
+    UserProfile,
+)
+
+NOW = datetime(2025, 3, 1, 12, tzinfo=dt_timezone.utc)
+
+
+class SyntheticDataTest(TestCase):
+    def snapshot(self):
+        return (
+            list(
+                UserProfile.objects.order_by("pk").values_list(
+                    "username", "age", "weight", "height", "smoker", "bmi_category"
+                )
+            ),
+            list(
+                PredictionHistory.objects.order_by("pk").values_list(
+                    "user__username", "timestamp", "predicted_charges", "bmi"
+                )
+            ),
+            list(Appointment.objects.order_by("pk").values_list("date", "time")),
+        )
+
+    def test_counts_and_generated_columns(self):
+        counts = synthetic.generate(
+            users=50, messages=7, availability_days=10, batch_size=20, now=NOW
+        )
+
+        self.assertEqual(counts["UserProfile"], UserProfile.objects.count())
+        self.assertEqual(counts["UserProfile"], 50)
+        self.assertEqual(counts["PredictionHistory"], PredictionHistory.objects.count())
+        self.assertEqual(counts["Appointment"], Appointment.objects.count())
+        self.assertEqual(ContactMessage.objects.count(), 7)
+        self.assertEqual(Availability.objects.count(), 10)
+        # Stored columns are computed by the database for the explicit rows.
+        prediction = PredictionHistory.objects.select_related("user").first()
+        self.assertTrue(prediction.bmi > 0)
+        self.assertEqual(prediction.age_category, prediction.user.age_category)
+        self.assertTrue(prediction.timestamp <= NOW)
+        # One password hash, shared and usable.
+        user = UserProfile.objects.first()
+        self.assertTrue(user.check_password(synthetic.DEFAULT_PASSWORD))
+        self.assertEqual(UserProfile.objects.values("password").distinct().count(), 1)
+
+    def test_same_seed_same_rows(self):
+        synthetic.generate(users=30, messages=0, availability_days=0, now=NOW)
+        first = self.snapshot()
+        for model in (PredictionHistory, Appointment, UserProfile):
+            model.objects.all().delete()
+        # Ids continue from the highest one, so compare everything but them.
+        synthetic.generate(users=30, messages=0, availability_days=0, now=NOW)
+        second = self.snapshot()
+
+        def strip(rows):
+            return [row[1:] for row in rows]
+
+        self.assertEqual(strip(first[0]), strip(second[0]))
+        self.assertEqual(strip(first[1]), strip(second[1]))
+        self.assertEqual(first[2], second[2])
+
+        synthetic.generate(users=30, messages=0, availability_days=0, seed=1)
+        self.assertNotEqual(strip(self.snapshot()[0][30:]), strip(first[0]))
+
+    def test_distributions_and_existing_availability(self):
+        Availability.objects.create(date=NOW.date(), time_slots=["09:00"])
+        distributions = synthetic.Distributions(
+            predictions_per_user=0, appointments_per_user=0, smoker_rate=1
+        )
+        counts = synthetic.generate(
+            users=20,
+            messages=0,
+            availability_days=3,
+            distributions=distributions,
+            now=NOW,
+        )
+
+        self.assertNotIn("PredictionHistory", counts)
+        self.assertEqual(
+            set(UserProfile.objects.values_list("smoker", flat=True)), {"Yes"}
+        )
+        self.assertEqual(
+            Availability.objects.get(date=NOW.date()).time_slots, ["09:00"]
+        )
+        self.assertEqual(Availability.objects.count(), 3)
+
+    def test_command(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".json") as config:
+            json.dump({"predictions_per_user": 2, "male_rate": 1}, config)
+            config.flush()
+            out = StringIO()
+            call_command(
+                "seed_synthetic",
+                "--users=10",
+                "--messages=2",
+                "--availability-days=0",
+                f"--config={config.name}",
+                "--smoker-rate=0",
+                stdout=out,
+            )
+
+        self.assertIn("UserProfile: 10 rows", out.getvalue())
+        self.assertEqual(
+            set(UserProfile.objects.values_list("smoker", "sex")), {("No", "Male")}
+        )
+
+        with tempfile.NamedTemporaryFile("w", suffix=".json") as config:
+            json.dump({"unknown": 1}, config)
+            config.flush()
+            with self.assertRaises(CommandError):
+                call_command("seed_synthetic", f"--config={config.name}")
@@ -56,7 +56,7 @@ class SimpleTemplateViewsTest(TestCase):
         self.assertEqual(resp.status_code, 200)
         self.assertTemplateUsed(resp, "insurance_app/join_us.html")
         self.assertIn("jobs", resp.context)
-        self.assertEqual(resp.context["jobs"].count(), 2)
+        self.assertEqual(len(resp.context["jobs"]), 2)
 
     def test_health_and_cybersecurity_views(self):
         """Test multiple views related to health and cybersecurity.
@@ -336,6 +336,36 @@ class PredictionViewsTest(TestCase):
         self.assertEqual(resp.status_code, 200)
         self.assertTemplateUsed(resp, "insurance_app/predict.html")  # Adjusted template
 
+    def test_predict_result_fragment(self):
+        """The fragment endpoint answers with the result area only."""
+        prediction_data = {
+            "age": 35,
+            "height": 180,
+            "weight": 75,
+            "num_children": 1,
+            "smoker": "No",
+        }
+        full = self.client.post(reverse("predict"), prediction_data)
+        resp = self.client.post(reverse("predict_result"), prediction_data)
+        self.assertEqual(resp.status_code, 200)
+        self.assertTemplateUsed(resp, "insurance_app/includes/prediction_result.html")
+        self.assertTemplateNotUsed(resp, "insurance_app/base_final.html")
+        self.assertContains(resp, "Your Insurance Estimate")
+        self.assertLess(len(resp.content), len(full.content) / 5)
+        self.assertEqual(
+            PredictionHistory.objects.get(user=self.user).repeat_count, 1
+        )  # Same submission as the full page.
+
+        self.assertEqual(self.client.get(reverse("predict_result")).status_code, 405)
+
+    def test_predict_result_fragment_errors(self):
+        """Invalid submissions return the errors as a fragment, without messages."""
+        resp = self.client.post(reverse("predict_result"), {"age": 35})
+        self.assertEqual(resp.status_code, 400)
+        self.assertContains(resp, "Height: This field is required.", status_code=400)
+        resp = self.client.get(reverse("predict"))
+        self.assertEqual(list(resp.context["messages"]), [])
+
     def test_prediction_history_view_with_data(self):
         """Test the prediction history view with existing predictions."""
         predictions = [
@@ -361,6 +391,31 @@ class PredictionViewsTest(TestCase):
             transform=lambda x: x,
         )
 
+    def test_prediction_history_filters_by_bmi_category(self):
+        """The history can be narrowed to one BMI category, computed in SQL."""
+        for weight in (50, 70, 100):
+            PredictionHistory.objects.create(
+                user=self.user,
+                age=30,
+                weight=weight,
+                height=175,
+                num_children=0,
+                smoker="No",
+                region="northeast",
+                sex="male",
+                predicted_charges=weight * 100,
+            )
+
+        resp = self.client.get(
+            reverse("prediction_history"), {"bmi_category": "normal_weight"}
+        )
+        self.assertEqual([p.weight for p in resp.context["predictions"]], [70])
+        self.assertEqual(resp.context["total_predictions"], 3)
+        breakdown = {
+            row["bmi_category"]: row["count"] for row in resp.context["bmi_breakdown"]
+        }
+        self.assertEqual(breakdown, {"normal_weight": 1, "obese": 1, "under_weight": 1})
+
     @patch("insurance_app.views.predict_charges")
     def test_predict_charges_api(self, mock_predict):
         """Test the predict charges API endpoint."""
@@ -486,6 +541,31 @@ class AppointmentViewsTest(TestCase):
         messages = list(resp.context["messages"])
         self.assertTrue(any("successfully" in str(m) for m in messages))
 
+    def test_appointment_list_fragment(self):
+        """Booking through the fragment endpoint returns the updated lists."""
+        resp = self.client.post(
+            reverse("appointment_list"),
+            {"date": self.available_date, "time": "10:00", "reason": "Consultation"},
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertTemplateUsed(resp, "insurance_app/includes/appointment_lists.html")
+        self.assertTemplateNotUsed(resp, "insurance_app/book_appointment.html")
+        self.assertContains(resp, "booked successfully")
+        self.assertContains(resp, "Jan. 15, 2050")
+        self.assertEqual(Appointment.objects.filter(user=self.user).count(), 1)
+        # No flash message is left for the next page.
+        resp = self.client.get(reverse("book_appointment"))
+        self.assertEqual(list(resp.context["messages"]), [])
+        self.assertContains(resp, 'id="appointment-lists"')
+
+        resp = self.client.post(reverse("appointment_list"), {"time": "10:00"})
+        self.assertContains(resp, "This field is required.", status_code=400)
+        self.assertContains(resp, "Jan. 15, 2050", status_code=400)
+
+        resp = self.client.get(reverse("appointment_list"))
+        self.assertNotContains(resp, "booked successfully")
+        self.assertContains(resp, "Jan. 15, 2050")
+
     def test_unauthenticated_appointment_access(self):
         """Test unauthenticated access to appointment-related views.
 
@@ -498,3 +578,5 @@ class AppointmentViewsTest(TestCase):
 
         # Should redirect to login
         self.assertIn("login", resp.url)
+        resp = self.client.post(reverse("appointment_list"))
+        self.assertIn("login", resp.url)
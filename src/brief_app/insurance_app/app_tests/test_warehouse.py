@@ -0,0 +1,182 @@
+import csv
+import gzip
+import json
+import tempfile
+from datetime import datetime, timedelta
+from io import StringIO
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from insurance_app import locks, warehouse
+from insurance_app.locks import advisory_lock
+from insurance_app.models import PredictionHistory, UserProfile
+
+
+class WarehouseExportTest(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        override = override_settings(WAREHOUSE_EXPORT_DIR=self.tmp.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.user = UserProfile.objects.create_user(username="feed", password="pass")
+        self.day = timezone.make_aware(datetime(2025, 3, 1, 12))
+        # Two predictions on each of two days.
+        for hours in (0, 1, 24, 25):
+            self.predict(self.day + timedelta(hours=hours))
+
+    def predict(self, timestamp):
+        prediction = PredictionHistory.objects.create(
+            user=self.user,
+            age=40,
+            weight=80,
+            height=180,
+            num_children=1,
+            smoker="No",
+            region="Northeast",
+            sex="Male",
+            predicted_charges=1000,
+        )
+        PredictionHistory.objects.filter(pk=prediction.pk).update(timestamp=timestamp)
+        return prediction
+
+    def read_part(self, relative):
+        with gzip.open(warehouse.export_dir() / relative, "rt") as handle:
+            return handle.read()
+
+    def manifest(self, run):
+        return json.loads(warehouse.manifest_path(run).read_text())
+
+    def test_first_run_exports_everything_by_day(self):
+        result = warehouse.export_changes()
+
+        self.assertEqual((result.run, result.rows), (1, 4))
+        self.assertEqual(
+            result.parts,
+            [
+                "dt=2025-03-01/part-r00000001-default-0001.ndjson.gz",
+                "dt=2025-03-02/part-r00000001-default-0002.ndjson.gz",
+            ],
+        )
+        rows = [json.loads(line) for line in self.read_part(result.parts[0]).split()]
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]["timestamp"], "2025-03-01T11:00:00+00:00")
+        self.assertEqual(rows[0]["user_id"], self.user.pk)
+        self.assertEqual(rows[0]["bmi_category"], "normal_weight")
+
+        manifest = self.manifest(1)
+        self.assertEqual(manifest["rows"], 4)
+        self.assertEqual([part["rows"] for part in manifest["files"]], [2, 2])
+        last = PredictionHistory.objects.latest("id")
+        self.assertEqual(manifest["high_water"]["default"]["id"], last.pk)
+        self.assertEqual(warehouse.verify_manifest(1), [])
+
+    def test_next_run_only_reads_new_rows(self):
+        warehouse.export_changes()
+        self.assertIsNone(warehouse.export_changes().manifest)
+
+        new = self.predict(self.day + timedelta(days=2))
+        with self.assertNumQueries(2):  # unsettled boundary, then the new rows
+            result = warehouse.export_changes(format="csv")
+        self.assertEqual((result.run, result.rows), (2, 1))
+        lines = list(csv.reader(self.read_part(result.parts[0]).splitlines()))
+        self.assertEqual(lines[0], warehouse.COLUMNS)
+        self.assertEqual(int(lines[1][0]), new.pk)
+        self.assertEqual(self.manifest(2)["sources"]["default"]["from_id"], new.pk)
+
+    def test_rows_per_file(self):
+        result = warehouse.export_changes(rows_per_file=1)
+        self.assertEqual(len(result.parts), 4)
+
+    def test_unsettled_rows_wait_for_the_next_run(self):
+        recent = self.predict(timezone.now())
+        late = self.predict(self.day)  # Higher id, but an old timestamp.
+
+        result = warehouse.export_changes()
+        self.assertEqual(result.rows, 4)
+        exported = self.manifest(1)["high_water"]["default"]["id"]
+        self.assertLess(exported, recent.pk)
+
+        result = warehouse.export_changes(settle_seconds=0)
+        self.assertEqual(result.rows, 2)
+        self.assertEqual(self.manifest(2)["sources"]["default"]["to_id"], late.pk)
+
+    def test_interrupted_run_is_exported_again(self):
+        with patch.object(warehouse, "manifest_path", side_effect=OSError("disk")):
+            with self.assertRaises(OSError):
+                warehouse.export_changes()
+        partial = list(warehouse.export_dir().glob("dt=*/*.gz"))
+        self.assertEqual(len(partial), 2)
+
+        result = warehouse.export_changes(rows_per_file=1)
+        self.assertEqual((result.run, result.rows), (1, 4))
+        files = sorted(warehouse.export_dir().glob("dt=*/*.gz"))
+        self.assertEqual(len(files), 4)
+        self.assertEqual(warehouse.verify_manifest(1), [])
+
+    def test_published_run_is_rolled_forward(self):
+        checkpoint = warehouse.export_dir() / "_checkpoint.json"
+        result = warehouse.export_changes()
+        # Interrupted between the manifest and the checkpoint.
+        state = {
+            "run": 0,
+            "high_water": {},
+            "pending": {"run": 1, "parts": result.parts},
+        }
+        checkpoint.write_text(json.dumps(state))
+
+        self.assertIsNone(warehouse.export_changes().manifest)
+        self.assertEqual(json.loads(checkpoint.read_text())["run"], 1)
+        self.assertEqual(warehouse.verify_manifest(1), [])
+
+    def test_corrupted_part_fails_verification(self):
+        result = warehouse.export_changes()
+        with open(warehouse.export_dir() / result.parts[1], "ab") as handle:
+            handle.write(b"x")
+        self.assertEqual(warehouse.verify_manifest(1), [result.parts[1]])
+
+    def test_command_skips_while_another_node_exports(self):
+        out = StringIO()
+        with advisory_lock(warehouse.LOCK_NAME) as acquired:
+            self.assertTrue(acquired)
+            call_command("export_changes", stdout=out)
+        self.assertIn("Another export is running", out.getvalue())
+        self.assertFalse(warehouse.manifest_path(1).exists())
+
+        call_command("export_changes", stdout=out)
+        self.assertIn("Run 1: exported 4 predictions in 2 file(s)", out.getvalue())
+
+
+@skipUnless(connection.vendor == "postgresql", "PostgreSQL advisory locks")
+class AdvisoryLockTest(TransactionTestCase):
+    """The lock is transaction-scoped, so pgbouncer cannot strand it."""
+
+    def taken_by_another_session(self) -> bool:
+        other = connections.create_connection(DEFAULT_DB_ALIAS)
+        try:
+            with other.cursor() as cursor:
+                cursor.execute(
+                    "SELECT pg_try_advisory_xact_lock(%s)",
+                    [locks._lock_key(warehouse.LOCK_NAME)],
+                )
+                return not cursor.fetchone()[0]
+        finally:
+            other.close()
+
+    def test_lock_is_released_with_its_transaction(self):
+        with advisory_lock(warehouse.LOCK_NAME) as acquired:
+            self.assertTrue(acquired)
+            self.assertTrue(connection.in_atomic_block)
+            self.assertTrue(self.taken_by_another_session())
+        self.assertFalse(self.taken_by_another_session())
+
+        with self.assertRaises(ZeroDivisionError):
+            with advisory_lock(warehouse.LOCK_NAME):
+                1 / 0
+        self.assertFalse(self.taken_by_another_session())
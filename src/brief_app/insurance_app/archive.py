@@ -0,0 +1,252 @@
+"""Archival of old rows out of the hot tables.
+
+Rows older than the retention period are copied into gzip-compressed CSV
+part files, one directory per month::
+
+    <ARCHIVE_DIR>/<dataset>/<YYYY-MM>/part-<first id>-<last id>.csv.gz
+
+and then deleted in small batches ordered by primary key, so no statement
+holds locks for long. Progress is checkpointed per database, which makes the
+job restartable: a batch is recorded as pending before its parts are written
+and cleared once its rows are deleted, so an interrupted run either finishes
+the delete or re-archives the batch, never both.
+
+`iter_archived()` reads the archive back lazily, month by month.
+"""
+
+from __future__ import annotations
+
+import csv
+import gzip
+import io
+import json
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Type
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, models
+
+from . import caching, sharding
+from .models import ContactMessage, PredictionHistory
+
+
+@dataclass(frozen=True)
+class Dataset:
+    """A table that can be archived, keyed by its age column."""
+
+    name: str
+    model: Type[models.Model]
+    date_field: str
+
+    @property
+    def columns(self) -> List[str]:
+        return [field.attname for field in self.model._meta.concrete_fields]
+
+    def aliases(self) -> List[str]:
+        if self.model is PredictionHistory:
+            return sharding.history_aliases()
+        return [DEFAULT_DB_ALIAS]
+
+
+DATASETS: Dict[str, Dataset] = {
+    "predictions": Dataset("predictions", PredictionHistory, "timestamp"),
+    "messages": Dataset("messages", ContactMessage, "submitted_at"),
+}
+
+
+@dataclass
+class BatchResult:
+    """Outcome of one archived-and-deleted batch."""
+
+    dataset: str
+    alias: str
+    rows: int
+    last_id: int
+    parts: List[str]
+
+
+def archive_dir() -> Path:
+    return Path(settings.ARCHIVE_DIR)
+
+
+def _checkpoint_path(dataset: Dataset, alias: str) -> Path:
+    return archive_dir() / dataset.name / f"checkpoint-{alias}.json"
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    """Replace `path` with `data`, so readers never see a partial file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as handle:
+        handle.write(data)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(tmp, path)
+
+
+def _load_checkpoint(dataset: Dataset, alias: str) -> dict:
+    path = _checkpoint_path(dataset, alias)
+    if not path.exists():
+        return {"pending_ids": [], "pending_parts": []}
+    return json.loads(path.read_text())
+
+
+def _save_checkpoint(dataset: Dataset, alias: str, state: dict) -> None:
+    write_atomic(_checkpoint_path(dataset, alias), json.dumps(state).encode())
+
+
+def _delete_batch(dataset: Dataset, alias: str, ids: List[int]) -> int:
+    """
+    Delete the rows `ids` of `dataset` with one statement; returns the count.
+
+    The statement neither collects the rows nor sends delete signals, so the
+    cached history statistics of the batch's users are invalidated here.
+    """
+    rows = dataset.model._base_manager.using(alias).filter(pk__in=ids)
+    user_ids = (
+        set(rows.values_list("user_id", flat=True))
+        if dataset.model is PredictionHistory
+        else set()
+    )
+    deleted = rows._raw_delete(alias)
+    if user_ids:
+        caching.invalidate_on_commit(
+            *(caching.history_tag(user_id) for user_id in sorted(user_ids)),
+            using=alias,
+        )
+    return deleted
+
+
+def _finish_pending(dataset: Dataset, alias: str) -> int:
+    """Complete a batch interrupted by a previous run; returns rows deleted."""
+    state = _load_checkpoint(dataset, alias)
+    ids = state["pending_ids"]
+    if not ids:
+        return 0
+    deleted = 0
+    parts = [archive_dir() / part for part in state["pending_parts"]]
+    if all(part.exists() for part in parts):
+        deleted = _delete_batch(dataset, alias, ids)
+    else:
+        # Interrupted while writing: drop partial output, the rows get archived again.
+        for part in parts:
+            part.unlink(missing_ok=True)
+    _save_checkpoint(dataset, alias, {"pending_ids": [], "pending_parts": []})
+    return deleted
+
+
+def _encode(value: object) -> object:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _plan_parts(
+    dataset: Dataset, rows: List[tuple], date_index: int
+) -> Dict[str, List[tuple]]:
+    """Split a batch into one part file per month, keyed by relative path."""
+    by_month: Dict[str, List[tuple]] = {}
+    for row in rows:
+        by_month.setdefault(row[date_index].strftime("%Y-%m"), []).append(row)
+    return {
+        f"{dataset.name}/{month}/"
+        f"part-{month_rows[0][0]:012d}-{month_rows[-1][0]:012d}.csv.gz": month_rows
+        for month, month_rows in sorted(by_month.items())
+    }
+
+
+def _write_part(dataset: Dataset, relative: str, rows: List[tuple]) -> None:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(dataset.columns)
+    writer.writerows([_encode(value) for value in row] for row in rows)
+    write_atomic(archive_dir() / relative, gzip.compress(buffer.getvalue().encode()))
+
+
+def archive_batches(
+    dataset: Dataset,
+    cutoff: datetime,
+    alias: str = DEFAULT_DB_ALIAS,
+    batch_size: int = 1000,
+    pause: float = 0.0,
+    max_rows: Optional[int] = None,
+) -> Iterator[BatchResult]:
+    """
+    Archive and delete rows of `dataset` older than `cutoff`, one batch at a time.
+
+    Args:
+        dataset (Dataset): Table to archive.
+        cutoff (datetime): Rows strictly older than this are archived.
+        alias (str): Database to archive from.
+        batch_size (int): Rows per archive-and-delete batch.
+        pause (float): Seconds to sleep between batches (rate limiting).
+        max_rows (int | None): Stop after roughly this many rows.
+
+    Yields:
+        BatchResult: One result per completed batch.
+    """
+    _finish_pending(dataset, alias)
+
+    queryset = dataset.model._base_manager.using(alias).filter(
+        **{f"{dataset.date_field}__lt": cutoff}
+    )
+    date_index = dataset.columns.index(dataset.date_field)
+    last_id = 0
+    done = 0
+    while max_rows is None or done < max_rows:
+        limit = batch_size if max_rows is None else min(batch_size, max_rows - done)
+        rows = list(
+            queryset.filter(pk__gt=last_id)
+            .order_by("pk")
+            .values_list(*dataset.columns)[:limit]
+        )
+        if not rows:
+            return
+
+        ids = [row[0] for row in rows]
+        parts = _plan_parts(dataset, rows, date_index)
+        _save_checkpoint(
+            dataset, alias, {"pending_ids": ids, "pending_parts": list(parts)}
+        )
+        for relative, part_rows in parts.items():
+            _write_part(dataset, relative, part_rows)
+        _delete_batch(dataset, alias, ids)
+        _save_checkpoint(dataset, alias, {"pending_ids": [], "pending_parts": []})
+
+        last_id = ids[-1]
+        done += len(ids)
+        yield BatchResult(dataset.name, alias, len(ids), last_id, list(parts))
+        if pause:
+            time.sleep(pause)
+
+
+def archived_months(dataset: str) -> List[str]:
+    """Months ("YYYY-MM") present in the archive of `dataset`, oldest first."""
+    root = archive_dir() / dataset
+    if not root.exists():
+        return []
+    return sorted(path.name for path in root.iterdir() if path.is_dir())
+
+
+def iter_archived(
+    dataset: str, start: Optional[str] = None, end: Optional[str] = None
+) -> Iterator[Dict[str, str]]:
+    """
+    Lazily yield archived rows of `dataset` as dicts of strings.
+
+    Only one part file is open at a time, so scanning years of archive uses
+    constant memory.
+
+    Args:
+        dataset (str): "predictions" or "messages".
+        start (str | None): First month to read, "YYYY-MM" (inclusive).
+        end (str | None): Last month to read, "YYYY-MM" (inclusive).
+    """
+    for month in archived_months(dataset):
+        if (start and month < start) or (end and month > end):
+            continue
+        for part in sorted((archive_dir() / dataset / month).glob("part-*.csv.gz")):
+            with gzip.open(part, "rt", newline="") as handle:
+                yield from csv.DictReader(handle)
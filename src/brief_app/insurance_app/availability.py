@@ -0,0 +1,144 @@
+"""Availability resolution for appointment booking.
+
+Opening hours are described once as weekly `AvailabilityRule` rows, with
+`AvailabilityException` rows for holidays and blocked hours. Explicit
+`Availability` rows still override a single date. Concrete days are never
+stored: they are computed for the requested window and cached until any of
+the three tables changes.
+"""
+
+from __future__ import annotations
+
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Union
+
+from django.core.cache import cache
+
+from . import caching
+from .models import Availability, AvailabilityException, AvailabilityRule
+
+OPENING_HOUR: int = 9
+CLOSING_HOUR: int = 18
+
+CACHE_PREFIX: str = "availability"
+# Invalidation only reaches the local cache when CACHE_URL names no shared
+# cache, so keep entries short-lived enough for other workers to catch up.
+CACHE_TIMEOUT: int = 60 * 5
+
+
+def hour_slots(start: int = OPENING_HOUR, end: int = CLOSING_HOUR) -> List[str]:
+    """Return the hourly slots between `start` and `end` (both inclusive)."""
+    return [f"{hour:02d}:00" for hour in range(start, end + 1)]
+
+
+DEFAULT_TIME_SLOTS: List[str] = hour_slots()
+TIME_SLOT_CHOICES: List[tuple[str, str]] = [(slot, slot) for slot in DEFAULT_TIME_SLOTS]
+
+
+def _version() -> int:
+    """Current cache generation; bumped whenever availability data changes."""
+    return caching.tag_versions([caching.AVAILABILITY_TAG])[0]
+
+
+def invalidate_cache() -> None:
+    """Drop every cached day by moving to a new cache generation."""
+    caching.invalidate(caching.AVAILABILITY_TAG)
+
+
+def _cache_key(version: int, day: date) -> str:
+    return f"{CACHE_PREFIX}:{version}:{day.isoformat()}"
+
+
+def _as_date(value: Union[date, str]) -> date:
+    return value if isinstance(value, date) else date.fromisoformat(value)
+
+
+def _resolve(
+    day: date,
+    overrides: Dict[date, List[str]],
+    rules: Iterable[AvailabilityRule],
+    exceptions: Iterable[AvailabilityException],
+) -> List[str]:
+    if day in overrides:
+        return list(overrides[day])
+
+    slots = set()
+    for rule in rules:
+        if rule.applies_to(day):
+            slots.update(rule.time_slots)
+
+    for exception in exceptions:
+        if exception.covers(day):
+            if not exception.blocked_slots:
+                return []
+            slots.difference_update(exception.blocked_slots)
+
+    return sorted(slots)
+
+
+def _compute_window(start: date, end: date) -> Dict[date, List[str]]:
+    """Materialize the window with three queries, whatever its length."""
+    overrides = dict(
+        Availability.objects.filter(date__range=(start, end)).values_list(
+            "date", "time_slots"
+        )
+    )
+    rules = list(
+        AvailabilityRule.objects.filter(valid_from__lte=end).exclude(
+            valid_until__lt=start
+        )
+    )
+    exceptions = list(
+        AvailabilityException.objects.filter(start_date__lte=end, end_date__gte=start)
+    )
+
+    days = (end - start).days + 1
+    return {
+        day: _resolve(day, overrides, rules, exceptions)
+        for day in (start + timedelta(days=offset) for offset in range(days))
+    }
+
+
+def get_availability(
+    start: Union[date, str], end: Union[date, str]
+) -> Dict[date, List[str]]:
+    """
+    Return the available time slots for every date between `start` and `end`.
+
+    Days already cached are served from the cache; the remaining ones are
+    computed in one pass and cached for the next caller.
+
+    Args:
+        start (date | str): First date of the window (ISO string accepted).
+        end (date | str): Last date of the window, inclusive.
+
+    Returns:
+        dict: Mapping of each date to its sorted list of "HH:MM" slots.
+    """
+    start, end = _as_date(start), _as_date(end)
+    if end < start:
+        return {}
+
+    version = _version()
+    days = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+    keys = {day: _cache_key(version, day) for day in days}
+    cached = cache.get_many(keys.values())
+
+    result = {day: cached[key] for day, key in keys.items() if key in cached}
+    missing = [day for day in days if day not in result]
+    caching.record(CACHE_PREFIX, hits=len(result), misses=len(missing))
+    if missing:
+        computed = _compute_window(missing[0], missing[-1])
+        computed = {day: computed[day] for day in missing}
+        cache.set_many(
+            {keys[day]: slots for day, slots in computed.items()}, CACHE_TIMEOUT
+        )
+        result.update(computed)
+
+    return dict(sorted(result.items()))
+
+
+def get_time_slots(day: Union[date, str]) -> List[str]:
+    """Return the available time slots for a single date."""
+    day = _as_date(day)
+    return get_availability(day, day)[day]
@@ -0,0 +1,52 @@
+"""Authentication backend serving `request.user` from the cache.
+
+`AuthenticationMiddleware` loads the user of the session on every request.
+With `AUTH_USER_CACHE` on, `CachedModelBackend` reads it from the "default"
+cache instead, under the user's tag (`caching.user_tag`), so an authenticated
+request costs the session lookup alone. Every write to the user row bumps the
+tag: saving or deleting the profile (`signals.invalidate_user`), which covers
+password changes, logins and admin edits, and the quote refreshes of
+`pricing`, which update the row directly. The next request then reads the row
+from the database, so a deactivated user or a changed password ends the
+other sessions at once, as Django checks the session against the password.
+
+The cache is an optimization only: if it fails, the user is read from the
+database as `ModelBackend` does.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any, Optional
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+from . import caching
+
+logger = logging.getLogger(__name__)
+
+
+class CachedModelBackend(ModelBackend):
+    """`ModelBackend` reading the session's user from a versioned cache entry."""
+
+    def get_user(self, user_id: Any) -> Optional[Any]:
+        if not settings.AUTH_USER_CACHE:
+            return super().get_user(user_id)
+        UserModel = get_user_model()
+        try:
+            user = caching.get_or_set(
+                "auth-user",
+                lambda: UserModel._default_manager.get(pk=user_id),
+                key=user_id,
+                tags=[caching.user_tag(user_id)],
+            )
+        except UserModel.DoesNotExist:
+            return None
+        except Exception:
+            logger.warning(
+                "User cache unavailable, reading the database", exc_info=True
+            )
+            return super().get_user(user_id)
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,304 @@
+"""Bulk changes to availability and appointments, and their CSV import/export.
+
+Each operation runs in one transaction and writes whole sets of rows instead
+of saving them one at a time. Availability days and imported appointments go
+through a single `bulk_create()` per batch of `BATCH_SIZE` rows; days are
+upserted on their unique date, so re-running an import or a range update
+replaces the slots of days that already exist. Appointments are moved and
+cancelled with set-based UPDATE/DELETE statements on the selection, which
+never load the rows (`bulk_update()` builds a CASE per row in Python and is
+some 60 times slower on large selections).
+
+CSV files are read and written as streams: imports parse `BATCH_SIZE` rows at a
+time, and exports yield one line per row from a server-side iterator, so
+neither ever holds a whole file in memory. Bulk writes skip model signals, so
+the availability cache is invalidated explicitly once the transaction commits.
+
+CSV formats::
+
+    availability: date,time_slots          2025-06-02,09:00 10:00 11:00
+    appointments: username,reason,date,time
+"""
+
+from __future__ import annotations
+
+import csv
+from datetime import date, timedelta
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from django.db import models, transaction
+from django.utils import timezone
+
+from . import availability
+from .models import Appointment, Availability, UserProfile
+
+BATCH_SIZE = 1000
+
+AVAILABILITY_COLUMNS = ("date", "time_slots")
+APPOINTMENT_COLUMNS = ("username", "reason", "date", "time")
+REASONS = {reason for reason, _ in Appointment.REASON_CHOICES}
+
+
+class CsvImportError(ValueError):
+    """A row of an imported CSV file is invalid; nothing was imported."""
+
+    def __init__(self, line: int, message: str) -> None:
+        super().__init__(f"Line {line}: {message}")
+        self.line = line
+
+
+def date_range(
+    start: date, end: date, weekdays: Optional[Iterable[int]] = None
+) -> Iterator[date]:
+    """Yield the dates from `start` to `end` inclusive, on `weekdays` (0 = Monday)."""
+    allowed = set(range(7) if weekdays is None else weekdays)
+    day = start
+    while day <= end:
+        if day.weekday() in allowed:
+            yield day
+        day += timedelta(days=1)
+
+
+def _upsert_availability(days: Sequence[Availability]) -> None:
+    Availability.objects.bulk_create(
+        days,
+        batch_size=BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=["date"],
+        update_fields=["time_slots"],
+    )
+
+
+def _check_slots(slots: Iterable[str]) -> List[str]:
+    slots = sorted(set(slots))
+    unknown = [slot for slot in slots if slot not in availability.DEFAULT_TIME_SLOTS]
+    if unknown:
+        raise ValueError(f"unknown time slots: {', '.join(unknown)}")
+    return slots
+
+
+def set_availability(days: Iterable[date], time_slots: Iterable[str]) -> int:
+    """
+    Offer `time_slots` on each of `days`, replacing any explicit availability.
+
+    An empty `time_slots` closes the days.
+
+    Returns:
+        int: Number of days written.
+    """
+    slots = _check_slots(time_slots)
+    rows = [Availability(date=day, time_slots=slots) for day in days]
+    with transaction.atomic():
+        _upsert_availability(rows)
+        transaction.on_commit(availability.invalidate_cache)
+    return len(rows)
+
+
+def clear_availability(start: date, end: date) -> int:
+    """
+    Drop the explicit availability between `start` and `end`, inclusive.
+
+    The days fall back to the weekly rules and exceptions.
+
+    Returns:
+        int: Number of days removed.
+    """
+    with transaction.atomic():
+        deleted, _ = Availability.objects.filter(date__range=(start, end)).delete()
+        transaction.on_commit(availability.invalidate_cache)
+    return deleted
+
+
+def move_appointments(
+    queryset: models.QuerySet,
+    days: int = 0,
+    to_date: Optional[date] = None,
+    time: Optional[str] = None,
+) -> int:
+    """
+    Reschedule the appointments of `queryset`.
+
+    Moving to a date or time is a single UPDATE; shifting by a number of days
+    is one UPDATE per distinct date of the selection. Rows are never loaded.
+
+    Args:
+        queryset (QuerySet): Appointments to move.
+        days (int): Shift each appointment by this many days.
+        to_date (date): Move every appointment to this date instead.
+        time (str): New "HH:MM" slot; keep each appointment's time if empty.
+
+    Returns:
+        int: Number of appointments moved.
+    """
+    # UPDATE skips auto_now, so stamp the rows as moved here.
+    changes: Dict[str, Any] = {"updated_at": timezone.now()}
+    if time:
+        changes["time"] = time
+    selection = Appointment.objects.filter(pk__in=queryset.order_by().values("pk"))
+    with transaction.atomic():
+        if to_date or not days:
+            if to_date:
+                changes["date"] = to_date
+            return selection.update(**changes)
+        # Walk the dates against the shift, so rows already moved never land
+        # on a date that is still to be processed.
+        order = "DESC" if days > 0 else "ASC"
+        moved = 0
+        for day in list(queryset.order_by().dates("date", "day", order)):
+            moved += selection.filter(date=day).update(
+                date=day + timedelta(days=days), **changes
+            )
+        return moved
+
+
+def cancel_appointments(queryset: models.QuerySet) -> int:
+    """
+    Delete the appointments of `queryset` with a single statement.
+
+    Returns:
+        int: Number of appointments cancelled.
+    """
+    # Appointments have no dependents or delete receivers, so Django deletes
+    # them without collecting the rows first.
+    deleted, _ = queryset.delete()
+    return deleted
+
+
+def _batches(rows: Iterator[Dict[str, str]]) -> Iterator[List[Dict[str, str]]]:
+    while batch := list(islice(rows, BATCH_SIZE)):
+        yield batch
+
+
+def _reader(lines: Iterable[str], columns: Sequence[str]) -> csv.DictReader:
+    reader = csv.DictReader(lines)
+    missing = set(columns) - set(reader.fieldnames or ())
+    if missing:
+        raise CsvImportError(1, f"missing columns: {', '.join(sorted(missing))}")
+    return reader
+
+
+def _first_line(reader: csv.DictReader, batch: List[Dict[str, str]]) -> int:
+    # DictReader only knows the line of the last row it read; rows with quoted
+    # line breaks make this approximate.
+    return reader.line_num - len(batch) + 1
+
+
+def _parse_date(value: str, line: int) -> date:
+    try:
+        return date.fromisoformat(value.strip())
+    except ValueError:
+        raise CsvImportError(line, f"invalid date {value!r}") from None
+
+
+def import_availability(lines: Iterable[str]) -> int:
+    """
+    Upsert availability days from CSV `lines` (`date,time_slots`).
+
+    Slots are separated by spaces; an empty cell closes the day.
+
+    Raises:
+        CsvImportError: On the first invalid row; nothing is imported.
+
+    Returns:
+        int: Number of days imported.
+    """
+    reader = _reader(lines, AVAILABILITY_COLUMNS)
+    imported = 0
+    with transaction.atomic():
+        for batch in _batches(iter(reader)):
+            rows = []
+            for line, row in enumerate(batch, _first_line(reader, batch)):
+                day = _parse_date(row["date"], line)
+                try:
+                    slots = _check_slots((row["time_slots"] or "").split())
+                except ValueError as exc:
+                    raise CsvImportError(line, str(exc)) from None
+                rows.append(Availability(date=day, time_slots=slots))
+            _upsert_availability(rows)
+            imported += len(rows)
+        transaction.on_commit(availability.invalidate_cache)
+    return imported
+
+
+def import_appointments(lines: Iterable[str]) -> int:
+    """
+    Create appointments from CSV `lines` (`username,reason,date,time`).
+
+    Users are looked up once per batch of rows.
+
+    Raises:
+        CsvImportError: On the first invalid row; nothing is imported.
+
+    Returns:
+        int: Number of appointments created.
+    """
+    reader = _reader(lines, APPOINTMENT_COLUMNS)
+    imported = 0
+    with transaction.atomic():
+        for batch in _batches(iter(reader)):
+            users = dict(
+                UserProfile.objects.filter(
+                    username__in={row["username"] for row in batch}
+                ).values_list("username", "pk")
+            )
+            rows = []
+            for line, row in enumerate(batch, _first_line(reader, batch)):
+                if row["username"] not in users:
+                    raise CsvImportError(line, f"unknown user {row['username']!r}")
+                if row["reason"] not in REASONS:
+                    raise CsvImportError(line, f"unknown reason {row['reason']!r}")
+                if row["time"] not in availability.DEFAULT_TIME_SLOTS:
+                    raise CsvImportError(line, f"unknown time slot {row['time']!r}")
+                rows.append(
+                    Appointment(
+                        user_id=users[row["username"]],
+                        reason=row["reason"],
+                        date=_parse_date(row["date"], line),
+                        time=row["time"],
+                    )
+                )
+            Appointment.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+            imported += len(rows)
+    return imported
+
+
+class _Echo:
+    """File-like object handing back what `csv.writer` writes to it."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def stream_csv(header: Sequence[str], rows: Iterable[Sequence[Any]]) -> Iterator[str]:
+    """Yield `header` and then each of `rows` as CSV lines."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def export_availability(queryset: models.QuerySet) -> Iterator[str]:
+    """CSV lines of the availability days of `queryset`, by date."""
+    rows = queryset.order_by("date").values_list("date", "time_slots")
+    return stream_csv(
+        AVAILABILITY_COLUMNS,
+        (
+            (day.isoformat(), " ".join(slots))
+            for day, slots in rows.iterator(chunk_size=BATCH_SIZE)
+        ),
+    )
+
+
+def export_appointments(queryset: models.QuerySet) -> Iterator[str]:
+    """CSV lines of the appointments of `queryset`, by date and time."""
+    rows = queryset.order_by("date", "time", "pk").values_list(
+        "user__username", "reason", "date", "time"
+    )
+    return stream_csv(
+        APPOINTMENT_COLUMNS,
+        (
+            (username, reason, day.isoformat(), time)
+            for username, reason, day, time in rows.iterator(chunk_size=BATCH_SIZE)
+        ),
+    )
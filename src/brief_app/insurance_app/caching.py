@@ -0,0 +1,239 @@
+"""Named cache tiers with tag-based invalidation.
+
+Two tiers are configured in `settings.CACHES` (see `brief_app.settings`):
+
+- "default" is shared by every process when `CACHE_URL` names a cache server
+  or a directory, and is this process's memory otherwise;
+- "local" is always this process's memory, an LRU for small, hot values.
+
+Every cached value carries tags. Each tag has a version kept in the default
+tier, and entry keys include the versions of their tags, so `invalidate()`
+drops all the entries of a tag at once, in every tier and process, by bumping
+its version; the orphaned entries age out. Signal receivers in `signals.py`
+invalidate the tags of a model when its rows are saved or deleted.
+
+Lookups are counted per cache name for hit-ratio metrics, shown to staff on
+the query log page.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from dataclasses import dataclass, replace
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import QuerySet
+
+TIERS = ("default", "local")
+TAG_PREFIX = "tag"
+
+# Tags of the first consumers.
+JOBS_TAG = "jobs"
+AVAILABILITY_TAG = "availability"
+
+_MISSING = object()
+
+
+def history_tag(user_id: int) -> str:
+    """Tag of the cached statistics of a user's prediction history."""
+    return f"history:{user_id}"
+
+
+def user_tag(user_id: int) -> str:
+    """Tag of the cached copy of a user (see `insurance_app.backends`)."""
+    return f"user:{user_id}"
+
+
+@dataclass
+class CacheStats:
+    """Lookups of one cache name served by this process."""
+
+    name: str
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def ratio(self) -> Optional[float]:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else None
+
+
+_stats: Dict[str, CacheStats] = {}
+_stats_lock = threading.Lock()
+
+
+def record(name: str, hits: int = 0, misses: int = 0) -> None:
+    """Count `hits` and `misses` of the cache `name`."""
+    with _stats_lock:
+        entry = _stats.setdefault(name, CacheStats(name))
+        entry.hits += hits
+        entry.misses += misses
+
+
+def stats() -> List[CacheStats]:
+    """Hits and misses per cache name since this process started."""
+    with _stats_lock:
+        return [replace(entry) for _, entry in sorted(_stats.items())]
+
+
+def clear_stats() -> None:
+    with _stats_lock:
+        _stats.clear()
+
+
+def tag_versions(tags: Sequence[str]) -> List[int]:
+    """Current version of each of `tags`, read with one cache round trip."""
+    if not tags:
+        return []
+    cache = caches["default"]
+    keys = [f"{TAG_PREFIX}:{tag}" for tag in tags]
+    found = cache.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    start = time.time_ns()
+    if missing:
+        # A tag seen for the first time, or evicted, starts from the clock:
+        # never from a version older entries could have been stored under.
+        # Another process may add it first; its version is read back.
+        for key in missing:
+            cache.add(key, start, None)
+        found.update(cache.get_many(missing))
+    return [found.get(key, start) for key in keys]
+
+
+def invalidate(*tags: str) -> None:
+    """Drop every entry carrying one of `tags`, in every tier and process."""
+    cache = caches["default"]
+    for tag in tags:
+        key = f"{TAG_PREFIX}:{tag}"
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+
+
+def invalidate_on_commit(*tags: str, using: str = DEFAULT_DB_ALIAS) -> None:
+    """
+    Invalidate `tags` now and again once the current transaction commits.
+
+    The first bump keeps this process's own reads fresh; the second drops
+    anything another request cached from the data it read before the commit.
+    """
+    invalidate(*tags)
+    transaction.on_commit(lambda: invalidate(*tags), using=using)
+
+
+def _entry_key(name: str, key: Any, tags: Sequence[str]) -> str:
+    digest = hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest()
+    versions = ".".join(str(version) for version in tag_versions(tags))
+    return f"{name}:{digest}:{versions}"
+
+
+def get_or_set(
+    name: str,
+    compute: Callable[[], Any],
+    *,
+    key: Any = (),
+    tags: Sequence[str] = (),
+    timeout: Optional[int] = None,
+    tier: str = "default",
+) -> Any:
+    """
+    The cached value of `name` for `key`, computed and stored on a miss.
+
+    Args:
+        name (str): Name of the cache, under which lookups are counted.
+        compute (callable): Returns the value on a miss; it must be picklable.
+        key (Any): Varies the entry; its `repr()` must identify it.
+        tags (Sequence[str]): Invalidating any of them drops the entry.
+        timeout (int | None): Seconds to keep the entry (default
+            `CACHE_TIMEOUT`).
+        tier (str): "default" or "local".
+
+    Returns:
+        Any: The cached or freshly computed value.
+    """
+    if tier not in TIERS:
+        raise ValueError(f"unknown cache tier {tier!r}")
+    cache = caches[tier]
+    # Versions are read before computing, so a value computed from data that
+    # changes meanwhile is stored under a key that is already stale.
+    entry = _entry_key(name, key, tags)
+    value = cache.get(entry, _MISSING)
+    if value is not _MISSING:
+        record(name, hits=1)
+        return value
+    record(name, misses=1)
+    value = compute()
+    cache.set(entry, value, settings.CACHE_TIMEOUT if timeout is None else timeout)
+    return value
+
+
+def cached(
+    name: Optional[str] = None,
+    *,
+    tags: Union[Sequence[str], Callable[..., Sequence[str]]] = (),
+    timeout: Optional[int] = None,
+    tier: str = "default",
+) -> Callable:
+    """
+    Cache the results of the decorated function per arguments.
+
+    The arguments must have a `repr()` identifying them (ids, strings, dates).
+    `tags` may be a callable, given the same arguments, returning the tags.
+
+    Example:
+        @cached(tags=lambda user_id: [history_tag(user_id)])
+        def history_summary(user_id): ...
+    """
+
+    def decorator(function: Callable) -> Callable:
+        cache_name = name or f"{function.__module__}.{function.__qualname__}"
+
+        @wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            return get_or_set(
+                cache_name,
+                lambda: function(*args, **kwargs),
+                key=(args, sorted(kwargs.items())),
+                tags=tags(*args, **kwargs) if callable(tags) else tags,
+                timeout=timeout,
+                tier=tier,
+            )
+
+        return wrapper
+
+    return decorator
+
+
+def cache_queryset(
+    queryset: QuerySet,
+    *,
+    tags: Sequence[str],
+    name: Optional[str] = None,
+    timeout: Optional[int] = None,
+    tier: str = "default",
+) -> List[Any]:
+    """
+    The rows of `queryset` as a list, cached per SQL statement and parameters.
+
+    Args:
+        queryset (QuerySet): Evaluated on a miss only.
+        tags (Sequence[str]): Invalidating any of them drops the rows.
+        name (str | None): Cache name (default: the model's label).
+        timeout (int | None): Seconds to keep the rows.
+        tier (str): "default" or "local".
+    """
+    return get_or_set(
+        name or queryset.model._meta.label_lower,
+        lambda: list(queryset),
+        key=queryset.query.sql_with_params(),
+        tags=tags,
+        timeout=timeout,
+        tier=tier,
+    )
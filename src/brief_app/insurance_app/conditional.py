@@ -0,0 +1,133 @@
+"""Conditional GET for the per-user pages.
+
+Each page gets an ETag from a cheap validator computed before the view runs,
+so a browser revalidating an unchanged page receives a 304 Not Modified
+without the page queries or template rendering:
+
+- profile: a digest of the user row, which the request has already loaded;
+- prediction history: one aggregate over the user's rows on their shard
+  (count, latest id and repeat count), which changes on every new, repeated,
+  archived or erased prediction;
+- appointments: the count and latest `updated_at` of the user's appointments,
+  read from the (user, updated_at) index, and today's date, which splits the
+  upcoming and past lists.
+
+Every ETag also covers the user row, the CSRF cookie embedded in the forms and
+a digest of the templates, so a deploy or a profile change refreshes the
+pages. Requests carrying flash messages, or without a CSRF cookie yet, are
+always rendered so the messages are consumed and the cookie set. Responses
+are marked `private, no-cache`: browsers keep them but revalidate every time,
+and shared caches never store them.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from functools import lru_cache, wraps
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.db.models import Count, Max, Sum
+from django.http import HttpRequest
+from django.template import engines
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from .models import Appointment, PredictionHistory
+
+EtagFunc = Callable[..., Optional[str]]
+
+
+@lru_cache(maxsize=None)
+def templates_digest() -> str:
+    """Digest of the template sources, computed once per process."""
+    digest = hashlib.blake2b(digest_size=8)
+    for directory in (
+        path for engine in engines.all() for path in engine.template_dirs
+    ):
+        for path in sorted(Path(directory).rglob("*.html")):
+            digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def _user_state(user: Any) -> tuple:
+    return tuple(getattr(user, field.attname) for field in user._meta.concrete_fields)
+
+
+def revalidates(request: HttpRequest) -> bool:
+    """
+    Whether `request` may be answered from its validator.
+
+    Only authenticated GET and HEAD requests that already hold a CSRF cookie
+    and have no pending messages qualify.
+    """
+    return (
+        request.method in ("GET", "HEAD")
+        and request.user.is_authenticated
+        and bool(request.COOKIES.get(settings.CSRF_COOKIE_NAME))
+        and not len(get_messages(request))
+    )
+
+
+def page_etag(request: HttpRequest, *parts: Any) -> Optional[str]:
+    """ETag of a per-user page whose content depends on `parts`, if any."""
+    if not revalidates(request):
+        return None
+    state = (
+        templates_digest(),
+        _user_state(request.user),
+        request.COOKIES[settings.CSRF_COOKIE_NAME],
+        parts,
+    )
+    return hashlib.blake2b(repr(state).encode(), digest_size=16).hexdigest()
+
+
+def profile_etag(request: HttpRequest, *args: Any, **kwargs: Any) -> Optional[str]:
+    """The profile page only shows the user row."""
+    return page_etag(request)
+
+
+def history_etag(request: HttpRequest, *args: Any, **kwargs: Any) -> Optional[str]:
+    """Version of the user's prediction history, from one aggregate."""
+    if not revalidates(request):
+        return None
+    version = PredictionHistory.objects.for_user(request.user).aggregate(
+        count=Count("id"), last=Max("id"), repeats=Sum("repeat_count")
+    )
+    return page_etag(request, sorted(version.items()))
+
+
+def appointments_etag(request: HttpRequest, *args: Any, **kwargs: Any) -> Optional[str]:
+    """Version of the user's appointments, from the (user, updated_at) index."""
+    if not revalidates(request):
+        return None
+    version = Appointment.objects.filter(user=request.user).aggregate(
+        count=Count("id"), updated=Max("updated_at")
+    )
+    return page_etag(request, sorted(version.items()), timezone.now().date())
+
+
+def conditional_page(etag_func: EtagFunc) -> Callable:
+    """
+    Answer conditional GETs of a per-user view with `etag_func`.
+
+    Wraps the view in `django.views.decorators.http.condition` and marks
+    its responses `private, no-cache`.
+    """
+
+    def decorator(view: Callable) -> Callable:
+        conditional_view = condition(etag_func=etag_func)(view)
+
+        @wraps(view)
+        def wrapper(request: HttpRequest, *args: Any, **kwargs: Any):
+            response = conditional_view(request, *args, **kwargs)
+            if response.has_header("ETag"):
+                patch_cache_control(response, private=True, no_cache=True)
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,77 @@
+"""Locks that keep scheduled jobs from running twice at the same time.
+
+`advisory_lock()` takes a PostgreSQL advisory lock, so jobs started from
+cron on several nodes against the same database skip while another node
+holds the lock. The lock belongs to a transaction, not to the database
+session: the block runs inside `transaction.atomic()` and the server
+releases the lock when that transaction ends, including when the process
+dies. Behind pgbouncer in transaction pooling mode (`DB_PGBOUNCER`), a
+transaction is the only scope that stays on one server connection: a
+session-level lock could be taken on one pooled backend, its unlock sent to
+another, and the lock left held for every later run. Inside an outer
+transaction the lock is held until that transaction ends.
+
+SQLite databases can only be shared between processes of one host, so there
+the lock is an exclusive `flock()` on a file in the temporary directory, also
+released by the kernel when the process exits.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+
+def _lock_key(name: str) -> int:
+    # pg_try_advisory_xact_lock() takes a signed 64-bit key.
+    digest = hashlib.blake2b(name.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+@contextmanager
+def advisory_lock(name: str, using: str = DEFAULT_DB_ALIAS) -> Iterator[bool]:
+    """
+    Try to take the lock called `name` without waiting.
+
+    Example:
+        with advisory_lock("nightly-export") as acquired:
+            if not acquired:
+                return  # Another process is running the job.
+            ...
+
+    Args:
+        name (str): Lock name, shared by every process running the job.
+        using (str): Database alias whose server holds the lock.
+
+    Yields:
+        bool: Whether the lock was acquired. The block runs either way, on
+        PostgreSQL inside a transaction of `using`.
+    """
+    connection = connections[using]
+    if connection.vendor == "postgresql":
+        with transaction.atomic(using=using):
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT pg_try_advisory_xact_lock(%s)", [_lock_key(name)]
+                )
+                acquired = bool(cursor.fetchone()[0])
+            yield acquired
+        return
+
+    path = Path(tempfile.gettempdir()) / f"insurance_app-{name}.lock"
+    with open(path, "a") as handle:
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
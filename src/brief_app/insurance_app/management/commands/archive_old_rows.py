@@ -0,0 +1,81 @@
+from datetime import timedelta
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+from django.utils import timezone
+
+from insurance_app.archive import DATASETS, archive_batches
+
+
+class Command(BaseCommand):
+    """
+    Move old prediction history and contact messages into the archive.
+
+    Rows older than the retention period are written to monthly compressed CSV
+    files under ARCHIVE_DIR, then deleted in small primary-key ordered batches.
+    The command can be interrupted and re-run at any time.
+
+    Example:
+        python manage.py archive_old_rows --older-than-days 730 --pause 0.2
+    """
+
+    help = "Archive and delete PredictionHistory/ContactMessage rows past retention."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--dataset",
+            choices=[*DATASETS, "all"],
+            default="all",
+            help="Which table to archive (default: all).",
+        )
+        parser.add_argument(
+            "--older-than-days",
+            type=int,
+            default=settings.ARCHIVE_RETENTION_DAYS,
+            help="Retention period in days (default: ARCHIVE_RETENTION_DAYS).",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=1000, help="Rows per batch."
+        )
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0.1,
+            help="Seconds to sleep between batches, to limit load.",
+        )
+        parser.add_argument(
+            "--max-rows",
+            type=int,
+            default=None,
+            help="Stop after this many rows per database (resume on next run).",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        cutoff = timezone.now() - timedelta(days=options["older_than_days"])
+        names = DATASETS if options["dataset"] == "all" else [options["dataset"]]
+
+        for name in names:
+            dataset = DATASETS[name]
+            for alias in dataset.aliases():
+                total = 0
+                for batch in archive_batches(
+                    dataset,
+                    cutoff,
+                    alias=alias,
+                    batch_size=options["batch_size"],
+                    pause=options["pause"],
+                    max_rows=options["max_rows"],
+                ):
+                    total += batch.rows
+                    if options["verbosity"] > 1:
+                        self.stdout.write(
+                            f"{name}@{alias}: archived {batch.rows} rows "
+                            f"up to id {batch.last_id}"
+                        )
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"{name}@{alias}: {total} rows older than "
+                        f"{cutoff:%Y-%m-%d} archived"
+                    )
+                )
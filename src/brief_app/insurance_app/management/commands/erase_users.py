@@ -0,0 +1,107 @@
+from typing import Any, List
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from insurance_app.erasure import BATCH_SIZE, erase_users
+from insurance_app.models import UserProfile
+
+
+class Command(BaseCommand):
+    """
+    Permanently erase users together with their predictions and appointments.
+
+    Users can be given by username, by id, or as a file of ids (one per line)
+    for large erasure backlogs. Dependent rows are removed in small batches,
+    so the command stays fast for users with a long history.
+
+    Example:
+        python manage.py erase_users alice bob
+        python manage.py erase_users --ids-file gdpr_requests.txt --noinput
+    """
+
+    help = "Erase users and all their data in batches."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("usernames", nargs="*", help="Usernames to erase.")
+        parser.add_argument(
+            "--ids", nargs="+", type=int, default=[], help="User ids to erase."
+        )
+        parser.add_argument(
+            "--ids-file", help="File with one user id per line to erase."
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=BATCH_SIZE, help="Rows per delete."
+        )
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0.0,
+            help="Seconds to sleep between batches, to limit load.",
+        )
+        parser.add_argument(
+            "--noinput",
+            "--no-input",
+            action="store_false",
+            dest="interactive",
+            help="Do not ask for confirmation.",
+        )
+
+    def _user_ids(self, options: dict[str, Any]) -> List[int]:
+        user_ids = list(options["ids"])
+        if options["ids_file"]:
+            try:
+                with open(options["ids_file"]) as handle:
+                    user_ids += [int(line) for line in handle if line.strip()]
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Cannot read ids file: {exc}") from exc
+        if options["usernames"]:
+            found = dict(
+                UserProfile.objects.filter(
+                    username__in=options["usernames"]
+                ).values_list("username", "pk")
+            )
+            for username in options["usernames"]:
+                if username not in found:
+                    self.stderr.write(f"No user named {username!r}, skipped.")
+            user_ids += found.values()
+        return user_ids
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        user_ids = self._user_ids(options)
+        if not user_ids:
+            raise CommandError("No users to erase.")
+
+        if options["interactive"]:
+            answer = input(
+                f"This will permanently erase {len(user_ids)} user(s) and all "
+                "their data. Type 'yes' to continue: "
+            )
+            if answer != "yes":
+                raise CommandError("Erasure cancelled.")
+
+        missing: List[int] = []
+        erased = predictions = appointments = 0
+        for result in erase_users(
+            user_ids,
+            batch_size=options["batch_size"],
+            pause=options["pause"],
+            missing=missing,
+        ):
+            erased += 1
+            predictions += result.predictions
+            appointments += result.appointments
+            if options["verbosity"] > 0:
+                self.stdout.write(
+                    f"[{erased}/{len(user_ids)}] erased {result.username} "
+                    f"(id {result.user_id}): {result.predictions} predictions, "
+                    f"{result.appointments} appointments"
+                )
+
+        for user_id in missing:
+            self.stderr.write(f"No user with id {user_id}, skipped.")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Erased {erased} user(s), {predictions} predictions and "
+                f"{appointments} appointments."
+            )
+        )
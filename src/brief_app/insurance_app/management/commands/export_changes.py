@@ -0,0 +1,65 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from insurance_app import warehouse
+
+
+class Command(BaseCommand):
+    """
+    Export the predictions created since the last run for the warehouse.
+
+    New rows are appended as partitioned, gzip-compressed part files and
+    published with a manifest of their checksums under WAREHOUSE_EXPORT_DIR.
+    Only one node exports at a time; the others skip their run.
+
+    Example:
+        python manage.py export_changes --format csv
+    """
+
+    help = "Append new PredictionHistory rows to the warehouse export."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--format",
+            choices=warehouse.FORMATS,
+            default="ndjson",
+            help="Format of the part files (default: ndjson).",
+        )
+        parser.add_argument(
+            "--rows-per-file",
+            type=int,
+            default=warehouse.ROWS_PER_FILE,
+            help="Rows per part file.",
+        )
+        parser.add_argument(
+            "--settle-seconds",
+            type=int,
+            default=warehouse.SETTLE_SECONDS,
+            help="Leave rows younger than this for the next run.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        try:
+            result = warehouse.export_changes(
+                format=options["format"],
+                rows_per_file=options["rows_per_file"],
+                settle_seconds=options["settle_seconds"],
+            )
+        except warehouse.ExportInProgress:
+            self.stdout.write(
+                self.style.WARNING("Another export is running; nothing to do.")
+            )
+            return
+        if not result.manifest:
+            self.stdout.write(self.style.SUCCESS("No new predictions to export."))
+            return
+        if options["verbosity"] > 1:
+            for part in result.parts:
+                self.stdout.write(part)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Run {result.run}: exported {result.rows} predictions in "
+                f"{len(result.parts)} file(s), manifest {result.manifest}"
+            )
+        )
@@ -0,0 +1,46 @@
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from insurance_app import prerender
+
+
+class Command(BaseCommand):
+    """
+    Render the anonymous marketing pages to static HTML served by WhiteNoise.
+
+    Run it after `collectstatic`, so the pages link assets by their hashed
+    names, and before the server starts, which indexes the files.
+
+    Example:
+        python manage.py collectstatic --noinput
+        python manage.py prerender_pages
+    """
+
+    help = "Pre-render the anonymous marketing pages into PRERENDER_DIR."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--page",
+            action="append",
+            choices=prerender.PAGES,
+            help="URL name of a page to render (repeatable; default: all).",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if settings.DEBUG:
+            self.stderr.write(
+                self.style.WARNING("DEBUG is on: assets are linked by plain names.")
+            )
+        try:
+            written = prerender.build(options["page"] or prerender.PAGES)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        for path in written:
+            self.stdout.write(f"  {path.relative_to(prerender.output_dir())}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Pre-rendered {len(written)} page(s) into {prerender.output_dir()}"
+            )
+        )
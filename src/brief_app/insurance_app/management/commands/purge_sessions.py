@@ -0,0 +1,51 @@
+from typing import Any
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand, CommandParser
+
+from insurance_app.sessions import purge_expired
+
+
+class Command(BaseCommand):
+    """
+    Delete expired sessions from django_session.
+
+    Rows are deleted in small primary-key batches, so the table is never
+    locked for long while requests keep reading and writing sessions. The
+    command can be interrupted and re-run at any time, e.g. hourly from cron.
+
+    Example:
+        python manage.py purge_sessions --batch-size 1000 --pause 0.1
+    """
+
+    help = "Delete expired sessions in batches."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--batch-size", type=int, default=1000, help="Rows per batch."
+        )
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0.1,
+            help="Seconds to sleep between batches, to limit load.",
+        )
+        parser.add_argument(
+            "--max-rows",
+            type=int,
+            default=None,
+            help="Stop after this many rows (resume on next run).",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        total = 0
+        for rows in purge_expired(
+            Session,
+            batch_size=options["batch_size"],
+            pause=options["pause"],
+            max_rows=options["max_rows"],
+        ):
+            total += rows
+            if options["verbosity"] > 1:
+                self.stdout.write(f"deleted {rows} expired sessions")
+        self.stdout.write(self.style.SUCCESS(f"{total} expired sessions deleted"))
@@ -0,0 +1,40 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from insurance_app.analytics import BATCH_SIZE, SETTLE_SECONDS, refresh_rollups
+
+
+class Command(BaseCommand):
+    """
+    Fold new prediction history into the portfolio analytics rollups.
+
+    Only rows added since the previous run are read, so the command is cheap
+    to schedule every few minutes.
+
+    Example:
+        python manage.py refresh_analytics
+    """
+
+    help = "Incrementally refresh the daily portfolio analytics rollups."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=BATCH_SIZE,
+            help="History rows per transaction.",
+        )
+        parser.add_argument(
+            "--settle-seconds",
+            type=int,
+            default=SETTLE_SECONDS,
+            help="Leave rows younger than this for the next run.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        rows = refresh_rollups(
+            batch_size=options["batch_size"],
+            settle_seconds=options["settle_seconds"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Rolled up {rows} predictions."))
@@ -0,0 +1,45 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from insurance_app import pricing
+from insurance_app.models import UserProfile
+
+
+class Command(BaseCommand):
+    """
+    Re-quote the premium stored on each profile with the current pricing model.
+
+    Run it after rolling out a new model file: profiles quoted by another
+    version are scored in batches, one model call per batch. Profile changes
+    are re-quoted as they are saved and need no run.
+
+    Example:
+        python manage.py refresh_quotes --batch-size 2000
+    """
+
+    help = "Recompute stale UserProfile quotes with the current pricing model."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Re-quote every profile, not only those of other model versions.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=pricing.BATCH_SIZE,
+            help="Profiles scored per model call.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        queryset = UserProfile._base_manager.all() if options["all"] else None
+        refreshed, version = pricing.refresh_quotes(
+            queryset, batch_size=options["batch_size"]
+        )
+        if version is None:
+            raise CommandError("The pricing model could not be loaded.")
+        self.stdout.write(
+            self.style.SUCCESS(f"{refreshed} profile(s) quoted with model {version}")
+        )
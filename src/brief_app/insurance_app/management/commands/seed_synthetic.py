@@ -0,0 +1,125 @@
+import json
+import time
+from typing import Any, Dict
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from insurance_app.synthetic import (
+    BATCH_SIZE,
+    DEFAULT_PASSWORD,
+    Distributions,
+    generate,
+)
+
+
+class Command(BaseCommand):
+    """
+    Fill the database with synthetic users, quotes, appointments and messages.
+
+    Meant for load and scale testing on a disposable database: the same seed
+    always produces the same rows. Distribution settings not exposed as options
+    can be given in a JSON file whose keys are the fields of `Distributions`.
+
+    Example:
+        python manage.py seed_synthetic --users 150000 --seed 42
+    """
+
+    help = "Create synthetic users, prediction history, appointments and messages."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--users", type=int, default=10000, help="Users.")
+        parser.add_argument(
+            "--messages", type=int, default=1000, help="Contact messages."
+        )
+        parser.add_argument(
+            "--availability-days",
+            type=int,
+            default=90,
+            help="Days from today given explicit availability.",
+        )
+        parser.add_argument(
+            "--predictions-per-user",
+            type=float,
+            help="Mean quotes per user (default: 5).",
+        )
+        parser.add_argument(
+            "--appointments-per-user",
+            type=float,
+            help="Mean appointments per user (default: 0.5).",
+        )
+        parser.add_argument(
+            "--smoker-rate", type=float, help="Share of smokers (default: 0.2)."
+        )
+        parser.add_argument(
+            "--history-days",
+            type=int,
+            help="Days quotes and messages are spread over (default: 730).",
+        )
+        parser.add_argument(
+            "--config",
+            help="JSON file of distribution settings, overridden by the options.",
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=BATCH_SIZE,
+            help="Users written per transaction.",
+        )
+        parser.add_argument(
+            "--password",
+            default=DEFAULT_PASSWORD,
+            help="Password shared by every synthetic user.",
+        )
+
+    def _distributions(self, options: Dict[str, Any]) -> Distributions:
+        settings: Dict[str, Any] = {}
+        if options["config"]:
+            try:
+                with open(options["config"]) as config:
+                    settings = json.load(config)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Cannot read {options['config']}: {exc}")
+        for name in (
+            "predictions_per_user",
+            "appointments_per_user",
+            "smoker_rate",
+            "history_days",
+        ):
+            if options[name] is not None:
+                settings[name] = options[name]
+        try:
+            return Distributions.from_dict(settings)
+        except (TypeError, ValueError) as exc:
+            raise CommandError(str(exc))
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        distributions = self._distributions(options)
+        started = time.perf_counter()
+
+        def progress(counts: Dict[str, int]) -> None:
+            if options["verbosity"] > 1:
+                self.stdout.write(
+                    ", ".join(f"{name}: {count}" for name, count in counts.items())
+                )
+
+        counts = generate(
+            users=options["users"],
+            messages=options["messages"],
+            availability_days=options["availability_days"],
+            distributions=distributions,
+            seed=options["seed"],
+            batch_size=options["batch_size"],
+            password=options["password"],
+            progress=progress,
+        )
+        elapsed = time.perf_counter() - started
+        total = sum(counts.values())
+        for name, count in counts.items():
+            self.stdout.write(f"{name}: {count} rows")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{total} rows created in {elapsed:.1f}s "
+                f"({total / max(elapsed, 1e-9):.0f} rows/s)"
+            )
+        )
@@ -0,0 +1,128 @@
+from contextlib import ExitStack
+from typing import Callable
+
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import patch_vary_headers
+from whitenoise.base import WhiteNoise
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from . import prerender, query_budget, routers
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Keeps a client's reads on the primary database for a short while after a write.
+
+    A write anywhere in the request (including the session save) sets a short-lived
+    cookie; while it is present, the router ignores the replicas for that client so
+    freshly saved data (e.g. a new prediction) is visible on the next page despite
+    replication lag. Must sit above `SessionMiddleware` so session writes are seen.
+
+    Attributes:
+        cookie_name (str): Name of the stickiness cookie.
+    """
+
+    cookie_name = "db_primary"
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if not routers.replicas():
+            return self.get_response(request)
+
+        with routers.request_context(pinned=self.cookie_name in request.COOKIES):
+            response = self.get_response(request)
+            if routers.wrote_to_primary():
+                response.set_cookie(
+                    self.cookie_name,
+                    "1",
+                    max_age=settings.DATABASE_REPLICA_STICKY_SECONDS,
+                    httponly=True,
+                    samesite="Lax",
+                )
+        return response
+
+
+class QueryBudgetMiddleware:
+    """
+    Counts the queries and database time of each request against its budget.
+
+    Every connection is wrapped while the request runs, so the count includes
+    session and user lookups as well as template rendering. The totals are
+    reported in a `Server-Timing` header, checked against the budget of the
+    resolved URL name and slow SELECTs are explained into the staff query log
+    (see `insurance_app.query_budget`). Should be the outermost middleware.
+    """
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        recorder = query_budget.QueryRecorder(
+            slow_seconds=settings.SLOW_QUERY_MS / 1000
+        )
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+
+        match = request.resolver_match
+        view = match.view_name if match else None
+        response["Server-Timing"] = (
+            f'db;dur={recorder.seconds * 1000:.1f};desc="{recorder.count} queries"'
+        )
+        query_budget.capture_slow_queries(view, request.path, recorder)
+        query_budget.check_budget(view, request.path, recorder)
+        return response
+
+
+class PrerenderedPageMiddleware(WhiteNoise):
+    """
+    Serves the pre-rendered marketing pages to anonymous visitors.
+
+    A GET or HEAD without a session or messages cookie cannot be authenticated
+    and has nothing to show but the page, so it is answered by WhiteNoise from
+    the file written by `manage.py prerender_pages` (see
+    `insurance_app.prerender`), before the session, auth, CSRF and messages
+    middleware run. Other requests, and pages with no file, go on to the view.
+
+    The HTML is cached for `PRERENDER_MAX_AGE` seconds and varies on Cookie,
+    so a visitor who logs in does not get the cached anonymous page. Files are
+    indexed when the process starts; the middleware is dropped if there are
+    none. Must sit below SecurityMiddleware and above SessionMiddleware.
+    """
+
+    skip_cookies = (settings.SESSION_COOKIE_NAME, CookieStorage.cookie_name)
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]) -> None:
+        super().__init__(
+            None,
+            max_age=settings.PRERENDER_MAX_AGE,
+            index_file=True,
+            add_headers_function=self.add_page_headers,
+        )
+        self.get_response = get_response
+        if prerender.output_dir().is_dir():
+            self.add_files(str(prerender.output_dir()))
+        if not self.files:
+            raise MiddlewareNotUsed
+
+    @staticmethod
+    def add_page_headers(headers, path: str, url: str) -> None:
+        headers["X-Frame-Options"] = settings.X_FRAME_OPTIONS
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if request.method in ("GET", "HEAD") and not any(
+            name in request.COOKIES for name in self.skip_cookies
+        ):
+            page = self.files.get(request.path_info)
+            if page is not None:
+                response = WhiteNoiseMiddleware.serve(page, request)
+                patch_vary_headers(response, ("Cookie",))
+                return response
+        return self.get_response(request)
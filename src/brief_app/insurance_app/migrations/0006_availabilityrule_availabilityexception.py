@@ -0,0 +1,75 @@
+# Generated by Django 5.2.1 on 2026-10-19 17:46
+
+import datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("insurance_app", "0005_availability"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AvailabilityRule",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "weekday",
+                    models.PositiveSmallIntegerField(
+                        choices=[
+                            (0, "Monday"),
+                            (1, "Tuesday"),
+                            (2, "Wednesday"),
+                            (3, "Thursday"),
+                            (4, "Friday"),
+                            (5, "Saturday"),
+                            (6, "Sunday"),
+                        ]
+                    ),
+                ),
+                ("time_slots", models.JSONField(default=list)),
+                ("valid_from", models.DateField(default=datetime.date.today)),
+                ("valid_until", models.DateField(blank=True, null=True)),
+            ],
+            options={
+                "ordering": ["weekday", "valid_from"],
+            },
+        ),
+        migrations.CreateModel(
+            name="AvailabilityException",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("start_date", models.DateField()),
+                ("end_date", models.DateField()),
+                ("blocked_slots", models.JSONField(blank=True, default=list)),
+                ("reason", models.CharField(blank=True, max_length=255)),
+            ],
+            options={
+                "ordering": ["start_date"],
+                "indexes": [
+                    models.Index(
+                        fields=["start_date", "end_date"],
+                        name="insurance_a_start_d_b7bf6e_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.1 on 2026-10-19 17:53
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("insurance_app", "0006_availabilityrule_availabilityexception"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="predictionhistory",
+            name="user",
+            field=models.ForeignKey(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="insurance_predictions",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+    ]
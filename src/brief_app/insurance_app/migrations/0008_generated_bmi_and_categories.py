@@ -0,0 +1,435 @@
+# Generated by Django 5.2.1 on 2026-10-19 18:05
+
+import django.db.models.expressions
+import django.db.models.lookups
+import insurance_app.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("insurance_app", "0007_predictionhistory_user_no_db_constraint"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="predictionhistory",
+            name="age_category",
+            field=insurance_app.models.StoredGeneratedField(
+                db_persist=True,
+                expression=models.Case(
+                    models.When(
+                        models.Q(("age__gt", 18), ("age__lt", 26)),
+                        then=models.Value("young_adult"),
+                    ),
+                    models.When(
+                        models.Q(("age__gte", 26), ("age__lt", 36)),
+                        then=models.Value("early_adulthood"),
+                    ),
+                    models.When(
+                        models.Q(("age__gte", 36), ("age__lt", 46)),
+                        then=models.Value("mid_adulthood"),
+                    ),
+                    default=models.Value("late_adulthood"),
+                ),
+                output_field=models.CharField(
+                    choices=[
+                        ("young_adult", "Young adult"),
+                        ("early_adulthood", "Early adulthood"),
+                        ("mid_adulthood", "Mid adulthood"),
+                        ("late_adulthood", "Late adulthood"),
+                    ],
+                    max_length=20,
+                ),
+            ),
+        ),
+        migrations.AddField(
+            model_name="predictionhistory",
+            name="bmi",
+            field=insurance_app.models.StoredGeneratedField(
+                db_persist=True,
+                expression=models.Case(
+                    models.When(height__lte=0, then=models.Value(0.0)),
+                    default=django.db.models.expressions.CombinedExpression(
+                        django.db.models.expressions.CombinedExpression(
+                            django.db.models.expressions.CombinedExpression(
+                                django.db.models.expressions.CombinedExpression(
+                                    models.F("weight"), "*", models.Value(200000)
+                                ),
+                                "+",
+                                django.db.models.expressions.CombinedExpression(
+                                    models.F("height"), "*", models.F("height")
+                                ),
+                            ),
+                            "/",
+                            django.db.models.expressions.CombinedExpression(
+                                django.db.models.expressions.CombinedExpression(
+                                    models.Value(2), "*", models.F("height")
+                                ),
+                                "*",
+                                models.F("height"),
+                            ),
+                        ),
+                        "/",
+                        models.Value(10.0),
+                    ),
+                    output_field=models.FloatField(),
+                ),
+                output_field=models.FloatField(),
+            ),
+        ),
+        migrations.AddField(
+            model_name="predictionhistory",
+            name="bmi_category",
+            field=insurance_app.models.StoredGeneratedField(
+                db_persist=True,
+                expression=models.Case(
+                    models.When(
+                        django.db.models.lookups.LessThan(
+                            models.Case(
+                                models.When(height__lte=0, then=models.Value(0.0)),
+                                default=django.db.models.expressions.CombinedExpression(
+                                    django.db.models.expressions.CombinedExpression(
+                                        django.db.models.expressions.CombinedExpression(
+                                            django.db.models.expressions.CombinedExpression(
+                                                models.F("weight"),
+                                                "*",
+                                                models.Value(200000),
+                                            ),
+                                            "+",
+                                            django.db.models.expressions.CombinedExpression(
+                                                models.F("height"),
+                                                "*",
+                                                models.F("height"),
+                                            ),
+                                        ),
+                                        "/",
+                                        django.db.models.expressions.CombinedExpression(
+                                            django.db.models.expressions.CombinedExpression(
+                                                models.Value(2), "*", models.F("height")
+                                            ),
+                                            "*",
+                                            models.F("height"),
+                                        ),
+                                    ),
+                                    "/",
+                                    models.Value(10.0),
+                                ),
+                                output_field=models.FloatField(),
+                            ),
+                            18.5,
+                        ),
+                        then=models.Value("under_weight"),
+                    ),
+                    models.When(
+                        django.db.models.lookups.LessThan(
+                            models.Case(
+                                models.When(height__lte=0, then=models.Value(0.0)),
+                                default=django.db.models.expressions.CombinedExpression(
+                                    django.db.models.expressions.CombinedExpression(
+                                        django.db.models.expressions.CombinedExpression(
+                                            django.db.models.expressions.CombinedExpression(
+                                                models.F("weight"),
+                                                "*",
+                                                models.Value(200000),
+                                            ),
+                                            "+",
+                                            django.db.models.expressions.CombinedExpression(
+                                                models.F("height"),
+                                                "*",
+                                                models.F("height"),
+                                            ),
+                                        ),
+                                        "/",
+                                        django.db.models.expressions.CombinedExpression(
+                                            django.db.models.expressions.CombinedExpression(
+                                                models.Value(2), "*", models.F("height")
+                                            ),
+                                            "*",
+                                            models.F("height"),
+                                        ),
+                                    ),
+                                    "/",
+                                    models.Value(10.0),
+                                ),
+                                output_field=models.FloatField(),
+                            ),
+                            25,
+                        ),
+                        then=models.Value("normal_weight"),
+                    ),
+                    models.When(
+                        django.db.models.lookups.LessThan(
+                            models.Case(
+                                models.When(height__lte=0, then=models.Value(0.0)),
+                                default=django.db.models.expressions.CombinedExpression(
+                                    django.db.models.expressions.CombinedExpression(
+                                        django.db.models.expressions.CombinedExpression(
+                                            django.db.models.expressions.CombinedExpression(
+                                                models.F("weight"),
+                                                "*",
+                                                models.Value(200000),
+                                            ),
+                                            "+",
+                                            django.db.models.expressions.CombinedExpression(
+                                                models.F("height"),
+                                                "*",
+                                                models.F("height"),
+                                            ),
+                                        ),
+                                        "/",
+                                        django.db.models.expressions.CombinedExpression(
+                                            django.db.models.expressions.CombinedExpression(
+                                                models.Value(2), "*", models.F("height")
+                                            ),
+                                            "*",
+                                            models.F("height"),
+                                        ),
+                                    ),
+                                    "/",
+                                    models.Value(10.0),
+                                ),
+                                output_field=models.FloatField(),
+                            ),
+                            30,
+                        ),
+                        then=models.Value("over_weight"),
+                    ),
+                    default=models.Value("obese"),
+                ),
+                output_field=models.CharField(
+                    choices=[
+                        ("under_weight", "Under weight"),
+                        ("normal_weight", "Normal weight"),
+                        ("over_weight", "Over weight"),
+                        ("obese", "Obese"),
+                    ],
+                    max_length=20,
+                ),
+            ),
+        ),
+        migrations.AddField(
+            model_name="userprofile",
+            name="age_category",
+            field=insurance_app.models.StoredGeneratedField(
+                db_persist=True,
+                expression=models.Case(
+                    models.When(
+                        models.Q(("age__gt", 18), ("age__lt", 26)),
+                        then=models.Value("young_adult"),
+                    ),
+                    models.When(
+                        models.Q(("age__gte", 26), ("age__lt", 36)),
+                        then=models.Value("early_adulthood"),
+                    ),
+                    models.When(
+                        models.Q(("age__gte", 36), ("age__lt", 46)),
+                        then=models.Value("mid_adulthood"),
+                    ),
+                    default=models.Value("late_adulthood"),
+                ),
+                output_field=models.CharField(
+                    choices=[
+                        ("young_adult", "Young adult"),
+                        ("early_adulthood", "Early adulthood"),
+                        ("mid_adulthood", "Mid adulthood"),
+                        ("late_adulthood", "Late adulthood"),
+                    ],
+                    max_length=20,
+                ),
+            ),
+        ),
+        migrations.AddField(
+            model_name="userprofile",
+            name="bmi",
+            field=insurance_app.models.StoredGeneratedField(
+                db_persist=True,
+                expression=models.Case(
+                    models.When(height__lte=0, then=models.Value(0.0)),
+                    default=django.db.models.expressions.CombinedExpression(
+                        django.db.models.expressions.CombinedExpression(
+                            django.db.models.expressions.CombinedExpression(
+                                django.db.models.expressions.CombinedExpression(
+                                    models.F("weight"), "*", models.Value(200000)
+                                ),
+                                "+",
+                                django.db.models.expressions.CombinedExpression(
+                                    models.F("height"), "*", models.F("height")
+                                ),
+                            ),
+                            "/",
+                            django.db.models.expressions.CombinedExpression(
+                                django.db.models.expressions.CombinedExpression(
+                                    models.Value(2), "*", models.F("height")
+                                ),
+                                "*",
+                                models.F("height"),
+                            ),
+                        ),
+                        "/",
+                        models.Value(10.0),
+                    ),
+                    output_field=models.FloatField(),
+                ),
+                output_field=models.FloatField(),
+            ),
+        ),
+        migrations.AddField(
+            model_name="userprofile",
+            name="bmi_category",
+            field=insurance_app.models.StoredGeneratedField(
+                db_persist=True,
+                expression=models.Case(
+                    models.When(
+                        django.db.models.lookups.LessThan(
+                            models.Case(
+                                models.When(height__lte=0, then=models.Value(0.0)),
+                                default=django.db.models.expressions.CombinedExpression(
+                                    django.db.models.expressions.CombinedExpression(
+                                        django.db.models.expressions.CombinedExpression(
+                                            django.db.models.expressions.CombinedExpression(
+                                                models.F("weight"),
+                                                "*",
+                                                models.Value(200000),
+                                            ),
+                                            "+",
+                                            django.db.models.expressions.CombinedExpression(
+                                                models.F("height"),
+                                                "*",
+                                                models.F("height"),
+                                            ),
+                                        ),
+                                        "/",
+                                        django.db.models.expressions.CombinedExpression(
+                                            django.db.models.expressions.CombinedExpression(
+                                                models.Value(2), "*", models.F("height")
+                                            ),
+                                            "*",
+                                            models.F("height"),
+                                        ),
+                                    ),
+                                    "/",
+                                    models.Value(10.0),
+                                ),
+                                output_field=models.FloatField(),
+                            ),
+                            18.5,
+                        ),
+                        then=models.Value("under_weight"),
+                    ),
+                    models.When(
+                        django.db.models.lookups.LessThan(
+                            models.Case(
+                                models.When(height__lte=0, then=models.Value(0.0)),
+                                default=django.db.models.expressions.CombinedExpression(
+                                    django.db.models.expressions.CombinedExpression(
+                                        django.db.models.expressions.CombinedExpression(
+                                            django.db.models.expressions.CombinedExpression(
+                                                models.F("weight"),
+                                                "*",
+                                                models.Value(200000),
+                                            ),
+                                            "+",
+                                            django.db.models.expressions.CombinedExpression(
+                                                models.F("height"),
+                                                "*",
+                                                models.F("height"),
+                                            ),
+                                        ),
+                                        "/",
+                                        django.db.models.expressions.CombinedExpression(
+                                            django.db.models.expressions.CombinedExpression(
+                                                models.Value(2), "*", models.F("height")
+                                            ),
+                                            "*",
+                                            models.F("height"),
+                                        ),
+                                    ),
+                                    "/",
+                                    models.Value(10.0),
+                                ),
+                                output_field=models.FloatField(),
+                            ),
+                            25,
+                        ),
+                        then=models.Value("normal_weight"),
+                    ),
+                    models.When(
+                        django.db.models.lookups.LessThan(
+                            models.Case(
+                                models.When(height__lte=0, then=models.Value(0.0)),
+                                default=django.db.models.expressions.CombinedExpression(
+                                    django.db.models.expressions.CombinedExpression(
+                                        django.db.models.expressions.CombinedExpression(
+                                            django.db.models.expressions.CombinedExpression(
+                                                models.F("weight"),
+                                                "*",
+                                                models.Value(200000),
+                                            ),
+                                            "+",
+                                            django.db.models.expressions.CombinedExpression(
+                                                models.F("height"),
+                                                "*",
+                                                models.F("height"),
+                                            ),
+                                        ),
+                                        "/",
+                                        django.db.models.expressions.CombinedExpression(
+                                            django.db.models.expressions.CombinedExpression(
+                                                models.Value(2), "*", models.F("height")
+                                            ),
+                                            "*",
+                                            models.F("height"),
+                                        ),
+                                    ),
+                                    "/",
+                                    models.Value(10.0),
+                                ),
+                                output_field=models.FloatField(),
+                            ),
+                            30,
+                        ),
+                        then=models.Value("over_weight"),
+                    ),
+                    default=models.Value("obese"),
+                ),
+                output_field=models.CharField(
+                    choices=[
+                        ("under_weight", "Under weight"),
+                        ("normal_weight", "Normal weight"),
+                        ("over_weight", "Over weight"),
+                        ("obese", "Obese"),
+                    ],
+                    max_length=20,
+                ),
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="predictionhistory",
+            index=models.Index(
+                fields=["bmi_category", "predicted_charges"],
+                name="insurance_a_bmi_cat_142163_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="predictionhistory",
+            index=models.Index(
+                fields=["age_category", "predicted_charges"],
+                name="insurance_a_age_cat_417447_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="userprofile",
+            index=models.Index(
+                fields=["bmi_category"], name="insurance_a_bmi_cat_e57884_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="userprofile",
+            index=models.Index(
+                fields=["age_category"], name="insurance_a_age_cat_aff167_idx"
+            ),
+        ),
+    ]
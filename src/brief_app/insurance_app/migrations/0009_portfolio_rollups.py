@@ -0,0 +1,82 @@
+# Generated by Django 5.2.1 on 2026-10-19 18:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("insurance_app", "0008_generated_bmi_and_categories"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RollupCheckpoint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("source", models.CharField(max_length=50, unique=True)),
+                ("last_id", models.PositiveBigIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="PortfolioRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "grain",
+                    models.CharField(
+                        choices=[("day", "Day"), ("month", "Month")],
+                        default="day",
+                        max_length=5,
+                    ),
+                ),
+                ("day", models.DateField()),
+                (
+                    "dimension",
+                    models.CharField(
+                        choices=[
+                            ("all", "All"),
+                            ("region", "Region"),
+                            ("smoker", "Smoker"),
+                            ("sex", "Sex"),
+                            ("age_category", "Age category"),
+                            ("bmi_category", "BMI category"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("value", models.CharField(blank=True, max_length=20)),
+                ("count", models.PositiveBigIntegerField(default=0)),
+                (
+                    "total_charges",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=20),
+                ),
+                ("sketch", models.JSONField(default=dict)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("dimension", "grain", "day", "value"),
+                        name="unique_rollup_bucket",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.1 on 2026-10-19 18:27
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+USERNAME_SEARCH_INDEX = "insurance_app_userprofile_username_ci"
+
+# Case-insensitive prefix searches on the username ("^username" in the admin)
+# compile to `username LIKE 'abc%'` on SQLite, which only uses an index with
+# NOCASE collation, and to `UPPER(username::text) LIKE UPPER('abc%')` on
+# PostgreSQL. Neither can be declared portably in Meta.indexes.
+USERNAME_SEARCH_SQL = {
+    "sqlite": (
+        f"CREATE INDEX IF NOT EXISTS {USERNAME_SEARCH_INDEX} "
+        "ON insurance_app_userprofile (username COLLATE NOCASE)"
+    ),
+    "postgresql": (
+        f"CREATE INDEX IF NOT EXISTS {USERNAME_SEARCH_INDEX} "
+        "ON insurance_app_userprofile (UPPER(username::text) text_pattern_ops)"
+    ),
+}
+
+
+def create_username_search_index(apps, schema_editor):
+    sql = USERNAME_SEARCH_SQL.get(schema_editor.connection.vendor)
+    if sql:
+        schema_editor.execute(sql)
+
+
+def drop_username_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in USERNAME_SEARCH_SQL:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {USERNAME_SEARCH_INDEX}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("insurance_app", "0009_portfolio_rollups"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(
+                fields=["user", "date"], name="insurance_a_user_id_e72b20_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(fields=["date"], name="insurance_a_date_70f574_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="contactmessage",
+            index=models.Index(
+                fields=["-submitted_at"], name="insurance_a_submitt_a25679_idx"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="appointment",
+            name="user",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.RunPython(create_username_search_index, drop_username_search_index),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.1 on 2026-10-19 18:33
+
+from django.db import migrations, models
+
+EMAIL_SEARCH_INDEX = "insurance_app_contactmessage_email_ci"
+
+# Like the username index of 0010: "^email" in the admin is a case-insensitive
+# prefix search, which needs a NOCASE (SQLite) or UPPER() (PostgreSQL) index.
+EMAIL_SEARCH_SQL = {
+    "sqlite": (
+        f"CREATE INDEX IF NOT EXISTS {EMAIL_SEARCH_INDEX} "
+        "ON insurance_app_contactmessage (email COLLATE NOCASE)"
+    ),
+    "postgresql": (
+        f"CREATE INDEX IF NOT EXISTS {EMAIL_SEARCH_INDEX} "
+        "ON insurance_app_contactmessage (UPPER(email::text) text_pattern_ops)"
+    ),
+}
+
+
+def create_email_search_index(apps, schema_editor):
+    sql = EMAIL_SEARCH_SQL.get(schema_editor.connection.vendor)
+    if sql:
+        schema_editor.execute(sql)
+
+
+def drop_email_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in EMAIL_SEARCH_SQL:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {EMAIL_SEARCH_INDEX}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("insurance_app", "0010_hot_query_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="predictionhistory",
+            index=models.Index(
+                fields=["timestamp"], name="insurance_a_timesta_c5cc44_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="userprofile",
+            index=models.Index(
+                fields=["date_joined"], name="insurance_a_date_jo_164807_idx"
+            ),
+        ),
+        migrations.RunPython(create_email_search_index, drop_email_search_index),
+    ]
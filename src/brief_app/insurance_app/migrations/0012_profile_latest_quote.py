@@ -0,0 +1,48 @@
+# Generated by Django 5.2.1 on 2026-10-19 19:03
+
+from django.db import migrations, models
+
+USERNAME_SEARCH_INDEX = "insurance_app_userprofile_username_ci"
+
+
+def restore_username_search_index(apps, schema_editor):
+    # SQLite adds NOT NULL columns by rebuilding the table, which drops the
+    # username search index created with raw SQL in 0010_hot_query_indexes.
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {USERNAME_SEARCH_INDEX} "
+            "ON insurance_app_userprofile (username COLLATE NOCASE)"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("insurance_app", "0011_admin_changelist_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userprofile",
+            name="quote_inputs",
+            field=models.CharField(blank=True, editable=False, max_length=32),
+        ),
+        migrations.AddField(
+            model_name="userprofile",
+            name="quote_model_version",
+            field=models.CharField(blank=True, editable=False, max_length=12),
+        ),
+        migrations.AddField(
+            model_name="userprofile",
+            name="quoted_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="userprofile",
+            name="quoted_charges",
+            field=models.DecimalField(
+                blank=True, decimal_places=2, editable=False, max_digits=10, null=True
+            ),
+        ),
+        migrations.RunPython(restore_username_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.1 on 2026-10-19 19:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("insurance_app", "0012_profile_latest_quote"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="predictionhistory",
+            name="inputs_hash",
+            field=models.CharField(blank=True, editable=False, max_length=32),
+        ),
+        migrations.AddField(
+            model_name="predictionhistory",
+            name="repeat_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name="predictionhistory",
+            index=models.Index(
+                fields=["user", "inputs_hash", "timestamp"],
+                name="insurance_a_user_id_f901c6_idx",
+            ),
+        ),
+    ]
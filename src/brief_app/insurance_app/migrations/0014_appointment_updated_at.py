@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-19 19:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("insurance_app", "0013_prediction_repeats"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="appointment",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(
+                fields=["user", "updated_at"], name="insurance_a_user_id_73047b_idx"
+            ),
+        ),
+    ]
@@ -1,14 +1,167 @@
 from __future__ import annotations
-from typing import List, Tuple
-from datetime import date
+from typing import Any, List, Optional, Tuple
+from datetime import date, datetime
 
 from django.db import models
 from django.contrib.auth.models import AbstractUser
-from django.db.models import Manager
+from django.db.models import Avg, Case, Count, F, Manager, Q, Sum, Value, When
+from django.db.models.lookups import LessThan
+from django.db.models.query_utils import DeferredAttribute
 from django.contrib.auth import get_user_model
 
 
-class UserProfile(AbstractUser):
+class BmiCategory(models.TextChoices):
+    UNDER_WEIGHT = "under_weight", "Under weight"
+    NORMAL_WEIGHT = "normal_weight", "Normal weight"
+    OVER_WEIGHT = "over_weight", "Over weight"
+    OBESE = "obese", "Obese"
+
+
+class AgeCategory(models.TextChoices):
+    YOUNG_ADULT = "young_adult", "Young adult"
+    EARLY_ADULTHOOD = "early_adulthood", "Early adulthood"
+    MID_ADULTHOOD = "mid_adulthood", "Mid adulthood"
+    LATE_ADULTHOOD = "late_adulthood", "Late adulthood"
+
+
+def compute_bmi(weight: int, height: int) -> float:
+    """
+    BMI rounded half up to one decimal, 0.0 when the height is not positive.
+
+    The rounding is done in integer arithmetic so that the database, which
+    stores the same value in the generated `bmi` columns, agrees exactly.
+    """
+    if height <= 0:
+        return 0.0
+    return (weight * 200000 + height * height) // (2 * height * height) / 10
+
+
+def categorize_bmi(bmi: float) -> str:
+    """Weight category of a BMI, as used by the pricing model."""
+    if bmi < 18.5:
+        return BmiCategory.UNDER_WEIGHT.value
+    elif bmi < 25:
+        return BmiCategory.NORMAL_WEIGHT.value
+    elif bmi < 30:
+        return BmiCategory.OVER_WEIGHT.value
+    return BmiCategory.OBESE.value
+
+
+def categorize_age(age: int) -> str:
+    """Life stage of an age, as used by the pricing model."""
+    if 18 < age < 26:
+        return AgeCategory.YOUNG_ADULT.value
+    elif 26 <= age < 36:
+        return AgeCategory.EARLY_ADULTHOOD.value
+    elif 36 <= age < 46:
+        return AgeCategory.MID_ADULTHOOD.value
+    return AgeCategory.LATE_ADULTHOOD.value
+
+
+# SQL counterparts of the functions above, evaluated by the database into stored
+# columns. A generated column cannot refer to another one, so the categories
+# repeat the BMI expression.
+BMI_EXPRESSION = Case(
+    When(height__lte=0, then=Value(0.0)),
+    default=(F("weight") * 200000 + F("height") * F("height"))
+    / (2 * F("height") * F("height"))
+    / 10.0,
+    output_field=models.FloatField(),
+)
+BMI_CATEGORY_EXPRESSION = Case(
+    When(LessThan(BMI_EXPRESSION, 18.5), then=Value(BmiCategory.UNDER_WEIGHT)),
+    When(LessThan(BMI_EXPRESSION, 25), then=Value(BmiCategory.NORMAL_WEIGHT)),
+    When(LessThan(BMI_EXPRESSION, 30), then=Value(BmiCategory.OVER_WEIGHT)),
+    default=Value(BmiCategory.OBESE),
+)
+AGE_CATEGORY_EXPRESSION = Case(
+    When(Q(age__gt=18, age__lt=26), then=Value(AgeCategory.YOUNG_ADULT)),
+    When(Q(age__gte=26, age__lt=36), then=Value(AgeCategory.EARLY_ADULTHOOD)),
+    When(Q(age__gte=36, age__lt=46), then=Value(AgeCategory.MID_ADULTHOOD)),
+    default=Value(AgeCategory.LATE_ADULTHOOD),
+)
+
+
+class GeneratedAttribute(DeferredAttribute):
+    """
+    Access to a generated column.
+
+    Before the row is saved the value is computed in Python. Afterwards a
+    missing value is read back from the database, together with every other
+    generated column that is missing, in a single query.
+    """
+
+    def __get__(self, instance: Any, cls: Any = None) -> Any:
+        if instance is None or self.field.attname in instance.__dict__:
+            return super().__get__(instance, cls)
+        if instance._state.adding:
+            return self.field.compute(instance)
+        instance.refresh_from_db(
+            fields=[
+                field.attname
+                for field in instance._meta.concrete_fields
+                if field.generated and field.attname not in instance.__dict__
+            ]
+        )
+        return instance.__dict__[self.field.attname]
+
+
+class StoredGeneratedField(models.GeneratedField):
+    """
+    A stored `GeneratedField` with a Python fallback for unsaved instances.
+
+    Args:
+        compute (callable): Returns the value for an instance, mirroring
+            `expression`.
+    """
+
+    descriptor_class = GeneratedAttribute
+
+    def __init__(self, *, compute: Any = None, **kwargs: Any) -> None:
+        self.compute = compute
+        kwargs.setdefault("db_persist", True)
+        super().__init__(**kwargs)
+
+
+class GeneratedColumnsMixin:
+    """Keeps generated columns in sync with the fields they derive from."""
+
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        adding = self._state.adding
+        super().save(*args, **kwargs)  # type: ignore[misc]
+        if not adding:
+            # Generated values are only read back on INSERT; drop the stale ones
+            # so the next access reloads them from the database.
+            for field in self._meta.concrete_fields:  # type: ignore[attr-defined]
+                if field.generated:
+                    self.__dict__.pop(field.attname, None)
+
+
+def bmi_field() -> StoredGeneratedField:
+    return StoredGeneratedField(
+        expression=BMI_EXPRESSION,
+        output_field=models.FloatField(),
+        compute=lambda obj: compute_bmi(obj.weight, obj.height),
+    )
+
+
+def bmi_category_field() -> StoredGeneratedField:
+    return StoredGeneratedField(
+        expression=BMI_CATEGORY_EXPRESSION,
+        output_field=models.CharField(max_length=20, choices=BmiCategory.choices),
+        compute=lambda obj: categorize_bmi(compute_bmi(obj.weight, obj.height)),
+    )
+
+
+def age_category_field() -> StoredGeneratedField:
+    return StoredGeneratedField(
+        expression=AGE_CATEGORY_EXPRESSION,
+        output_field=models.CharField(max_length=20, choices=AgeCategory.choices),
+        compute=lambda obj: categorize_age(obj.age),
+    )
+
+
+class UserProfile(GeneratedColumnsMixin, AbstractUser):
     """Extends the default Django user model to include additional personal information
     for users, including physical attributes and lifestyle choices.
 
@@ -20,10 +173,16 @@ class UserProfile(AbstractUser):
         smoker (CharField): Whether the user is a smoker ('Yes' or 'No').
         region (CharField): Geographical region.
         sex (CharField): Sex ('Male' or 'Female').
+        bmi (GeneratedField): BMI stored by the database, 0.0 for a zero height.
+        bmi_category (GeneratedField): Weight category of the BMI.
+        age_category (GeneratedField): Life stage of the age.
+        quoted_charges (DecimalField): Latest premium quoted for the pricing
+            inputs above, kept current by `insurance_app.pricing`.
+        quote_model_version (CharField): Pricing model version of the quote.
+        quote_inputs (CharField): Digest of the pricing inputs of the quote.
+        quoted_at (DateTimeField): When the quote was computed.
 
     Methods:
-        bmi (property) -> float:
-            Calculates BMI safely with zero division protection.
         __str__() -> str:
             String representation of the user profile.
     """
@@ -63,18 +222,91 @@ class UserProfile(AbstractUser):
         max_length=10, choices=SexType.choices, blank=False
     )
 
-    @property
-    def bmi(self) -> float:
-        """Calculate BMI safely with zero division protection."""
-        if self.height <= 0:
-            return 0.0
-        return round(self.weight / ((self.height / 100) ** 2), 1)
+    bmi: StoredGeneratedField = bmi_field()
+    bmi_category: StoredGeneratedField = bmi_category_field()
+    age_category: StoredGeneratedField = age_category_field()
+
+    quoted_charges: models.DecimalField = models.DecimalField(
+        max_digits=10, decimal_places=2, null=True, blank=True, editable=False
+    )
+    quote_model_version: models.CharField = models.CharField(
+        max_length=12, blank=True, editable=False
+    )
+    quote_inputs: models.CharField = models.CharField(
+        max_length=32, blank=True, editable=False
+    )
+    quoted_at: models.DateTimeField = models.DateTimeField(
+        null=True, blank=True, editable=False
+    )
+
+    class Meta(AbstractUser.Meta):
+        indexes: List[models.Index] = [
+            models.Index(fields=["bmi_category"]),
+            models.Index(fields=["age_category"]),
+            # Date drill-down of the admin changelist.
+            models.Index(fields=["date_joined"]),
+        ]
 
     def __str__(self) -> str:
         return self.username
 
 
-class PredictionHistory(models.Model):
+class PredictionHistoryQuerySet(models.QuerySet):
+    """QuerySet for `PredictionHistory` aware of per-user sharding."""
+
+    def for_user(self, user: UserProfile) -> PredictionHistoryQuerySet:
+        """Predictions of `user`, read from the database that holds them."""
+        from .sharding import shard_for_user
+
+        queryset = self.filter(user=user)
+        if alias := shard_for_user(user.pk):
+            queryset = queryset.using(alias)
+        return queryset
+
+    def create(self, **kwargs: Any) -> PredictionHistory:
+        """Create the row on the shard of its user unless a database was chosen."""
+        from .sharding import shard_for_user
+
+        if self._db is None:
+            user = kwargs.get("user")
+            user_id = user.pk if user is not None else kwargs.get("user_id")
+            if alias := shard_for_user(user_id):
+                return self.using(alias).create(**kwargs)
+        return super().create(**kwargs)
+
+    def latest_repeat(
+        self, inputs_hash: str, since: datetime
+    ) -> Optional[PredictionHistory]:
+        """The latest prediction with `inputs_hash` made since `since`, if any."""
+        return (
+            self.filter(inputs_hash=inputs_hash, timestamp__gte=since)
+            .order_by("-timestamp")
+            .first()
+        )
+
+    def category_summary(self, field: str) -> models.QuerySet:
+        """
+        Count, total and average premium per value of a category column, in SQL.
+
+        Args:
+            field (str): "bmi_category" or "age_category".
+
+        Returns:
+            QuerySet: Dicts with `field`, `count`, `total_charges` and
+            `average_charges`.
+        """
+        return (
+            self.order_by(field)
+            .values(field)
+            .annotate(
+                count=Count("id"),
+                total_charges=Sum("predicted_charges"),
+                average_charges=Avg("predicted_charges"),
+            )
+        )
+
+
+class PredictionHistory(GeneratedColumnsMixin, models.Model):
     """
     Represents a record of an insurance prediction for a user.
 
@@ -84,16 +316,26 @@ class PredictionHistory(models.Model):
         age, weight, height, num_children (PositiveIntegerField): User state.
         smoker, region, sex (CharField): User state.
         predicted_charges (DecimalField): Insurance charges prediction.
+        bmi, bmi_category, age_category (GeneratedField): Stored by the database
+            from the historical state, so they can be filtered and grouped in SQL.
+        inputs_hash (CharField): Digest of the pricing inputs and model version,
+            matching identical resubmissions (see `pricing.record_prediction`).
+        repeat_count (PositiveIntegerField): Identical resubmissions folded into
+            this row instead of being logged again.
+
+    The user foreign key carries no database constraint because rows may live on
+    a different database than the user (see `insurance_app.sharding`).
 
     Methods:
-        bmi (property) -> float:
-            Historical BMI calculation.
         __str__() -> str:
             String representation with user and timestamp.
     """
 
     user: models.ForeignKey[UserProfile] = models.ForeignKey(
-        UserProfile, on_delete=models.CASCADE, related_name="insurance_predictions"
+        UserProfile,
+        on_delete=models.CASCADE,
+        related_name="insurance_predictions",
+        db_constraint=False,
     )
     timestamp: models.DateTimeField = models.DateTimeField(auto_now_add=True)
 
@@ -109,18 +351,33 @@ class PredictionHistory(models.Model):
         max_digits=10, decimal_places=2, help_text="Predicted insurance charges in USD"
     )
 
+    bmi: StoredGeneratedField = bmi_field()
+    bmi_category: StoredGeneratedField = bmi_category_field()
+    age_category: StoredGeneratedField = age_category_field()
+
+    inputs_hash: models.CharField = models.CharField(
+        max_length=32, blank=True, editable=False
+    )
+    repeat_count: models.PositiveIntegerField = models.PositiveIntegerField(
+        default=0, editable=False
+    )
+
+    objects = PredictionHistoryQuerySet.as_manager()
+
     class Meta:
         ordering: List[str] = ["-timestamp"]
         verbose_name: str = "Insurance Prediction"
         verbose_name_plural: str = "Insurance Predictions"
-        indexes: List[models.Index] = [models.Index(fields=["user", "-timestamp"])]
-
-    @property
-    def bmi(self) -> float:
-        """Historical BMI calculation."""
-        if self.height <= 0:
-            return 0.0
-        return round(self.weight / ((self.height / 100) ** 2), 1)
+        indexes: List[models.Index] = [
+            models.Index(fields=["user", "-timestamp"]),
+            # Admin changelist order and date drill-down.
+            models.Index(fields=["timestamp"]),
+            # Covering indexes for per-category premium aggregates.
+            models.Index(fields=["bmi_category", "predicted_charges"]),
+            models.Index(fields=["age_category", "predicted_charges"]),
+            # Lookup of a user's latest identical submission.
+            models.Index(fields=["user", "inputs_hash", "timestamp"]),
+        ]
 
     def __str__(self) -> str:
         return f"{self.user} prediction @ {self.timestamp:%Y-%m-%d}"
@@ -161,12 +418,21 @@ class ContactMessage(models.Model):
     message: models.TextField = models.TextField()
     submitted_at: models.DateTimeField = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes: List[models.Index] = [
+            # Staff message list, newest first; also the archive cutoff.
+            models.Index(fields=["-submitted_at"]),
+        ]
+
     def __str__(self) -> str:
         return f"Message from {self.name} ({self.email})"
 
 
 class Availability(models.Model):
-    """Availability of time slots for a specific date."""
+    """Explicit availability of time slots for a specific date.
+
+    A row here overrides whatever the weekly rules would produce for that date.
+    """
 
     date: models.DateField = models.DateField(unique=True)
     time_slots: models.JSONField = models.JSONField(default=list)
@@ -175,8 +441,83 @@ class Availability(models.Model):
         return f"{self.date} - {', '.join(self.time_slots)}"
 
 
+class AvailabilityRule(models.Model):
+    """Weekly recurring availability, e.g. "every Monday 09:00-12:00".
+
+    Attributes:
+        weekday (PositiveSmallIntegerField): Day of the week (0 = Monday).
+        time_slots (JSONField): Hourly slots offered on that weekday.
+        valid_from (DateField): First date the rule applies to.
+        valid_until (DateField): Last date the rule applies to, open-ended if empty.
+    """
+
+    class Weekday(models.IntegerChoices):
+        MONDAY = 0, "Monday"
+        TUESDAY = 1, "Tuesday"
+        WEDNESDAY = 2, "Wednesday"
+        THURSDAY = 3, "Thursday"
+        FRIDAY = 4, "Friday"
+        SATURDAY = 5, "Saturday"
+        SUNDAY = 6, "Sunday"
+
+    weekday: models.PositiveSmallIntegerField = models.PositiveSmallIntegerField(
+        choices=Weekday.choices
+    )
+    time_slots: models.JSONField = models.JSONField(default=list)
+    valid_from: models.DateField = models.DateField(default=date.today)
+    valid_until: models.DateField = models.DateField(null=True, blank=True)
+
+    class Meta:
+        ordering: List[str] = ["weekday", "valid_from"]
+
+    def applies_to(self, day: date) -> bool:
+        """Whether the rule is in effect on the given date."""
+        return (
+            day.weekday() == self.weekday
+            and self.valid_from <= day
+            and (self.valid_until is None or day <= self.valid_until)
+        )
+
+    def __str__(self) -> str:
+        return f"{self.get_weekday_display()} - {', '.join(self.time_slots)}"
+
+
+class AvailabilityException(models.Model):
+    """Holiday or blocked hours cutting into the weekly rules.
+
+    Attributes:
+        start_date (DateField): First day of the exception.
+        end_date (DateField): Last day of the exception (inclusive).
+        blocked_slots (JSONField): Slots removed on those days; empty closes the
+            whole day.
+        reason (CharField): Free text shown to staff (e.g. "Bank holiday").
+    """
+
+    start_date: models.DateField = models.DateField()
+    end_date: models.DateField = models.DateField()
+    blocked_slots: models.JSONField = models.JSONField(default=list, blank=True)
+    reason: models.CharField = models.CharField(max_length=255, blank=True)
+
+    class Meta:
+        ordering: List[str] = ["start_date"]
+        indexes: List[models.Index] = [models.Index(fields=["start_date", "end_date"])]
+
+    def covers(self, day: date) -> bool:
+        """Whether the exception applies to the given date."""
+        return self.start_date <= day <= self.end_date
+
+    def __str__(self) -> str:
+        blocked = ", ".join(self.blocked_slots) or "closed"
+        return f"{self.start_date} - {self.end_date}: {blocked}"
+
+
 class Appointment(models.Model):
-    """Appointment made by a user."""
+    """
+    Appointment made by a user.
+
+    `updated_at` is set on every write, bulk moves included, so the count and
+    latest `updated_at` of a user's appointments version their booking page.
+    """
 
     REASON_CHOICES: List[Tuple[str, str]] = [
         ("Consultation", "Consultation"),
@@ -184,12 +525,102 @@ class Appointment(models.Model):
         ("Policy Inquiry", "Policy Inquiry"),
     ]
 
+    # Indexed through the (user, date) index below.
     user: models.ForeignKey = models.ForeignKey(
-        get_user_model(), on_delete=models.CASCADE
+        get_user_model(), on_delete=models.CASCADE, db_index=False
     )
     reason: models.CharField = models.CharField(max_length=50, choices=REASON_CHOICES)
     date: models.DateField = models.DateField(default=date(2025, 2, 3))
     time: models.CharField = models.CharField(max_length=10)
+    updated_at: models.DateTimeField = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes: List[models.Index] = [
+            # A user's upcoming and past appointments, ordered by date.
+            models.Index(fields=["user", "date"]),
+            # Version of a user's appointments, read from the index alone.
+            models.Index(fields=["user", "updated_at"]),
+            # Admin date hierarchy and date ordering.
+            models.Index(fields=["date"]),
+        ]
 
     def __str__(self) -> str:
         return f"{self.reason} on {self.date} at {self.time}"
+
+
+class PortfolioRollup(models.Model):
+    """
+    Pre-aggregated premiums for the staff analytics dashboard.
+
+    One row per day and per value of one dimension (region, smoker, sex, age or
+    BMI category), plus a row with dimension "all" for the whole portfolio.
+    The same figures are also kept per month, so long date ranges merge a few
+    dozen rows instead of one per day. Rows are maintained incrementally by
+    `insurance_app.analytics`.
+
+    Attributes:
+        grain (CharField): "day" or "month".
+        day (DateField): Day the predictions were made (first of the month for
+            monthly rows).
+        dimension (CharField): The breakdown this row belongs to.
+        value (CharField): Value of the dimension (empty for "all").
+        count (PositiveBigIntegerField): Number of predictions.
+        total_charges (DecimalField): Sum of the predicted charges.
+        sketch (JSONField): Mergeable quantile sketch of the charges
+            (see `insurance_app.sketches`).
+    """
+
+    class Dimension(models.TextChoices):
+        ALL = "all", "All"
+        REGION = "region", "Region"
+        SMOKER = "smoker", "Smoker"
+        SEX = "sex", "Sex"
+        AGE_CATEGORY = "age_category", "Age category"
+        BMI_CATEGORY = "bmi_category", "BMI category"
+
+    class Grain(models.TextChoices):
+        DAY = "day", "Day"
+        MONTH = "month", "Month"
+
+    grain: models.CharField = models.CharField(
+        max_length=5, choices=Grain.choices, default=Grain.DAY
+    )
+    day: models.DateField = models.DateField()
+    dimension: models.CharField = models.CharField(
+        max_length=20, choices=Dimension.choices
+    )
+    value: models.CharField = models.CharField(max_length=20, blank=True)
+    count: models.PositiveBigIntegerField = models.PositiveBigIntegerField(default=0)
+    total_charges: models.DecimalField = models.DecimalField(
+        max_digits=20, decimal_places=2, default=0
+    )
+    sketch: models.JSONField = models.JSONField(default=dict)
+
+    class Meta:
+        constraints: List[models.BaseConstraint] = [
+            models.UniqueConstraint(
+                fields=["dimension", "grain", "day", "value"],
+                name="unique_rollup_bucket",
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.grain} {self.day} {self.dimension}={self.value}: {self.count}"
+
+
+class RollupCheckpoint(models.Model):
+    """
+    High-water mark of the prediction history already folded into the rollups.
+
+    Attributes:
+        source (CharField): Database alias the history is read from.
+        last_id (PositiveBigIntegerField): Highest `PredictionHistory` id rolled up.
+        updated_at (DateTimeField): Time of the last refresh.
+    """
+
+    source: models.CharField = models.CharField(max_length=50, unique=True)
+    last_id: models.PositiveBigIntegerField = models.PositiveBigIntegerField(default=0)
+    updated_at: models.DateTimeField = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.source} @ {self.last_id}"
@@ -0,0 +1,104 @@
+"""Build-time rendering of the anonymous marketing pages.
+
+The pages of `PAGES` are the same for every anonymous visitor, so
+`manage.py prerender_pages` renders them once, after `collectstatic`, into
+`PRERENDER_DIR` as `<url path>/index.html` with compressed copies (gzip, and
+brotli when installed). Assets are linked by their hashed names when the
+static manifest exists and DEBUG is off, as in any other page.
+
+`middleware.PrerenderedPageMiddleware` serves these files through WhiteNoise
+to requests that cannot be authenticated, before the session, auth, CSRF and
+messages middleware run. Every other request renders the page dynamically.
+"""
+
+from __future__ import annotations
+
+import os
+import tempfile
+from pathlib import Path
+from typing import Iterable, List
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+from whitenoise.compress import Compressor
+
+# URL names of the pre-rendered pages.
+PAGES = (
+    "home",
+    "about",
+    "health_advices",
+    "cybersecurity_awareness",
+    "welcome",
+    "apply_thank_you",
+)
+
+
+def output_dir() -> Path:
+    return Path(settings.PRERENDER_DIR)
+
+
+def page_file(url: str) -> Path:
+    """File holding the pre-rendered page at `url`."""
+    return output_dir() / url.lstrip("/") / "index.html"
+
+
+def render_page(name: str) -> bytes:
+    """
+    The page `name` as an anonymous visitor receives it.
+
+    Raises:
+        ValueError: If the page does not render with a 200 status.
+    """
+    url = reverse(name)
+    request = RequestFactory().get(url)
+    request.user = AnonymousUser()
+    request.resolver_match = match = resolve(url)
+    response = match.func(request, *match.args, **match.kwargs)
+    if hasattr(response, "render"):
+        response.render()
+    if response.status_code != 200:
+        raise ValueError(f"{name} ({url}) rendered status {response.status_code}")
+    return response.content
+
+
+def build(pages: Iterable[str] = PAGES) -> List[Path]:
+    """
+    Render `pages` into `PRERENDER_DIR`, with compressed copies.
+
+    The pages are written to a temporary directory next to `PRERENDER_DIR`,
+    then each file is moved over the previous one, so a page being rebuilt is
+    never missing or half written. Pages not in `pages` are left as they are;
+    a build of every page of `PAGES` also removes the files of pages that are
+    no longer in it.
+
+    Returns:
+        list[Path]: The HTML files written.
+    """
+    rendered = {reverse(name): render_page(name) for name in pages}
+    root = output_dir()
+    root.mkdir(parents=True, exist_ok=True)
+    compressor = Compressor(quiet=True)
+    written = []
+    with tempfile.TemporaryDirectory(dir=root.parent, prefix=".prerender-") as tmp:
+        for url, content in rendered.items():
+            staged = Path(tmp) / url.lstrip("/") / "index.html"
+            staged.parent.mkdir(parents=True, exist_ok=True)
+            staged.write_bytes(content)
+            compressor.compress(str(staged))
+            path = page_file(url)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # A copy the new build no longer makes (e.g. brotli) would be stale.
+            for old in path.parent.glob("index.html*"):
+                if not (staged.parent / old.name).exists():
+                    old.unlink()
+            for new in staged.parent.glob("index.html*"):
+                os.replace(new, path.parent / new.name)
+            written.append(path)
+    if set(rendered) == {reverse(name) for name in PAGES}:
+        kept = {path.parent for path in written}
+        for stale in root.rglob("index.html*"):
+            if stale.parent not in kept:
+                stale.unlink()
+    return written
@@ -0,0 +1,323 @@
+"""Premium quotes from the pricing model, kept up to date on each profile.
+
+Every `UserProfile` stores its latest quote (`quoted_charges`) together with
+the model version and a digest of the pricing inputs it was computed from, so
+pages read the member's current premium from the row already loaded for the
+request, without running the model.
+
+The quote is recomputed only when it is stale: after a save changing one of
+`PRICING_FIELDS`, a `post_save` receiver schedules `refresh_quote()` for when
+the transaction commits. A new model file changes the version; existing
+quotes are then refreshed in bulk by `manage.py refresh_quotes`, which scores
+users in batches with one `predict()` call per batch.
+
+The model is unpickled once per process and reloaded when its file changes.
+Its version is the start of the file's SHA-256, so a rollout needs no setting.
+
+Each prediction a member asks for is logged in `PredictionHistory` with a
+digest of its inputs and model version. Asking again with the same inputs
+within `PREDICTION_REPEAT_WINDOW` seconds bumps the repeat count of the logged
+row instead of adding one; the check is one probe of the
+(user, inputs_hash, timestamp) index.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+import threading
+from dataclasses import dataclass
+from datetime import timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import F, Q, QuerySet
+from django.utils import timezone
+
+from . import caching
+from .models import (
+    PredictionHistory,
+    UserProfile,
+    categorize_age,
+    categorize_bmi,
+    compute_bmi,
+)
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+PRICING_FIELDS = ("age", "weight", "height", "num_children", "smoker", "region", "sex")
+
+# Columns of the model's input, in order.
+FEATURE_COLUMNS = [
+    "smoker",
+    "age",
+    "bmi",
+    "age_category_young_adult",
+    "age_category_early_adulthood",
+    "bmi_category_over_weight",
+    "bmi_category_obese",
+    "children_str_0",
+]
+
+
+@dataclass(frozen=True)
+class PricingModel:
+    """A loaded model and the version its quotes are stamped with."""
+
+    estimator: Any
+    version: str
+
+
+_loaded: Dict[str, Any] = {"key": None, "model": None}
+_load_lock = threading.Lock()
+
+
+def load_model() -> Optional[PricingModel]:
+    """
+    The pricing model, unpickled again only when its file has changed.
+
+    Returns:
+        PricingModel | None: None if the file is missing or unreadable.
+    """
+    path = settings.PRICING_MODEL_PATH
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    key = (str(path), stat.st_mtime_ns, stat.st_size)
+    with _load_lock:
+        if _loaded["key"] != key:
+            try:
+                with open(path, "rb") as file:
+                    data = file.read()
+                estimator = pickle.loads(data)
+            except (OSError, pickle.UnpicklingError):
+                logger.exception("Could not read the pricing model %s", path)
+                return None
+            version = hashlib.sha256(data).hexdigest()[:12]
+            _loaded.update(key=key, model=PricingModel(estimator, version))
+        return _loaded["model"]
+
+
+def features(rows: Sequence[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Encode `rows` of model inputs into the columns the model expects.
+
+    Each row holds `age`, `bmi`, `smoker` ("Yes"/"No") and `children`, and
+    optionally the `age_category` and `bmi_category` the database computed.
+    """
+    df = pd.DataFrame(list(rows))
+
+    # Convert smoker to binary (1 for "Yes", 0 for "No")
+    df["smoker"] = df["smoker"].map({"Yes": 1, "No": 0})
+
+    # Categorize age and bmi, unless the database already did
+    if "age_category" not in df:
+        df["age_category"] = df["age"].apply(categorize_age)
+    if "bmi_category" not in df:
+        df["bmi_category"] = df["bmi"].apply(categorize_bmi)
+
+    # Convert children to string (for one-hot encoding)
+    df["children_str"] = df["children"].apply(str)
+
+    df = pd.get_dummies(
+        df, columns=["age_category", "bmi_category", "children_str"], dtype=int
+    )
+    for column in FEATURE_COLUMNS:
+        if column not in df.columns:
+            df[column] = 0
+    return df[FEATURE_COLUMNS]
+
+
+def predict(model: PricingModel, rows: Sequence[Dict[str, Any]]) -> List[Decimal]:
+    """Charges predicted for each of `rows`, rounded to cents."""
+    if not rows:
+        return []
+    return [
+        Decimal(str(round(float(value), 2)))
+        for value in model.estimator.predict(features(rows))
+    ]
+
+
+def _model_input(values: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Model input for a profile's pricing values; None if it cannot be priced."""
+    if values["smoker"] not in UserProfile.SmokerType.values or values["height"] <= 0:
+        return None
+    return {
+        "age": values["age"],
+        "bmi": compute_bmi(values["weight"], values["height"]),
+        "smoker": values["smoker"],
+        "children": values["num_children"],
+        "region": values["region"],
+        "sex": values["sex"],
+    }
+
+
+def inputs_digest(values: Dict[str, Any]) -> str:
+    """Digest of the pricing inputs among `values`, stored with the quote."""
+    data = json.dumps([values[field] for field in PRICING_FIELDS])
+    return hashlib.blake2b(data.encode(), digest_size=16).hexdigest()
+
+
+def submission_digest(values: Dict[str, Any], version: str) -> str:
+    """Digest identifying a prediction: its pricing inputs and model version."""
+    data = json.dumps([values[field] for field in PRICING_FIELDS] + [version])
+    return hashlib.blake2b(data.encode(), digest_size=16).hexdigest()
+
+
+def _pricing_values(profile: UserProfile) -> Dict[str, Any]:
+    return {field: getattr(profile, field) for field in PRICING_FIELDS}
+
+
+def quote_is_current(profile: UserProfile, model: Optional[PricingModel]) -> bool:
+    """Whether the stored quote matches the profile's inputs and `model`."""
+    return model is None or (
+        profile.quote_model_version == model.version
+        and profile.quote_inputs == inputs_digest(_pricing_values(profile))
+    )
+
+
+def refresh_quote(profile: UserProfile) -> Optional[Decimal]:
+    """
+    Recompute and store the quote of `profile` if it is stale.
+
+    The row is only updated if its pricing inputs still are the ones the quote
+    was computed from, so a late refresh never overwrites a newer one.
+
+    Returns:
+        Decimal | None: The current quote; None if the profile cannot be
+        priced or the model is unavailable.
+    """
+    model = load_model()
+    if model is None:
+        return None
+    if quote_is_current(profile, model):
+        return profile.quoted_charges
+
+    values = _pricing_values(profile)
+    model_input = _model_input(values)
+    quote = {
+        "quoted_charges": predict(model, [model_input])[0] if model_input else None,
+        "quote_model_version": model.version,
+        "quote_inputs": inputs_digest(values),
+        "quoted_at": timezone.now(),
+    }
+    if UserProfile._base_manager.filter(pk=profile.pk, **values).update(**quote):
+        caching.invalidate_on_commit(caching.user_tag(profile.pk))
+    for attname, value in quote.items():
+        setattr(profile, attname, value)
+    return profile.quoted_charges
+
+
+def record_prediction(profile: UserProfile) -> Optional[PredictionHistory]:
+    """
+    Log the current quote of `profile` in its prediction history.
+
+    A prediction with the same inputs and model version logged within
+    `PREDICTION_REPEAT_WINDOW` seconds is reused: its repeat count is bumped
+    and no row is added. Two identical requests racing each other may both be
+    logged.
+
+    Returns:
+        PredictionHistory | None: The logged prediction; None if the profile
+        cannot be priced or the model is unavailable.
+    """
+    charges = refresh_quote(profile)
+    if charges is None:
+        return None
+    values = _pricing_values(profile)
+    digest = submission_digest(values, profile.quote_model_version)
+    history = PredictionHistory.objects.for_user(profile)
+
+    window = settings.PREDICTION_REPEAT_WINDOW
+    if window > 0:
+        since = timezone.now() - timedelta(seconds=window)
+        repeat = history.latest_repeat(digest, since)
+        if repeat is not None:
+            history.filter(pk=repeat.pk).update(repeat_count=F("repeat_count") + 1)
+            repeat.repeat_count += 1
+            return repeat
+
+    return PredictionHistory.objects.create(
+        user=profile, predicted_charges=charges, inputs_hash=digest, **values
+    )
+
+
+def schedule_refresh(profile: UserProfile) -> None:
+    """Refresh the quote of `profile` once the current transaction commits."""
+    if not quote_is_current(profile, load_model()):
+        transaction.on_commit(lambda: refresh_quote(profile))
+
+
+def stale_quotes(model: PricingModel) -> QuerySet:
+    """Profiles whose quote was computed by another model version."""
+    return UserProfile._base_manager.filter(~Q(quote_model_version=model.version))
+
+
+def refresh_quotes(
+    queryset: Optional[QuerySet] = None, batch_size: int = BATCH_SIZE
+) -> Tuple[int, Optional[str]]:
+    """
+    Recompute the quotes of `queryset` (default: every stale profile) in batches.
+
+    Each batch reads the pricing columns only, scores every profile with one
+    `predict()` call and writes the quotes back with one `executemany()`.
+
+    Returns:
+        tuple[int, str | None]: Profiles refreshed and the model version, which
+        is None (and nothing is refreshed) if the model is unavailable.
+    """
+    model = load_model()
+    if model is None:
+        return 0, None
+    if queryset is None:
+        queryset = stale_quotes(model)
+
+    db = router.db_for_write(UserProfile)
+    ops = connections[db].ops
+    table = UserProfile._meta.db_table
+    columns = ("quoted_charges", "quote_model_version", "quote_inputs", "quoted_at")
+    sql = "UPDATE {} SET {} WHERE {} = %s".format(
+        ops.quote_name(table),
+        ", ".join(f"{ops.quote_name(column)} = %s" for column in columns),
+        ops.quote_name(UserProfile._meta.pk.column),
+    )
+
+    refreshed = 0
+    last_pk = 0
+    while True:
+        batch = list(
+            queryset.using(db)
+            .filter(pk__gt=last_pk)
+            .order_by("pk")
+            .values("pk", *PRICING_FIELDS)[:batch_size]
+        )
+        if not batch:
+            break
+        inputs = [_model_input(row) for row in batch]
+        priced = iter(predict(model, [row for row in inputs if row]))
+        quoted_at = ops.adapt_datetimefield_value(timezone.now())
+        params = [
+            (
+                ops.adapt_decimalfield_value(next(priced) if model_input else None),
+                model.version,
+                inputs_digest(row),
+                quoted_at,
+                row["pk"],
+            )
+            for row, model_input in zip(batch, inputs)
+        ]
+        with transaction.atomic(using=db), connections[db].cursor() as cursor:
+            cursor.executemany(sql, params)
+        caching.invalidate(*(caching.user_tag(row["pk"]) for row in batch))
+        refreshed += len(batch)
+        last_pk = batch[-1]["pk"]
+    return refreshed, model.version
@@ -0,0 +1,236 @@
+"""Per-view query budgets and slow-query capture.
+
+`QueryBudgetMiddleware` wraps every database connection with a
+`QueryRecorder` for the duration of a request, then compares the number of
+queries and the database time with the budget declared for the resolved URL
+name in `BUDGETS`. Going over the query budget logs a warning, or raises
+`QueryBudgetExceeded` when `settings.QUERY_BUDGET_STRICT` is on (the default
+when running the test suite), so a new N+1 fails the tests that hit the view.
+Database time is only ever logged: it depends on the machine.
+
+SELECTs slower than `settings.SLOW_QUERY_MS` are explained once the response
+is ready, and kept with their plan in a per-process ring buffer of the last
+`settings.SLOW_QUERY_LOG_SIZE` entries, which staff can read at `/query-log/`.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, List, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class Budget(NamedTuple):
+    """Most queries and milliseconds of database time one request may use."""
+
+    queries: int
+    db_ms: float = 200.0
+
+
+# Budgets include the session and user lookups of authenticated requests.
+# Streamed responses (the exports) read their rows after the middleware has
+# returned, so only the queries made before streaming count.
+# The conditional pages (see `insurance_app.conditional`) read their version
+# before rendering, one query that is all a 304 costs beyond the session.
+BUDGETS: Dict[str, Budget] = {
+    "home": Budget(2),
+    "signup": Budget(4),
+    "login": Budget(5),
+    "logout_user": Budget(4),
+    "welcome": Budget(2),
+    "profile": Budget(4),
+    "predict": Budget(6),
+    "predict_result": Budget(6),
+    "prediction_history": Budget(6),
+    "export_prediction_history": Budget(2),
+    "book_appointment": Budget(6),
+    "appointment_list": Budget(6),
+    "about": Budget(2),
+    "join_us": Budget(3),
+    "apply": Budget(3),
+    "contact": Budget(3),
+    "contact_form": Budget(3),
+    "apply_thank_you": Budget(2),
+    "health_advices": Budget(2),
+    "cybersecurity_awareness": Budget(2),
+    "messages_list": Budget(3),
+    "portfolio_analytics": Budget(5),
+    "export_predictions": Budget(2),
+    "query_log": Budget(2),
+    "solve_message": Budget(3),
+    "predict_charges": Budget(2),
+    "password_reset": Budget(3),
+    "password_reset_done": Budget(2),
+    "password_reset_confirm": Budget(4),
+    "password_reset_complete": Budget(2),
+    "changepassword": Budget(8),
+    "get_available_times": Budget(3),
+    "testing": Budget(2),
+}
+
+
+# Transaction control is issued through cursors on some backends only, so it is
+# timed but not counted against budgets.
+_TRANSACTION_STATEMENTS = ("BEGIN", "SAVEPOINT", "RELEASE", "ROLLBACK")
+
+
+class QueryBudgetExceeded(Exception):
+    """A request ran more queries than its view's budget allows."""
+
+
+@dataclass
+class SlowQuery:
+    """A slow SELECT and its query plan."""
+
+    at: datetime
+    view: str
+    path: str
+    alias: str
+    sql: str
+    duration_ms: float
+    plan: str
+
+
+_slow_queries: Deque[SlowQuery] = deque()
+_slow_queries_lock = threading.Lock()
+
+
+def _record_slow_query(entry: SlowQuery) -> None:
+    global _slow_queries
+    with _slow_queries_lock:
+        if _slow_queries.maxlen != settings.SLOW_QUERY_LOG_SIZE:
+            _slow_queries = deque(_slow_queries, maxlen=settings.SLOW_QUERY_LOG_SIZE)
+        _slow_queries.append(entry)
+
+
+def slow_queries() -> List[SlowQuery]:
+    """The captured slow queries of this process, newest first."""
+    with _slow_queries_lock:
+        return list(reversed(_slow_queries))
+
+
+def clear_slow_queries() -> None:
+    with _slow_queries_lock:
+        _slow_queries.clear()
+
+
+@dataclass
+class QueryRecorder:
+    """
+    Database execute wrapper that counts and times queries.
+
+    Attributes:
+        count (int): Queries executed, transaction control aside.
+        seconds (float): Total time spent executing them.
+        statements (Counter): Executions per SQL string, to spot duplicates.
+        slow (list): `(connection, sql, params, seconds)` of slow SELECTs.
+    """
+
+    slow_seconds: float
+    count: int = 0
+    seconds: float = 0.0
+    statements: Counter = field(default_factory=Counter)
+    slow: List[Tuple[BaseDatabaseWrapper, str, Any, float]] = field(
+        default_factory=list
+    )
+
+    def __call__(
+        self,
+        execute: Callable[..., Any],
+        sql: str,
+        params: Any,
+        many: bool,
+        context: Dict[str, Any],
+    ) -> Any:
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.seconds += elapsed
+            if not sql.lstrip().upper().startswith(_TRANSACTION_STATEMENTS):
+                self.count += 1
+                self.statements[sql] += 1
+            if (
+                elapsed >= self.slow_seconds
+                and not many
+                and sql.lstrip()[:6].upper() == "SELECT"
+            ):
+                self.slow.append((context["connection"], sql, params, elapsed))
+
+    @property
+    def duplicates(self) -> int:
+        """Executions of a SQL string beyond its first (likely N+1s)."""
+        return sum(count - 1 for count in self.statements.values())
+
+
+def explain(connection: BaseDatabaseWrapper, sql: str, params: Any) -> str:
+    """Return the query plan of `sql` as text, or the error that prevented it."""
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"{connection.ops.explain_query_prefix()} {sql}", params)
+            return "\n".join(
+                " ".join(str(column) for column in row) for row in cursor.fetchall()
+            )
+    except DatabaseError as exc:
+        return f"EXPLAIN failed: {exc}"
+
+
+def check_budget(view: Optional[str], path: str, recorder: QueryRecorder) -> None:
+    """
+    Compare a finished request with the budget of its view.
+
+    Raises:
+        QueryBudgetExceeded: If the query budget is exceeded and
+            `settings.QUERY_BUDGET_STRICT` is on.
+    """
+    db_ms = recorder.seconds * 1000
+    logger.debug("%s (%s): %d queries, %.1fms", view, path, recorder.count, db_ms)
+    budget = BUDGETS.get(view or "")
+    if budget is None:
+        return
+    if recorder.count > budget.queries:
+        message = (
+            f"{view} ({path}) ran {recorder.count} queries, budget is "
+            f"{budget.queries} ({recorder.duplicates} duplicated)"
+        )
+        if settings.QUERY_BUDGET_STRICT:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+    if db_ms > budget.db_ms:
+        logger.warning(
+            "%s (%s) spent %.1fms in the database, budget is %.0fms",
+            view,
+            path,
+            db_ms,
+            budget.db_ms,
+        )
+
+
+def capture_slow_queries(
+    view: Optional[str], path: str, recorder: QueryRecorder
+) -> None:
+    """Explain the slow queries of a finished request into the ring buffer."""
+    for connection, sql, params, seconds in recorder.slow:
+        _record_slow_query(
+            SlowQuery(
+                at=timezone.now(),
+                view=view or "",
+                path=path,
+                alias=connection.alias,
+                sql=sql,
+                duration_ms=seconds * 1000,
+                plan=explain(connection, sql, params),
+            )
+        )
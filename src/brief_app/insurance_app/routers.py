@@ -0,0 +1,121 @@
+"""Database routers.
+
+`PredictionShardRouter` places each user's `PredictionHistory` rows on one
+of `settings.PREDICTION_SHARDS` (see `insurance_app.sharding`).
+
+`PrimaryReplicaRouter` sends writes to the primary (`default`) and spreads
+reads over the aliases listed in `settings.DATABASE_REPLICAS`. Once a request
+(or a session, via `ReplicaStickinessMiddleware`) has written, its reads stay
+on the primary so users always see their own changes despite replica lag.
+"""
+
+from __future__ import annotations
+
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, List, Optional, Type
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Model
+
+from . import sharding
+
+_pinned: ContextVar[bool] = ContextVar("db_pinned_to_primary", default=False)
+_wrote: ContextVar[bool] = ContextVar("db_wrote_to_primary", default=False)
+
+
+def replicas() -> List[str]:
+    """Aliases of the configured read replicas (may be empty)."""
+    return list(getattr(settings, "DATABASE_REPLICAS", []))
+
+
+def pin_to_primary() -> None:
+    """Route the remaining reads of the current context to the primary."""
+    _pinned.set(True)
+
+
+def wrote_to_primary() -> bool:
+    """Whether the current context has routed a write to the primary."""
+    return _wrote.get()
+
+
+@contextmanager
+def use_primary() -> Iterator[None]:
+    """Read from the primary inside the block, e.g. right before a write."""
+    token = _pinned.set(True)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+@contextmanager
+def request_context(pinned: bool = False) -> Iterator[None]:
+    """Fresh routing state for one request; `pinned` keeps reads on primary."""
+    pinned_token = _pinned.set(pinned)
+    wrote_token = _wrote.set(False)
+    try:
+        yield
+    finally:
+        _pinned.reset(pinned_token)
+        _wrote.reset(wrote_token)
+
+
+class PrimaryReplicaRouter:
+    """Route writes to the primary and reads to a random replica."""
+
+    def db_for_read(self, model: Type[Model], **hints: Any) -> Optional[str]:
+        aliases = replicas()
+        if (
+            not aliases
+            or _pinned.get()
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(aliases)
+
+    def db_for_write(self, model: Type[Model], **hints: Any) -> Optional[str]:
+        _pinned.set(True)
+        _wrote.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1: Model, obj2: Model, **hints: Any) -> Optional[bool]:
+        pool = {DEFAULT_DB_ALIAS, *replicas()}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+
+class PredictionShardRouter:
+    """
+    Route `PredictionHistory` to the shard of its user.
+
+    The user is taken from the `instance` hint, which Django provides for saves,
+    related managers (`user.insurance_predictions`) and foreign key access.
+    Queries without a user hint are not routed; use
+    `PredictionHistory.objects.for_user()` or `sharding.fan_out()` for those.
+    """
+
+    def _shard(self, model: Type[Model], hints: dict) -> Optional[str]:
+        if model._meta.label_lower != "insurance_app.predictionhistory":
+            return None
+        instance = hints.get("instance")
+        if instance is None:
+            return None
+        if instance._meta.label_lower == "insurance_app.predictionhistory":
+            return sharding.shard_for_user(instance.user_id)
+        return sharding.shard_for_user(instance.pk)
+
+    def db_for_read(self, model: Type[Model], **hints: Any) -> Optional[str]:
+        return self._shard(model, hints)
+
+    def db_for_write(self, model: Type[Model], **hints: Any) -> Optional[str]:
+        return self._shard(model, hints)
+
+    def allow_relation(self, obj1: Model, obj2: Model, **hints: Any) -> Optional[bool]:
+        labels = {obj1._meta.label_lower, obj2._meta.label_lower}
+        if sharding.shards() and "insurance_app.predictionhistory" in labels:
+            return True
+        return None
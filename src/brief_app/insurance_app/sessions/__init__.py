@@ -0,0 +1,125 @@
+"""Session engines that only write a session when its content changes.
+
+`SessionMiddleware` saves the session of every request that set a key or
+its expiry, even to the value it already had, and logging in writes the row
+twice: `cycle_key()` inserts it under a new key (after a query checking the
+key is free) and the response updates it with the user. Each write lands on
+`django_session` and, through `ReplicaStickinessMiddleware`, pins the
+client to the primary database for a while.
+
+`WriteCoalescingMixin` keeps the serialized data as last loaded or saved and
+skips a save that would store the same data (the expiry is part of it). A
+cycled key is only allocated: the row is inserted once, with the response,
+carrying everything the login set. `SESSION_SAVE_EVERY_REQUEST` still saves
+every request, as it is meant to slide the expiry. Only the synchronous API
+coalesces; the `a*` methods behave as in Django.
+
+The engines are selected with `SESSION_STORE` in the settings:
+`insurance_app.sessions.db` stores sessions in the database, and
+`insurance_app.sessions.cached_db` also keeps them in the "default" cache,
+so reading a session costs no query while the cache holds it.
+
+Expired rows are deleted by `purge_expired()` in small batches, rather than
+by the single `DELETE` of `clearsessions`, which locks the table for as long
+as it runs; `manage.py purge_sessions` runs it.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Iterator, Optional
+
+from django.conf import settings
+from django.contrib.sessions.backends.base import VALID_KEY_CHARS, CreateError
+from django.db import models
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+
+
+def purge_expired(
+    model: type[models.Model],
+    batch_size: int = 1000,
+    pause: float = 0.0,
+    max_rows: Optional[int] = None,
+) -> Iterator[int]:
+    """Delete the sessions expired by now, one batch at a time.
+
+    Args:
+        model (type[Model]): The session model, e.g. `Session`.
+        batch_size (int): Rows deleted per statement.
+        pause (float): Seconds to sleep between batches (rate limiting).
+        max_rows (int | None): Stop after this many rows (resume on next run).
+
+    Yields:
+        int: The number of rows deleted by each batch.
+    """
+    expired = model.objects.filter(expire_date__lt=timezone.now())
+    deleted = 0
+    while max_rows is None or deleted < max_rows:
+        limit = batch_size if max_rows is None else min(batch_size, max_rows - deleted)
+        keys = list(expired.values_list("pk", flat=True)[:limit])
+        if not keys:
+            return
+        rows, _ = model.objects.filter(pk__in=keys).delete()
+        deleted += rows
+        yield rows
+        if pause:
+            time.sleep(pause)
+
+
+class WriteCoalescingMixin:
+    """Skip saving unchanged sessions and insert cycled ones once."""
+
+    # Serialized data as last loaded or saved, None if the row is not stored.
+    _stored: Optional[bytes] = None
+    # A cycled key whose row is inserted by the next save.
+    _pending_create = False
+
+    def _serialized(self) -> bytes:
+        return self.serializer().dumps(self._get_session())
+
+    def load(self) -> dict:
+        data = super().load()
+        # The stores drop the key when its row is missing or expired.
+        self._stored = self.serializer().dumps(data) if self.session_key else None
+        return data
+
+    def cycle_key(self) -> None:
+        data = self._session
+        key = self.session_key
+        self._session_key = get_random_string(32, VALID_KEY_CHARS)
+        self._session_cache = data
+        self._stored = None
+        self._pending_create = True
+        self.modified = True
+        if key:
+            self.delete(key)
+
+    def save(self, must_create: bool = False) -> None:
+        if self._pending_create:
+            self._insert()
+        elif (
+            must_create
+            or self._stored is None
+            or self.session_key is None
+            or settings.SESSION_SAVE_EVERY_REQUEST
+            or self._serialized() != self._stored
+        ):
+            super().save(must_create)
+        self._stored = self._serialized()
+
+    @classmethod
+    def clear_expired(cls) -> None:
+        for _ in purge_expired(cls.get_model_class()):
+            pass
+
+    def _insert(self) -> None:
+        """Insert the row of a cycled key, drawing another on a collision."""
+        while True:
+            try:
+                super().save(must_create=True)
+            except CreateError:
+                self._session_key = get_random_string(32, VALID_KEY_CHARS)
+                continue
+            self._pending_create = False
+            return
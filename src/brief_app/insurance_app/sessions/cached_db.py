@@ -0,0 +1,9 @@
+"""Cached database-backed sessions, written only when they change."""
+
+from django.contrib.sessions.backends import cached_db
+
+from . import WriteCoalescingMixin
+
+
+class SessionStore(WriteCoalescingMixin, cached_db.SessionStore):
+    """Django's cached database session store with coalesced writes."""
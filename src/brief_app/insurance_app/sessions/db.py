@@ -0,0 +1,9 @@
+"""Database-backed sessions, written only when they change."""
+
+from django.contrib.sessions.backends import db
+
+from . import WriteCoalescingMixin
+
+
+class SessionStore(WriteCoalescingMixin, db.SessionStore):
+    """Django's database session store with coalesced writes."""
@@ -0,0 +1,106 @@
+"""Hash-based partitioning of `PredictionHistory` across databases.
+
+When `settings.PREDICTION_SHARDS` lists database aliases, each user's
+prediction history lives on exactly one of them, chosen by hashing the user
+id. Per-user reads and writes are routed by `PredictionShardRouter`;
+staff-wide queries use `fan_out()` to run on every shard in parallel and
+merge the partial results.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+T = TypeVar("T")
+
+
+def shards() -> List[str]:
+    """Aliases holding prediction history; empty when sharding is disabled."""
+    return list(getattr(settings, "PREDICTION_SHARDS", []))
+
+
+def shard_for_user(user_id: Optional[int]) -> Optional[str]:
+    """
+    Return the database alias holding the predictions of `user_id`.
+
+    The hash is stable across processes and Python versions, so a user's rows
+    never move unless the number of shards changes.
+
+    Returns:
+        str | None: The shard alias, or None when sharding is disabled or the
+        user is not saved yet.
+    """
+    aliases = shards()
+    if not aliases or user_id is None:
+        return None
+    digest = hashlib.blake2b(str(user_id).encode(), digest_size=8).digest()
+    return aliases[int.from_bytes(digest, "big") % len(aliases)]
+
+
+def history_aliases() -> List[str]:
+    """Every alias that has to be read to see all prediction history."""
+    return shards() or [DEFAULT_DB_ALIAS]
+
+
+def fan_out(query: Callable[[str], T]) -> List[T]:
+    """
+    Run `query(alias)` on every history database in parallel.
+
+    Each call runs in its own thread (and therefore its own connection), which
+    is closed once the call returns.
+
+    Args:
+        query (callable): Receives a database alias and returns a partial result.
+
+    Returns:
+        list: The partial results, in shard order.
+    """
+    aliases = history_aliases()
+    if len(aliases) == 1:
+        return [query(aliases[0])]
+
+    def run(alias: str) -> T:
+        try:
+            return query(alias)
+        finally:
+            connections[alias].close()
+
+    with ThreadPoolExecutor(max_workers=len(aliases)) as executor:
+        return list(executor.map(run, aliases))
+
+
+def prediction_stats(**filters: Any) -> Dict[str, Any]:
+    """
+    Count, total and average of predicted charges across all shards.
+
+    Averages are merged from per-shard sums and counts, never from per-shard
+    averages, so the result equals a single-database aggregate.
+
+    Args:
+        **filters: Lookups applied to `PredictionHistory` on every shard.
+    """
+    from django.db.models import Count, Sum
+
+    from .models import PredictionHistory
+
+    def partial(alias: str) -> Dict[str, Any]:
+        return (
+            PredictionHistory.objects.using(alias)
+            .filter(**filters)
+            .aggregate(count=Count("id"), total=Sum("predicted_charges"))
+        )
+
+    parts = fan_out(partial)
+    count = sum(part["count"] for part in parts)
+    total = sum((part["total"] or Decimal("0") for part in parts), Decimal("0"))
+    return {
+        "count": count,
+        "total": total,
+        "average": total / count if count else None,
+    }
@@ -0,0 +1,79 @@
+from typing import Any
+
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import availability, caching, pricing, sharding
+from .models import (
+    Availability,
+    AvailabilityException,
+    AvailabilityRule,
+    Job,
+    PredictionHistory,
+    UserProfile,
+)
+
+
+@receiver(post_save, sender=Availability)
+@receiver(post_delete, sender=Availability)
+@receiver(post_save, sender=AvailabilityRule)
+@receiver(post_delete, sender=AvailabilityRule)
+@receiver(post_save, sender=AvailabilityException)
+@receiver(post_delete, sender=AvailabilityException)
+def invalidate_availability(sender: Any, **kwargs: Any) -> None:
+    """Any change to rules, exceptions or overrides drops the cached days."""
+    availability.invalidate_cache()
+
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+def invalidate_jobs(sender: Any, instance: Job, **kwargs: Any) -> None:
+    """Any change to the job openings drops the cached listings."""
+    caching.invalidate_on_commit(caching.JOBS_TAG, using=instance._state.db)
+
+
+@receiver(post_save, sender=PredictionHistory)
+@receiver(post_delete, sender=PredictionHistory)
+def invalidate_history_stats(
+    sender: Any, instance: PredictionHistory, **kwargs: Any
+) -> None:
+    """
+    A new or deleted prediction drops its user's cached history statistics.
+
+    Archiving and erasure delete their batches without signals (a receiver
+    here would otherwise make them load every row) and invalidate the users
+    of each batch themselves.
+    """
+    caching.invalidate_on_commit(
+        caching.history_tag(instance.user_id), using=instance._state.db
+    )
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_user(sender: Any, instance: UserProfile, **kwargs: Any) -> None:
+    """Any change to a profile drops its cached copy (see `backends`)."""
+    caching.invalidate_on_commit(
+        caching.user_tag(instance.pk), using=instance._state.db
+    )
+
+
+@receiver(pre_delete, sender=UserProfile)
+def delete_sharded_predictions(
+    sender: Any, instance: UserProfile, **kwargs: Any
+) -> None:
+    """The cascade only reaches the user's database, so clear their shard too."""
+    if sharding.shards():
+        predictions = PredictionHistory.objects.for_user(instance)
+        # Predictions have no dependents; skip collecting them for the signal.
+        predictions._raw_delete(predictions.db)
+        caching.invalidate_on_commit(
+            caching.history_tag(instance.pk), using=predictions.db
+        )
+
+
+@receiver(post_save, sender=UserProfile)
+def refresh_quote(sender: Any, instance: UserProfile, raw: bool, **kwargs: Any) -> None:
+    """Re-quote the premium once a change to the pricing inputs is committed."""
+    if not raw:
+        pricing.schedule_refresh(instance)
@@ -0,0 +1,115 @@
+"""Mergeable quantile sketch for premium distributions.
+
+A log-bucketed histogram in the style of DDSketch: a positive value `v` is
+counted in bucket ``ceil(log(v) / log(gamma))`` with
+``gamma = (1 + alpha) / (1 - alpha)``, so any quantile is returned within a
+relative error of `alpha`. Two sketches merge by adding their bucket counts,
+which is what lets daily rollups be combined into any date range without
+revisiting the raw rows.
+
+Buckets are stored densely from the lowest one in use, so a sketch serialises
+to a small JSON object::
+
+    {"o": <index of the first bucket>, "c": [<count>, ...], "z": <zero count>}
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Dict, Iterable, List, Optional
+
+RELATIVE_ACCURACY = 0.02
+
+
+class QuantileSketch:
+    """
+    Quantile sketch with bounded relative error.
+
+    Attributes:
+        offset (int): Index of the first bucket in `counts`.
+        counts (list[int]): Counts of consecutive buckets from `offset`.
+        zeros (int): Number of values <= 0 (premiums are never negative).
+    """
+
+    gamma = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+    _log_gamma = math.log(gamma)
+
+    def __init__(
+        self, offset: int = 0, counts: Optional[List[int]] = None, zeros: int = 0
+    ) -> None:
+        self.offset = offset
+        self.counts = counts or []
+        self.zeros = zeros
+
+    @property
+    def count(self) -> int:
+        return self.zeros + sum(self.counts)
+
+    def _index(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _ensure(self, low: int, high: int) -> None:
+        """Grow `counts` so buckets `low`..`high` are addressable."""
+        if not self.counts:
+            self.offset, self.counts = low, [0] * (high - low + 1)
+            return
+        if low < self.offset:
+            self.counts[:0] = [0] * (self.offset - low)
+            self.offset = low
+        end = self.offset + len(self.counts) - 1
+        if high > end:
+            self.counts.extend([0] * (high - end))
+
+    def add(self, value: float, count: int = 1) -> None:
+        """Record `value` `count` times."""
+        if value <= 0:
+            self.zeros += count
+            return
+        index = self._index(value)
+        self._ensure(index, index)
+        self.counts[index - self.offset] += count
+
+    def extend(self, values: Iterable[float]) -> None:
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: QuantileSketch) -> None:
+        """Add the counts of `other` into this sketch."""
+        self.zeros += other.zeros
+        if not other.counts:
+            return
+        self._ensure(other.offset, other.offset + len(other.counts) - 1)
+        start = other.offset - self.offset
+        for i, count in enumerate(other.counts, start):
+            self.counts[i] += count
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimate the `q` quantile (0 <= q <= 1).
+
+        Returns:
+            float | None: The estimate, or None for an empty sketch.
+        """
+        total = self.count
+        if not total:
+            return None
+        rank = q * (total - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if rank < seen:
+                index = self.offset + i
+                # Within `alpha` of every value in (gamma^(index-1), gamma^index].
+                return 2 * self.gamma**index / (self.gamma + 1)
+        return 2 * self.gamma ** (self.offset + len(self.counts) - 1) / (self.gamma + 1)
+
+    def to_json(self) -> Dict[str, object]:
+        return {"o": self.offset, "c": self.counts, "z": self.zeros}
+
+    @classmethod
+    def from_json(cls, data: Optional[Dict]) -> QuantileSketch:
+        if not data:
+            return cls()
+        return cls(data["o"], list(data["c"]), data["z"])
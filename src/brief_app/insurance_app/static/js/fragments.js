@@ -0,0 +1,36 @@
+// Progressive enhancement of forms marked with `data-fragment-url`: the form
+// is posted in the background and the HTML fragment returned replaces the
+// element named by `data-fragment-target`. Without JavaScript, or when the
+// fragment request fails or redirects (e.g. an expired session), the form is
+// submitted normally and the server renders the whole page.
+document.addEventListener("submit", async (event) => {
+    const form = event.target;
+    const url = form.dataset.fragmentUrl;
+    const target = document.getElementById(form.dataset.fragmentTarget || "");
+    if (!url || !target || !window.fetch) {
+        return;
+    }
+    event.preventDefault();
+
+    let response;
+    try {
+        response = await fetch(url, {
+            method: "POST",
+            body: new FormData(form),
+            credentials: "same-origin",
+            redirect: "error",
+        });
+    } catch (error) {
+        form.submit();
+        return;
+    }
+    // 400 carries the form errors as a fragment too.
+    if (!response.ok && response.status !== 400) {
+        form.submit();
+        return;
+    }
+    target.innerHTML = await response.text();
+    if (response.ok && form.dataset.fragmentReset !== undefined) {
+        form.reset();
+    }
+});
@@ -0,0 +1,17 @@
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+
+class HashedStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """
+    Static files collected under content-hashed, compressed names.
+
+    WhiteNoise serves hashed names with far-future caching. An asset missing
+    from the manifest (not collected yet, or referenced but absent) keeps its
+    plain URL instead of failing the page that links it.
+    """
+
+    def stored_name(self, name: str) -> str:
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
@@ -0,0 +1,406 @@
+"""Synthetic data for load and scale testing.
+
+`generate()` fills the database with realistic-looking users, their prediction
+history and appointments, plus availability days and contact messages. Every
+value is drawn from a `random.Random` seeded once per run, and primary keys
+are assigned from the current highest id, so the same seed on the same
+database always produces the same rows.
+
+Rows are written in batches of `executemany` inserts of prepared column
+values inside one transaction per batch of users. `bulk_create` would be the
+natural tool, but on SQLite it spends most of its time compiling one
+statement per 999 parameters (about 60s per million predictions); writing the
+already prepared values skips that and keeps a million rows well under half a
+minute. Generated columns (BMI and categories) are computed by the database
+as usual, and every user shares one pre-hashed password.
+"""
+
+from __future__ import annotations
+
+import random
+from collections import defaultdict
+from contextlib import ExitStack
+from dataclasses import dataclass, field, fields
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connections, models, router, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from . import sharding
+from .availability import DEFAULT_TIME_SLOTS
+from .models import (
+    Appointment,
+    Availability,
+    ContactMessage,
+    PredictionHistory,
+    UserProfile,
+)
+
+BATCH_SIZE = 5000
+DEFAULT_PASSWORD = "synthetic"
+
+FIRST_NAMES = [
+    "Alice", "Bruno", "Chloe", "David", "Emma", "Farid", "Grace", "Hugo",
+    "Ines", "Jules", "Karim", "Lea", "Malik", "Nora", "Oscar", "Paul",
+]  # fmt: skip
+LAST_NAMES = [
+    "Martin", "Bernard", "Dubois", "Thomas", "Robert", "Richard", "Petit",
+    "Durand", "Leroy", "Moreau", "Simon", "Laurent", "Lefebvre", "Michel",
+]  # fmt: skip
+MESSAGES = [
+    "I would like to know more about your family plans.",
+    "Can I change the date of my appointment?",
+    "My quote seems high, could someone call me back?",
+    "How do I add a child to my policy?",
+    "Please send me the documents for my claim.",
+]
+
+Row = List[Any]
+
+
+@dataclass
+class Distributions:
+    """
+    Shape of the generated data.
+
+    Attributes:
+        predictions_per_user (float): Mean quotes per user; counts follow an
+            exponential distribution, so a few users have long histories.
+        appointments_per_user (float): Mean appointments per user.
+        smoker_rate (float): Share of smokers.
+        male_rate (float): Share of men.
+        region_weights (dict): Relative weight of each region.
+        children_weights (list[float]): Relative weight of 0, 1, 2... children.
+        age_mean, age_sd (float): Normal age distribution, clipped to 18-64.
+        height_mean, height_sd (float): Normal height in cm, clipped to 145-205.
+        bmi_mean, bmi_sd (float): Normal BMI the weight is derived from,
+            clipped to 16-53.
+        history_days (int): Quotes and messages are spread over this many days.
+        booking_days (int): Appointments may be up to this many days ahead.
+    """
+
+    predictions_per_user: float = 5.0
+    appointments_per_user: float = 0.5
+    smoker_rate: float = 0.2
+    male_rate: float = 0.5
+    region_weights: Dict[str, float] = field(
+        default_factory=lambda: {
+            region: 1.0 for region in UserProfile.RegionType.values
+        }
+    )
+    children_weights: List[float] = field(
+        default_factory=lambda: [0.43, 0.24, 0.18, 0.12, 0.02, 0.01]
+    )
+    age_mean: float = 39.0
+    age_sd: float = 14.0
+    height_mean: float = 170.0
+    height_sd: float = 10.0
+    bmi_mean: float = 30.7
+    bmi_sd: float = 6.1
+    history_days: int = 730
+    booking_days: int = 60
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> Distributions:
+        """Build from a mapping, e.g. a JSON config file, rejecting unknown keys."""
+        known = {f.name for f in fields(cls)}
+        unknown = set(data) - known
+        if unknown:
+            raise ValueError(f"Unknown distribution settings: {sorted(unknown)}")
+        return cls(**data)
+
+
+@dataclass
+class _Profile:
+    age: int
+    weight: int
+    height: int
+    num_children: int
+    smoker: str
+    region: str
+    sex: str
+
+
+def _clipped(rng: random.Random, mean: float, sd: float, low: int, high: int) -> int:
+    return min(high, max(low, round(rng.gauss(mean, sd))))
+
+
+def _count(rng: random.Random, mean: float) -> int:
+    return int(rng.expovariate(1 / mean) + 0.5) if mean > 0 else 0
+
+
+def _charges(rng: random.Random, profile: _Profile) -> Decimal:
+    """A premium following the shape of the training data, in cents precision."""
+    bmi = profile.weight * 10000 / (profile.height * profile.height)
+    base = 260 * profile.age + 330 * bmi + 480 * profile.num_children - 11500
+    if profile.smoker == UserProfile.SmokerType.YES:
+        base += 23800
+    cents = max(112187, round((base + rng.gauss(0, 4000)) * 100))
+    return Decimal(cents).scaleb(-2)
+
+
+class _Writer:
+    """Batched inserts of explicit rows, one transaction per flush."""
+
+    # Field types whose Python values need adapting for the database.
+    _ADAPTED = {"DateField", "DateTimeField", "DecimalField", "JSONField"}
+
+    def __init__(self, batch_size: int) -> None:
+        self.batch_size = batch_size
+        self.pending: Dict[Tuple[type, str], List[Row]] = defaultdict(list)
+        self.counts: Dict[str, int] = defaultdict(int)
+        self.touched: set = set()
+        self._columns: Dict[type, List[models.Field]] = {}
+
+    def columns(self, model: type) -> List[models.Field]:
+        """Columns written for `model`: all but the generated ones."""
+        if model not in self._columns:
+            self._columns[model] = [
+                f for f in model._meta.concrete_fields if not f.generated
+            ]
+        return self._columns[model]
+
+    def add(self, model: type, alias: str, **values: Any) -> None:
+        row = [values[f.attname] for f in self.columns(model)]
+        self.pending[(model, alias)].append(row)
+
+    def _insert(self, model: type, alias: str, rows: List[Row]) -> None:
+        connection = connections[alias]
+        columns = self.columns(model)
+        adapted = [
+            (i, f)
+            for i, f in enumerate(columns)
+            if f.get_internal_type() in self._ADAPTED
+        ]
+        for row in rows:
+            for i, f in adapted:
+                row[i] = f.get_db_prep_save(row[i], connection)
+        quote = connection.ops.quote_name
+        sql = "INSERT INTO {} ({}) VALUES ({})".format(
+            quote(model._meta.db_table),
+            ", ".join(quote(f.column) for f in columns),
+            ", ".join(["%s"] * len(columns)),
+        )
+        with connection.cursor() as cursor:
+            for start in range(0, len(rows), self.batch_size):
+                cursor.executemany(sql, rows[start : start + self.batch_size])
+        self.counts[model.__name__] += len(rows)
+        self.touched.add((model, alias))
+
+    def flush(self) -> None:
+        pending, self.pending = self.pending, defaultdict(list)
+        with ExitStack() as stack:
+            for alias in {alias for _, alias in pending}:
+                stack.enter_context(transaction.atomic(using=alias))
+            # Users first, so foreign keys are satisfied within the transaction.
+            for (model, alias), rows in sorted(
+                pending.items(), key=lambda item: item[0][0] is not UserProfile
+            ):
+                self._insert(model, alias, rows)
+
+    def reset_sequences(self) -> None:
+        """Move auto-increment sequences past the explicit ids (PostgreSQL)."""
+        for model, alias in self.touched:
+            connection = connections[alias]
+            statements = connection.ops.sequence_reset_sql(no_style(), [model])
+            if statements:
+                with connection.cursor() as cursor:
+                    for sql in statements:
+                        cursor.execute(sql)
+
+
+def _next_id(model: type, aliases: Iterable[str]) -> int:
+    highest = [
+        model._default_manager.using(alias).aggregate(top=Max("pk"))["top"] or 0
+        for alias in aliases
+    ]
+    return max(highest) + 1
+
+
+def generate(
+    users: int = 10000,
+    messages: int = 1000,
+    availability_days: int = 90,
+    distributions: Optional[Distributions] = None,
+    seed: int = 0,
+    batch_size: int = BATCH_SIZE,
+    password: str = DEFAULT_PASSWORD,
+    now: Optional[datetime] = None,
+    progress: Optional[Callable[[Dict[str, int]], None]] = None,
+) -> Dict[str, int]:
+    """
+    Insert synthetic rows and return how many were created per model.
+
+    Args:
+        users (int): Number of users; their quotes and appointments follow
+            `distributions`.
+        messages (int): Number of contact messages.
+        availability_days (int): Days from today given explicit availability;
+            days that already have a row are left alone.
+        distributions (Distributions | None): Shape of the data.
+        seed (int): Seed of the random generator.
+        batch_size (int): Users generated and committed per transaction.
+        password (str): Password shared by every synthetic user, hashed once.
+        now (datetime | None): Reference time for dates, `timezone.now()` by
+            default. Pass a fixed value for reproducible timestamps.
+        progress (callable | None): Called with the running counts after each
+            committed batch.
+
+    Returns:
+        dict[str, int]: Rows created per model name.
+    """
+    dist = distributions or Distributions()
+    rng = random.Random(seed)
+    now = now or timezone.now()
+    today = timezone.localdate(now) if timezone.is_aware(now) else now.date()
+    writer = _Writer(batch_size)
+    hashed = make_password(password)
+
+    user_alias = router.db_for_write(UserProfile)
+    history_aliases = sharding.history_aliases()
+    user_id = _next_id(UserProfile, [user_alias])
+    prediction_id = _next_id(PredictionHistory, history_aliases)
+    appointment_id = _next_id(Appointment, [router.db_for_write(Appointment)])
+
+    regions = list(dist.region_weights)
+    region_weights = list(dist.region_weights.values())
+    children = range(len(dist.children_weights))
+    history = dist.history_days * 86400
+
+    def report() -> None:
+        writer.flush()
+        if progress:
+            progress(dict(writer.counts))
+
+    for _ in range(users):
+        age = _clipped(rng, dist.age_mean, dist.age_sd, 18, 64)
+        height = _clipped(rng, dist.height_mean, dist.height_sd, 145, 205)
+        bmi = min(53.0, max(16.0, rng.gauss(dist.bmi_mean, dist.bmi_sd)))
+        profile = _Profile(
+            age=age,
+            weight=round(bmi * height * height / 10000),
+            height=height,
+            num_children=rng.choices(children, dist.children_weights)[0],
+            smoker=(
+                UserProfile.SmokerType.YES.value
+                if rng.random() < dist.smoker_rate
+                else UserProfile.SmokerType.NO.value
+            ),
+            region=rng.choices(regions, region_weights)[0],
+            sex=(
+                UserProfile.SexType.MALE.value
+                if rng.random() < dist.male_rate
+                else UserProfile.SexType.FEMALE.value
+            ),
+        )
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        joined = now - timedelta(seconds=rng.randrange(history))
+        writer.add(
+            UserProfile,
+            user_alias,
+            id=user_id,
+            password=hashed,
+            last_login=None,
+            is_superuser=False,
+            username=f"synthetic{user_id}",
+            first_name=first,
+            last_name=last,
+            email=f"synthetic{user_id}@example.com",
+            is_staff=False,
+            is_active=True,
+            date_joined=joined,
+            # Left stale for `manage.py refresh_quotes`.
+            quoted_charges=None,
+            quote_model_version="",
+            quote_inputs="",
+            quoted_at=None,
+            **vars(profile),
+        )
+
+        alias = sharding.shard_for_user(user_id) or router.db_for_write(
+            PredictionHistory
+        )
+        since_joined = max(1, int((now - joined).total_seconds()))
+        for _ in range(_count(rng, dist.predictions_per_user)):
+            writer.add(
+                PredictionHistory,
+                alias,
+                id=prediction_id,
+                user_id=user_id,
+                timestamp=now - timedelta(seconds=rng.randrange(since_joined)),
+                predicted_charges=_charges(rng, profile),
+                inputs_hash="",
+                repeat_count=0,
+                **vars(profile),
+            )
+            prediction_id += 1
+
+        for _ in range(_count(rng, dist.appointments_per_user)):
+            writer.add(
+                Appointment,
+                router.db_for_write(Appointment),
+                id=appointment_id,
+                user_id=user_id,
+                reason=rng.choice(Appointment.REASON_CHOICES)[0],
+                date=today
+                + timedelta(days=rng.randint(-dist.history_days, dist.booking_days)),
+                time=rng.choice(DEFAULT_TIME_SLOTS),
+                updated_at=now,
+            )
+            appointment_id += 1
+
+        user_id += 1
+        if len(writer.pending[(UserProfile, user_alias)]) >= batch_size:
+            report()
+
+    _add_messages(writer, rng, messages, now, history)
+    _add_availability(writer, rng, availability_days, today)
+    report()
+    writer.reset_sequences()
+    return dict(writer.counts)
+
+
+def _add_messages(
+    writer: _Writer, rng: random.Random, count: int, now: datetime, history: int
+) -> None:
+    alias = router.db_for_write(ContactMessage)
+    next_id = _next_id(ContactMessage, [alias])
+    for offset in range(count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        writer.add(
+            ContactMessage,
+            alias,
+            id=next_id + offset,
+            name=f"{first} {last}",
+            email=f"{first}.{last}@example.com".lower(),
+            message=rng.choice(MESSAGES),
+            submitted_at=now - timedelta(seconds=rng.randrange(history)),
+        )
+        if (offset + 1) % writer.batch_size == 0:
+            writer.flush()
+
+
+def _add_availability(
+    writer: _Writer, rng: random.Random, days: int, today: date
+) -> None:
+    alias = router.db_for_write(Availability)
+    taken = set(
+        Availability.objects.using(alias)
+        .filter(date__gte=today, date__lt=today + timedelta(days=days))
+        .values_list("date", flat=True)
+    )
+    next_id = _next_id(Availability, [alias])
+    for offset in range(days):
+        day = today + timedelta(days=offset)
+        slots = sorted(
+            rng.sample(DEFAULT_TIME_SLOTS, rng.randint(1, len(DEFAULT_TIME_SLOTS)))
+        )
+        if day in taken:
+            continue
+        writer.add(Availability, alias, id=next_id, date=day, time_slots=slots)
+        next_id += 1
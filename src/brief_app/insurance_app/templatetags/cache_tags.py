@@ -0,0 +1,47 @@
+from django import template
+
+from .. import caching
+
+register = template.Library()
+
+
+class CachedFragmentNode(template.Node):
+    def __init__(self, nodelist, name, tags):
+        self.nodelist = nodelist
+        self.name = name
+        self.tags = tags
+
+    def render(self, context):
+        name = self.name.resolve(context)
+        tags = [str(tag.resolve(context)) for tag in self.tags]
+        return caching.get_or_set(
+            f"fragment:{name}",
+            lambda: self.nodelist.render(context),
+            key=(name, tags),
+            tags=tags,
+        )
+
+
+@register.tag
+def cachedfragment(parser, token):
+    """
+    Cache the enclosed fragment until one of its tags is invalidated.
+
+    The first argument names the fragment, the others are its tags::
+
+        {% cachedfragment "job-openings" "jobs" %}...{% endcachedfragment %}
+
+    The fragment must not depend on the user or the request.
+    """
+    bits = token.split_contents()
+    if len(bits) < 3:
+        raise template.TemplateSyntaxError(
+            f"{bits[0]!r} takes a fragment name and at least one tag"
+        )
+    nodelist = parser.parse(("endcachedfragment",))
+    parser.delete_first_token()
+    return CachedFragmentNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        [parser.compile_filter(bit) for bit in bits[2:]],
+    )
@@ -1,8 +1,10 @@
 from django import template
 
+from ..availability import DEFAULT_TIME_SLOTS
+
 register = template.Library()
 
 
 @register.filter
 def time_range(value):
-    return [f"{hour:02d}:00" for hour in range(9, 19)]
+    return list(DEFAULT_TIME_SLOTS)
@@ -17,11 +17,15 @@ from .views import (
     HealthAdvicesView,
     CybersecurityAwarenessView,
     message_list_view,
+    portfolio_analytics,
+    query_log,
     ChangePasswordView,
     PredictChargesView,
     UserLogoutView,
     WelcomeView,
     PredictionHistoryView,
+    export_prediction_history,
+    export_predictions,
     book_appointment,
     get_available_times,
     TestingView,
@@ -37,12 +41,28 @@ urlpatterns = [
     # For the users
     path("profile/", UserProfileView.as_view(), name="profile"),
     path("predict-charges/", PredictChargesView.as_view(), name="predict"),
+    path(
+        "predict-charges/result/",
+        PredictChargesView.as_view(fragment=True, http_method_names=["post"]),
+        name="predict_result",
+    ),
     path(
         "prediction-history/",
         PredictionHistoryView.as_view(),
         name="prediction_history",
     ),
+    path(
+        "prediction-history/export/",
+        export_prediction_history,
+        name="export_prediction_history",
+    ),
     path("book/", book_appointment, name="book_appointment"),
+    path(
+        "book/appointments/",
+        book_appointment,
+        {"fragment": True},
+        name="appointment_list",
+    ),
     # path('admin-appointments/', admin_appointment_list, name='admin_appointment_list'),
     # Other website pages
     path("about/", AboutView.as_view(), name="about"),
@@ -63,6 +83,9 @@ urlpatterns = [
         name="cybersecurity_awareness",
     ),
     path("messages/", message_list_view, name="messages_list"),
+    path("analytics/", portfolio_analytics, name="portfolio_analytics"),
+    path("analytics/export/", export_predictions, name="export_predictions"),
+    path("query-log/", query_log, name="query_log"),
     path("solve-message/<int:message_id>/", solve_message, name="solve_message"),
     path("quote-predict/", predict_charges, name="predict_charges"),
     # Password (Change or Reset) URLs
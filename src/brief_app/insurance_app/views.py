@@ -11,8 +11,13 @@ from .models import (
     ContactMessage,
     PredictionHistory,
     Appointment,
-    Availability,
+    BmiCategory,
+    categorize_age,
+    categorize_bmi,
+    PortfolioRollup,
 )
+from . import analytics, caching, conditional, exports, pricing, query_budget
+from .availability import get_time_slots
 from .forms import (
     UserProfileForm,
     UserSignupForm,
@@ -26,7 +31,9 @@ from django.http import (
     HttpRequest,
     JsonResponse,
     HttpResponseBase,
+    HttpResponseBadRequest,
 )
+import logging
 import pickle
 import json
 from django.views.decorators.csrf import csrf_exempt
@@ -34,18 +41,20 @@ from django.contrib.auth import logout, get_user_model
 from django.conf import settings
 from django.views import View
 import pandas as pd
-import os
 from django.contrib.admin.views.decorators import staff_member_required
 from django.views.generic import ListView
-from django.db.models import Avg
 from django.contrib.auth.decorators import login_required
 from django.utils import timezone
-from typing import Dict, Any, Optional, Union, Type, cast
+from django.utils.decorators import method_decorator
+from datetime import timedelta
+from typing import Dict, Any, List, Optional, Union, Type, cast
 from django.forms import Form
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth.models import AbstractUser, AnonymousUser, AbstractBaseUser
 
 
+logger = logging.getLogger(__name__)
+
 User: Type[AbstractBaseUser] = get_user_model()
 
 
@@ -115,6 +124,8 @@ class JoinUsView(TemplateView):
 
     This view retrieves all available job listings from the database and renders them
     in the 'join_us.html' template. The jobs are passed to the template context for display.
+    The jobs are cached in this process's memory and the rendered listings in the
+    shared cache, both until a job is saved or deleted (see `insurance_app.caching`).
 
     Attributes:
         template_name (str): The name of the template used to display the response.
@@ -136,7 +147,9 @@ class JoinUsView(TemplateView):
 
     def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
         context = super().get_context_data(**kwargs)
-        context["jobs"] = Job.objects.all()
+        context["jobs"] = caching.cache_queryset(
+            Job.objects.all(), tags=[caching.JOBS_TAG], tier="local"
+        )
         return context
 
 
@@ -328,6 +341,145 @@ def message_list_view(request: HttpRequest) -> HttpResponse:
     return render(request, "insurance_app/messages_list.html", {"messages": messages})
 
 
+ANALYTICS_PERIODS = ("day", "week", "month")
+
+
+@staff_member_required
+def portfolio_analytics(request: HttpRequest) -> HttpResponse:
+    """
+    Displays premium distribution and trends of the whole portfolio to staff.
+
+    Figures come from the daily rollups maintained by the `refresh_analytics`
+    command, never from the prediction history itself, so the page costs the
+    same however large the history grows.
+
+    Args:
+        request (HttpRequest): The HTTP request object. Optional GET parameters:
+            `dimension` (region, smoker, sex, age_category, bmi_category),
+            `days` (length of the window, default 90) and
+            `period` (day, week or month, for the trend).
+
+    Returns:
+        HttpResponse: Renders the 'analytics.html' template with the following context:
+            - `breakdown` (list): Count, average and percentiles per dimension value.
+            - `trend` (list): The same statistics for the whole portfolio over time.
+            - `last_refresh` (datetime): When the rollups were last refreshed.
+    """
+    dimension = request.GET.get("dimension", "region")
+    if dimension not in analytics.DIMENSIONS:
+        dimension = "region"
+    period = request.GET.get("period", "day")
+    if period not in ANALYTICS_PERIODS:
+        period = "day"
+    try:
+        days = min(max(int(request.GET.get("days", 90)), 1), 3660)
+    except ValueError:
+        days = 90
+
+    end = timezone.localdate()
+    start = end - timedelta(days=days - 1)
+    context = {
+        "dimensions": [
+            choice
+            for choice in PortfolioRollup.Dimension.choices
+            if choice[0] in analytics.DIMENSIONS
+        ],
+        "periods": ANALYTICS_PERIODS,
+        "dimension": dimension,
+        "period": period,
+        "days": days,
+        "start": start,
+        "end": end,
+        "breakdown": analytics.breakdown(dimension, start, end),
+        "trend": analytics.trend(start, end, period),
+        "last_refresh": analytics.last_refresh(),
+    }
+    return render(request, "insurance_app/analytics.html", context)
+
+
+@staff_member_required
+def query_log(request: HttpRequest) -> HttpResponse:
+    """
+    Displays the slow queries captured by this server process, with their plans.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        HttpResponse: Renders the 'query_log.html' template with the following context:
+            - `slow_queries` (list): Captured `SlowQuery` entries, newest first.
+            - `threshold_ms` (int): Duration above which a SELECT is captured.
+            - `cache_stats` (list): Hits and misses per cache name.
+    """
+    context = {
+        "slow_queries": query_budget.slow_queries(),
+        "threshold_ms": settings.SLOW_QUERY_MS,
+        "cache_stats": caching.stats(),
+    }
+    return render(request, "insurance_app/query_log.html", context)
+
+
+def _export_predictions(
+    request: HttpRequest, rows: Any, fields: Any, filename: str
+) -> HttpResponseBase:
+    """
+    Streams `rows(cursor)` in the format and from the cursor given in the query.
+    """
+    format = request.GET.get("format", "csv")
+    if format not in exports.CONTENT_TYPES:
+        return HttpResponseBadRequest(
+            "format must be csv or ndjson", content_type="text/plain"
+        )
+    try:
+        cursor = exports.parse_cursor(
+            request.GET.get("after"), request.GET.get("after_id")
+        )
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc), content_type="text/plain")
+    return exports.export_response(rows(cursor), fields, format, filename)
+
+
+@login_required
+def export_prediction_history(request: HttpRequest) -> HttpResponseBase:
+    """
+    Streams the logged-in user's whole prediction history as a download.
+
+    Args:
+        request (HttpRequest): The HTTP request object. Optional GET parameters:
+            `format` (csv or ndjson, default csv), and `after`/`after_id` to
+            resume after the timestamp and id of the last row received.
+
+    Returns:
+        StreamingHttpResponse: The predictions, oldest first, or a 400 response
+        for an unknown format or a malformed cursor.
+    """
+    user = request.user
+    return _export_predictions(
+        request,
+        lambda cursor: exports.iter_rows(
+            PredictionHistory.objects.for_user(user), exports.EXPORT_FIELDS, cursor
+        ),
+        exports.EXPORT_FIELDS,
+        "prediction-history",
+    )
+
+
+@staff_member_required
+def export_predictions(request: HttpRequest) -> HttpResponseBase:
+    """
+    Streams the prediction history of every user, across all shards, to staff.
+
+    Takes the same `format`, `after` and `after_id` parameters as
+    `export_prediction_history`; rows also carry the `user_id`.
+    """
+    return _export_predictions(
+        request,
+        lambda cursor: exports.iter_all_rows(exports.STAFF_EXPORT_FIELDS, cursor),
+        exports.STAFF_EXPORT_FIELDS,
+        "predictions",
+    )
+
+
 @csrf_exempt
 def solve_message(request: HttpRequest, message_id: int) -> JsonResponse:
     """
@@ -448,7 +600,8 @@ def predict_charges(request: HttpRequest) -> Union[HttpResponse, JsonResponse]:
 
 
 @login_required
-def book_appointment(request: HttpRequest) -> HttpResponse:
+@conditional.conditional_page(conditional.appointments_etag)
+def book_appointment(request: HttpRequest, fragment: bool = False) -> HttpResponse:
     """
     Handles appointment booking for authenticated users.
 
@@ -463,8 +616,14 @@ def book_appointment(request: HttpRequest) -> HttpResponse:
     - If the request is GET, it renders the appointment form.
     - Retrieves and displays the user's upcoming and past appointments.
 
+    Served as the `appointment_list` fragment endpoint, it renders only the
+    appointment lists instead, with a booking confirmation or the form errors
+    (status 400), and never redirects. `book_appointment.html` posts its form
+    there when JavaScript is available.
+
     Args:
         request (HttpRequest): The HTTP request object.
+        fragment (bool): Render the appointment lists fragment only.
 
     Returns:
         HttpResponse: Renders the `book_appointment.html` template with:
@@ -474,6 +633,8 @@ def book_appointment(request: HttpRequest) -> HttpResponse:
             - `past_appointments` (QuerySet): The user's past appointments, ordered by date (descending).
     """
     today = timezone.now().date()  # Get today's date in YYYY-MM-DD format
+    booked = False
+    status = 200
 
     # Handle form submission (POST request)
     if request.method == "POST":
@@ -484,10 +645,17 @@ def book_appointment(request: HttpRequest) -> HttpResponse:
             appointment.user = request.user  # Associate the logged-in user
             appointment.save()
 
-            messages.success(request, "Your appointment has been booked successfully!")
-            return redirect(
-                "book_appointment"
-            )  # Redirect to the same page after saving
+            if not fragment:
+                messages.success(
+                    request, "Your appointment has been booked successfully!"
+                )
+                return redirect(
+                    "book_appointment"
+                )  # Redirect to the same page after saving
+            booked = True
+            form = AppointmentForm()
+        else:
+            status = 400 if fragment else 200
     else:
         form = AppointmentForm()
 
@@ -500,16 +668,20 @@ def book_appointment(request: HttpRequest) -> HttpResponse:
         user=request.user, date__lt=today
     ).order_by("-date")
 
-    return render(
-        request,
-        "insurance_app/book_appointment.html",
-        {
-            "today": today,
-            "form": form,
-            "upcoming_appointments": upcoming_appointments,
-            "past_appointments": past_appointments,
-        },
-    )
+    context = {
+        "today": today,
+        "form": form,
+        "upcoming_appointments": upcoming_appointments,
+        "past_appointments": past_appointments,
+    }
+    if fragment:
+        return render(
+            request,
+            "insurance_app/includes/appointment_lists.html",
+            {**context, "booked": booked},
+            status=status,
+        )
+    return render(request, "insurance_app/book_appointment.html", context)
 
 
 def get_available_times(request: HttpRequest) -> JsonResponse:
@@ -517,8 +689,10 @@ def get_available_times(request: HttpRequest) -> JsonResponse:
     Retrieves available time slots for a given date.
 
     This function handles a GET request with a 'date' parameter and returns
-    the available time slots for that date in JSON format. If no availability
-    is found, an empty list is returned.
+    the available time slots for that date in JSON format. Slots come from the
+    weekly availability rules, minus exceptions, unless an explicit
+    `Availability` row exists for that date. If no availability is found, an
+    empty list is returned.
 
     Args:
         request (HttpRequest): The HTTP request object containing GET parameters.
@@ -532,9 +706,8 @@ def get_available_times(request: HttpRequest) -> JsonResponse:
     """
     if date := request.GET.get("date"):
         try:
-            availability = Availability.objects.get(date=date)
-            return JsonResponse({"times": availability.time_slots})
-        except Availability.DoesNotExist:
+            return JsonResponse({"times": get_time_slots(date)})
+        except ValueError:
             return JsonResponse({"times": []})
     return JsonResponse({"times": []})
 
@@ -633,6 +806,7 @@ class CustomLoginView(LoginView):
         return super().form_valid(form)
 
 
+@method_decorator(conditional.conditional_page(conditional.profile_etag), "get")
 class UserProfileView(LoginRequiredMixin, UpdateView):
     """
     A view for authenticated users to update their own profile information.
@@ -795,22 +969,38 @@ class PredictChargesView(LoginRequiredMixin, UpdateView):
 
         form_valid(form):
             Validates and processes the form data, updates the user profile,
-            generates a prediction, and displays the prediction results.
+            and displays its quote, which the save recomputed if the inputs
+            changed (see `insurance_app.pricing`), with the prediction results.
+            Repeating a recent prediction bumps its repeat count instead of
+            logging it again.
+
+        reject(form, error):
+            Shows an error with the submitted form.
 
-        form_invalid(form, error_message):
+        form_invalid(form):
             Handles invalid form submissions and returns an error message.
 
+        render_fragment(status, **context):
+            Renders the prediction result area alone. The `predict_result`
+            endpoint serves this view with `fragment=True`, answering POSTs
+            with the result, or the errors with status 400, instead of the
+            whole page; `predict.html` posts its form there when JavaScript
+            is available.
+
         categorize_bmi(bmi):
-            Categorizes the user's BMI into weight categories (underweight, normal, overweight, obese).
+            Categorizes a BMI into weight categories (underweight, normal, overweight, obese).
+            Saved profiles carry the same value in their `bmi_category` column.
 
         categorize_age(age):
-            Categorizes the user's age into life stages (young adult, early adulthood, mid adulthood, late adulthood).
+            Categorizes an age into life stages (young adult, early adulthood, mid adulthood, late adulthood).
+            Saved profiles carry the same value in their `age_category` column.
 
         preprocess_data(data):
             Prepares the input data by performing necessary transformations and encoding for prediction.
+            Delegates to `pricing.features()`.
 
         load_model():
-            Loads the pre-trained model from a pickle file for prediction.
+            Returns the pre-trained model, unpickled once per process by `pricing.load_model()`.
 
     Args:
         request (HttpRequest): The HTTP request object.
@@ -826,7 +1016,10 @@ class PredictChargesView(LoginRequiredMixin, UpdateView):
     model = get_user_model()
     form_class = PredictChargesForm
     template_name = "insurance_app/predict.html"
+    fragment_template_name = "insurance_app/includes/prediction_result.html"
     success_url = reverse_lazy("predict")
+    # Set by the `predict_result` endpoint: render only the result area.
+    fragment = False
 
     def get_object(self, queryset=None) -> UserProfile:
         return cast(UserProfile, self.request.user)
@@ -844,142 +1037,64 @@ class PredictChargesView(LoginRequiredMixin, UpdateView):
 
         # Validate inputs
         if user_profile.height <= 0:
-            messages.error(self.request, "Height must be a positive number.")
-            return self.form_invalid(form)
+            return self.reject(form, "Height must be a positive number.")
 
-        # Calculate BMI using model property
-        try:
-            bmi = user_profile.bmi
-        except ZeroDivisionError:
-            messages.error(self.request, "Invalid height value (cannot be zero)")
-            return self.form_invalid(form)
-
-        # Create prediction data
-        prediction_data = {
-            "age": user_profile.age,
-            "bmi": bmi,
-            "smoker": user_profile.smoker,
-            "children": user_profile.num_children,
-            "region": user_profile.region,
-            "sex": user_profile.sex,
-        }
-
-        # Preprocess and predict
-        preprocessed_data = self.preprocess_data(prediction_data)
-        model = self.load_model()
-
-        if not model:
-            messages.error(self.request, "Failed to load prediction model.")
-            return self.form_invalid(form)
-
-        predicted_charges = model.predict(preprocessed_data)
-        prediction_value = round(predicted_charges[0], 2)
-
-        # Save prediction history
-        PredictionHistory.objects.create(
-            user=user_profile,
-            age=user_profile.age,
-            weight=user_profile.weight,
-            height=user_profile.height,
-            num_children=user_profile.num_children,
-            smoker=user_profile.smoker,
-            region=user_profile.region,
-            sex=user_profile.sex,
-            predicted_charges=prediction_value,
-        )
+        # Saving the profile re-quoted it if its inputs changed; an unchanged
+        # profile reuses its stored quote. A repeat of a recent prediction
+        # bumps its repeat count instead of adding to the history.
+        prediction = pricing.record_prediction(user_profile)
+
+        if prediction is None:
+            return self.reject(form, "Failed to load prediction model.")
 
+        if self.fragment:
+            return self.render_fragment(
+                form=form, predicted_charges=prediction.predicted_charges
+            )
         return self.render_to_response(
             self.get_context_data(
                 form=form,
-                predicted_charges=prediction_value,
+                predicted_charges=prediction.predicted_charges,
                 recent_predictions=user_profile.insurance_predictions.all()[:5],
             )
         )
 
+    def reject(self, form: Form, error: str) -> HttpResponse:
+        """Show `error` with the submitted form."""
+        if self.fragment:
+            return self.render_fragment(status=400, form=form, error=error)
+        messages.error(self.request, error)
+        return self.form_invalid(form)
+
     def form_invalid(self, form: Form) -> HttpResponse:
         """Handle invalid form submission."""
+        if self.fragment:
+            return self.render_fragment(status=400, form=form)
         messages.error(self.request, "There was an error with your submission.")
         return super().form_invalid(form)
 
+    def render_fragment(self, status: int = 200, **context: Any) -> HttpResponse:
+        """Render the result area alone, for the `predict_result` endpoint."""
+        return render(self.request, self.fragment_template_name, context, status=status)
+
     def categorize_bmi(self, bmi: float) -> str:
-        if bmi < 18.5:
-            return "under_weight"
-        elif 18.5 <= bmi < 25:
-            return "normal_weight"
-        elif 25 <= bmi < 30:
-            return "over_weight"
-        else:
-            return "obese"
+        return categorize_bmi(bmi)
 
     def categorize_age(self, age: int) -> str:
-        if 18 < age < 26:
-            return "young_adult"
-        elif 26 <= age < 36:
-            return "early_adulthood"
-        elif 36 <= age < 46:
-            return "mid_adulthood"
-        else:
-            return "late_adulthood"
+        return categorize_age(age)
 
     def preprocess_data(self, data: Dict[str, Any]) -> pd.DataFrame:
-        # Define the expected columns (must match the model's input requirements)
-        expected_columns = [
-            "smoker",
-            "age",
-            "bmi",
-            "age_category_young_adult",
-            "age_category_early_adulthood",
-            "bmi_category_over_weight",
-            "bmi_category_obese",
-            "children_str_0",
-        ]
-
-        # Create a DataFrame from the input data
-        df = pd.DataFrame([data])
-
-        # Convert smoker to binary (1 for "Yes", 0 for "No")
-        df["smoker"] = df["smoker"].map({"Yes": 1, "No": 0})
-
-        # Categorize age and bmi
-        df["age_category"] = df["age"].apply(self.categorize_age)
-        df["bmi_category"] = df["bmi"].apply(self.categorize_bmi)
-
-        # Convert children to string (for one-hot encoding)
-        df["children_str"] = df["children"].apply(lambda x: str(x))
-
-        # Perform one-hot encoding for categorical columns
-        df = pd.get_dummies(
-            df, columns=["age_category", "bmi_category", "children_str"], dtype=(int)
-        )
-
-        # Ensure all expected columns are present
-        for col in expected_columns:
-            if col not in df.columns:
-                df[col] = 0  # Add missing columns with default value 0
-
-        # Reorder columns to match the model's expectations
-        df = df[expected_columns]
-
-        return df
+        return pricing.features([data])
 
     def load_model(self) -> Optional[Any]:
-        try:
-            model_path = os.path.join(
-                settings.BASE_DIR, "insurance_app/model/model.pkl"
-            )
-            with open(model_path, "rb") as file:
-                model = pickle.load(file)
-            return model
-        except FileNotFoundError:
-            print("Error: The model file 'model.pkl' was not found.")
-            return None
-        except pickle.UnpicklingError:
-            print(
-                "Error: The file could not be unpickled. Ensure it is a valid pickle file."
-            )
+        model = pricing.load_model()
+        if model is None:
+            logger.error("The pricing model could not be loaded.")
             return None
+        return model.estimator
 
 
+@method_decorator(conditional.conditional_page(conditional.history_etag), "get")
 class PredictionHistoryView(LoginRequiredMixin, ListView):
     """
     Displays a list of prediction history for a logged-in user.
@@ -997,11 +1112,14 @@ class PredictionHistoryView(LoginRequiredMixin, ListView):
     Methods:
         get_queryset():
             Returns a queryset containing the user's prediction history,
-            ordered by timestamp and limited to the logged-in user.
+            ordered by timestamp and limited to the logged-in user. The rows are
+            read from the user's shard when prediction history is sharded.
 
         get_context_data(**kwargs):
             Adds extra context to the template, including the user profile,
-            total predictions, and average predicted charges.
+            total predictions, and average predicted charges. These and the BMI
+            breakdown come from one grouped query, cached until the user's
+            history changes. The paginator counts the listed rows itself.
 
     Args:
         request (HttpRequest): The HTTP request object.
@@ -1021,21 +1139,38 @@ class PredictionHistoryView(LoginRequiredMixin, ListView):
     paginate_by = 10
 
     def get_queryset(self):
-        return (
-            self.model.objects.filter(user=self.request.user)
-            .select_related("user")
-            .order_by("-timestamp")
-        )
+        queryset = self.model.objects.for_user(self.request.user)
+        bmi_category = self.request.GET.get("bmi_category")
+        if bmi_category in BmiCategory.values:
+            queryset = queryset.filter(bmi_category=bmi_category)
+        return queryset.order_by("-timestamp")
+
+    def get_bmi_summary(self) -> List[Dict[str, Any]]:
+        """Count and charges per BMI category of the user's whole history."""
+        if not hasattr(self, "_bmi_summary"):
+            user = self.request.user
+            self._bmi_summary = caching.cache_queryset(
+                self.model.objects.for_user(user).category_summary("bmi_category"),
+                tags=[caching.history_tag(user.pk)],
+                name="history-stats",
+            )
+        return self._bmi_summary
 
     def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
+        summary = self.get_bmi_summary()
         context = super().get_context_data(**kwargs)
+        total = sum(row["count"] for row in summary)
+        total_charges = sum(row["total_charges"] for row in summary)
         context.update(
             {
                 "user_profile": self.request.user,
-                "total_predictions": self.get_queryset().count(),
-                "average_charges": self.get_queryset().aggregate(
-                    Avg("predicted_charges")
-                )["predicted_charges__avg"],
+                "total_predictions": total,
+                "average_charges": total_charges / total if total else None,
+                "bmi_breakdown": [
+                    {**row, "label": BmiCategory(row["bmi_category"]).label}
+                    for row in summary
+                ],
+                "selected_bmi_category": self.request.GET.get("bmi_category", ""),
             }
         )
         return context
@@ -0,0 +1,324 @@
+"""Incremental change-data export of prediction history for the warehouse.
+
+Each run exports only the predictions created since the previous run: rows
+are read by primary key above a per-database high-water mark, so a run costs
+an index range scan over the new rows whatever the size of the table. They
+are appended as gzip-compressed NDJSON or CSV parts, partitioned by UTC day::
+
+    <WAREHOUSE_EXPORT_DIR>/predictions/
+        dt=<YYYY-MM-DD>/part-r<run>-<alias>-<n>.<format>.gz
+        _manifests/run-<run>.json
+
+Part files are never rewritten. A run is published by atomically writing its
+manifest, which lists every part with its row count, id range, size and
+SHA-256 and records the high-water marks reached; consumers load the manifests
+they have not seen yet and ignore any file no manifest lists.
+
+The checkpoint follows the archive's pattern: parts are recorded as pending
+before they are written, so a run interrupted before its manifest has its
+parts deleted and exported again, and one interrupted after its manifest is
+rolled forward. Runs are serialized by `locks.advisory_lock()`, so the job can
+be scheduled on several nodes sharing the export directory.
+
+Ids are allocated before transactions commit, so the newest rows could still
+have lower-id neighbours in flight. A run therefore stops before the first
+row younger than `settle_seconds`; transactions creating predictions must not
+stay open longer than that.
+
+Rows are exported once, when created: a later bump of a prediction's
+`repeat_count` is not exported again.
+"""
+
+from __future__ import annotations
+
+import csv
+import gzip
+import hashlib
+import io
+import json
+import os
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone as dt_timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from django.conf import settings
+from django.db.models import Min
+from django.utils import timezone
+
+from . import sharding
+from .archive import write_atomic
+from .exports import encode_value
+from .locks import advisory_lock
+from .models import PredictionHistory
+
+DATASET = "predictions"
+FORMATS = ("ndjson", "csv")
+LOCK_NAME = "warehouse-export"
+CHUNK_SIZE = 2000
+ROWS_PER_FILE = 100_000
+SETTLE_SECONDS = 60
+
+COLUMNS = [field.attname for field in PredictionHistory._meta.concrete_fields]
+
+
+class ExportInProgress(RuntimeError):
+    """Another process holds the export lock."""
+
+
+@dataclass
+class RunResult:
+    """Outcome of one export run."""
+
+    run: int
+    rows: int = 0
+    parts: List[str] = field(default_factory=list)
+    manifest: Optional[str] = None
+
+
+def export_dir() -> Path:
+    return Path(settings.WAREHOUSE_EXPORT_DIR) / DATASET
+
+
+def _checkpoint_path() -> Path:
+    return export_dir() / "_checkpoint.json"
+
+
+def manifest_path(run: int) -> Path:
+    return export_dir() / "_manifests" / f"run-{run:08d}.json"
+
+
+def _load_checkpoint() -> Dict[str, Any]:
+    path = _checkpoint_path()
+    if not path.exists():
+        return {"run": 0, "high_water": {}, "pending": None}
+    return json.loads(path.read_text())
+
+
+def _save_checkpoint(state: Dict[str, Any]) -> None:
+    write_atomic(_checkpoint_path(), json.dumps(state).encode())
+
+
+def _recover() -> Dict[str, Any]:
+    """Settle a run interrupted by a previous process and return the checkpoint."""
+    state = _load_checkpoint()
+    pending = state["pending"]
+    if not pending:
+        return state
+    manifest = manifest_path(pending["run"])
+    if manifest.exists():
+        published = json.loads(manifest.read_text())
+        state = {"run": published["run"], "high_water": published["high_water"]}
+    else:
+        for part in pending["parts"]:
+            (export_dir() / part).unlink(missing_ok=True)
+    state["pending"] = None
+    _save_checkpoint(state)
+    return state
+
+
+class _ChecksumFile:
+    """Binary file wrapper keeping the SHA-256 and size of what is written."""
+
+    def __init__(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.handle = open(path, "wb")
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data: bytes) -> int:
+        self.sha256.update(data)
+        self.size += len(data)
+        return self.handle.write(data)
+
+    def flush(self) -> None:
+        self.handle.flush()
+
+
+class _Part:
+    """One part file being written."""
+
+    def __init__(self, relative: str, partition: str, alias: str, format: str):
+        self.relative = relative
+        self.partition = partition
+        self.alias = alias
+        self.rows = 0
+        self.first_id: Optional[int] = None
+        self.last_id: Optional[int] = None
+        self._file = _ChecksumFile(export_dir() / relative)
+        self._text = io.TextIOWrapper(
+            gzip.GzipFile(fileobj=self._file, mode="wb", mtime=0),
+            encoding="utf-8",
+            newline="",
+        )
+        self._csv = csv.writer(self._text) if format == "csv" else None
+        if self._csv:
+            self._csv.writerow(COLUMNS)
+
+    def write(self, row: tuple) -> None:
+        values = [encode_value(value) for value in row]
+        if self._csv:
+            self._csv.writerow(values)
+        else:
+            line = json.dumps(dict(zip(COLUMNS, values)), separators=(",", ":"))
+            self._text.write(line + "\n")
+        self.first_id = row[0] if self.first_id is None else self.first_id
+        self.last_id = row[0]
+        self.rows += 1
+
+    def close(self) -> Dict[str, Any]:
+        """Flush the part to disk and describe it for the manifest."""
+        self._text.close()
+        self._file.flush()
+        os.fsync(self._file.handle.fileno())
+        self._file.handle.close()
+        return {
+            "path": self.relative,
+            "partition": self.partition,
+            "database": self.alias,
+            "rows": self.rows,
+            "first_id": self.first_id,
+            "last_id": self.last_id,
+            "bytes": self._file.size,
+            "sha256": self._file.sha256.hexdigest(),
+        }
+
+
+def new_rows(
+    alias: str, last_id: int, cutoff: datetime, chunk_size: int = CHUNK_SIZE
+) -> Iterator[tuple]:
+    """
+    Rows of `alias` above `last_id`, in id order, up to the first unsettled row.
+
+    Rows created after `cutoff` may still have lower-id neighbours in flight,
+    so the range ends before the first of them.
+    """
+    queryset = PredictionHistory._base_manager.using(alias).filter(pk__gt=last_id)
+    unsettled = queryset.filter(timestamp__gt=cutoff).aggregate(first=Min("pk"))
+    if unsettled["first"] is not None:
+        queryset = queryset.filter(pk__lt=unsettled["first"])
+    return queryset.order_by("pk").values_list(*COLUMNS).iterator(chunk_size)
+
+
+def export_changes(
+    format: str = "ndjson",
+    rows_per_file: int = ROWS_PER_FILE,
+    settle_seconds: int = SETTLE_SECONDS,
+    chunk_size: int = CHUNK_SIZE,
+) -> RunResult:
+    """
+    Export the predictions created since the last run and publish a manifest.
+
+    Args:
+        format (str): "ndjson" or "csv".
+        rows_per_file (int): Rows per part file before starting another.
+        settle_seconds (int): Leave rows younger than this for the next run.
+        chunk_size (int): Rows fetched from the database at a time.
+
+    Raises:
+        ExportInProgress: If another process is exporting.
+
+    Returns:
+        RunResult: The run, with no manifest when there was nothing new.
+    """
+    if format not in FORMATS:
+        raise ValueError(f"unknown format {format!r}")
+    with advisory_lock(LOCK_NAME) as acquired:
+        if not acquired:
+            raise ExportInProgress("another warehouse export is running")
+        return _export(format, rows_per_file, settle_seconds, chunk_size)
+
+
+def _export(
+    format: str, rows_per_file: int, settle_seconds: int, chunk_size: int
+) -> RunResult:
+    state = _recover()
+    result = RunResult(run=state["run"] + 1)
+    started_at = timezone.now()
+    cutoff = started_at - timedelta(seconds=settle_seconds)
+    high_water = dict(state["high_water"])
+    pending: Dict[str, Any] = {"run": result.run, "parts": []}
+    files: List[Dict[str, Any]] = []
+    sources: Dict[str, Dict[str, int]] = {}
+    timestamp_index = COLUMNS.index("timestamp")
+
+    for alias in sharding.history_aliases():
+        mark = high_water.get(alias, {"id": 0})
+        open_parts: Dict[str, _Part] = {}
+        rows = 0
+        for row in new_rows(alias, mark["id"], cutoff, chunk_size):
+            timestamp = row[timestamp_index].astimezone(dt_timezone.utc)
+            partition = f"dt={timestamp.date().isoformat()}"
+            part = open_parts.get(partition)
+            if part is None or part.rows >= rows_per_file:
+                if part is not None:
+                    files.append(part.close())
+                relative = (
+                    f"{partition}/part-r{result.run:08d}-{alias}-"
+                    f"{len(pending['parts']) + 1:04d}.{format}.gz"
+                )
+                pending["parts"].append(relative)
+                _save_checkpoint({**state, "pending": pending})
+                part = open_parts[partition] = _Part(relative, partition, alias, format)
+            part.write(row)
+            rows += 1
+            last = row
+        files.extend(part.close() for part in open_parts.values())
+        if rows:
+            high_water[alias] = {
+                "id": last[0],
+                "timestamp": last[timestamp_index].isoformat(),
+            }
+            sources[alias] = {
+                "from_id": mark["id"] + 1,
+                "to_id": last[0],
+                "rows": rows,
+            }
+        result.rows += rows
+
+    if not result.rows:
+        return RunResult(run=state["run"])
+
+    files.sort(key=lambda part: part["path"])
+    manifest = {
+        "dataset": DATASET,
+        "run": result.run,
+        "format": format,
+        "compression": "gzip",
+        "columns": COLUMNS,
+        "started_at": started_at.isoformat(),
+        "finished_at": timezone.now().isoformat(),
+        "rows": result.rows,
+        "sources": sources,
+        "high_water": high_water,
+        "files": files,
+    }
+    path = manifest_path(result.run)
+    write_atomic(path, json.dumps(manifest, indent=2).encode())
+    _save_checkpoint({"run": result.run, "high_water": high_water, "pending": None})
+    result.parts = [part["path"] for part in files]
+    result.manifest = str(path.relative_to(export_dir()))
+    return result
+
+
+def verify_manifest(run: int) -> List[str]:
+    """
+    Check the parts listed in the manifest of `run` against their checksums.
+
+    Returns:
+        list[str]: Parts that are missing or whose SHA-256 does not match.
+    """
+    manifest = json.loads(manifest_path(run).read_text())
+    bad = []
+    for part in manifest["files"]:
+        path = export_dir() / part["path"]
+        if not path.exists():
+            bad.append(part["path"])
+            continue
+        digest = hashlib.sha256()
+        with open(path, "rb") as handle:
+            for block in iter(lambda: handle.read(1 << 20), b""):
+                digest.update(block)
+        if digest.hexdigest() != part["sha256"]:
+            bad.append(part["path"])
+    return bad
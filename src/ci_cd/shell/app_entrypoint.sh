@@ -41,5 +41,11 @@ if ! python src/brief_app/manage.py collectstatic --noinput; then
   exit 1
 fi
 
+echo "📄 Pre-rendering marketing pages..."
+if ! python src/brief_app/manage.py prerender_pages; then
+  echo "❌ Pre-rendering failed"
+  exit 1
+fi
+
 echo "🚀 Launching Gunicorn on port $GUNICORN_PORT..."
 exec gunicorn brief_app.wsgi:application --chdir src/brief_app --bind 0.0.0.0:$GUNICORN_PORT --access-logfile -